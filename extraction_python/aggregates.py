@@ -0,0 +1,257 @@
+"""
+Tables agrégées pré-calculées pour le tableau de bord.
+
+Ce que les requêtes Power Query (T_FactResults, T_players, T_classement_*)
+recalculent à chaque refresh est fait une fois ici, en pandas/NumPy
+vectorisé, juste après le scraping :
+  - agg_results.csv      : résultats enrichis (clés compétition / équipes, UBB domicile, V/N/D)
+  - agg_team_trend.csv   : une ligne par équipe et par match, moyennes glissantes sur 5 matchs
+  - agg_team_form.csv    : forme par équipe et compétition (bilan, 5 derniers matchs)
+  - agg_home_away.csv    : bilan domicile / extérieur par équipe et compétition
+  - agg_player_rates.csv : ratios par joueur ramenés à 80 minutes
+Power BI n'a plus qu'à lire ces petites tables.
+"""
+
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from fastpath import team_key  # noqa: F401  (réexporté : standings.py)
+from partitions import COMPETITION_CODES
+
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
+RESULTS_FILENAME = "results.csv"
+PLAYERS_FILENAME = "players.csv"
+
+OUTPUT_DIR = DATA_DIR
+CSV_SEP = ";"  # Excel FR
+
+FORM_WINDOW = 5
+MATCH_MINUTES = 80  # pas de temps de jeu sur le site : un match = 80 min
+
+UBB_TOKEN = "Bordeaux-Bègles"
+
+COMPETITION_KEYS = {"TOP14": 1, "CUP": 2}
+
+MONTHS_FR = {
+    "janvier": 1, "février": 2, "fevrier": 2, "mars": 3, "avril": 4,
+    "mai": 5, "juin": 6, "juillet": 7, "août": 8, "aout": 8,
+    "septembre": 9, "octobre": 10, "novembre": 11, "décembre": 12, "decembre": 12
+}
+DATE_PARTS_RE = r"(\d{1,2})\s+([^\s]+)\s+(\d{4})\s*$"
+
+
+# =========================
+# Helpers
+# =========================
+def read_csv_auto(path: Path) -> pd.DataFrame:
+    """Les exports utilisent ',' ou ';' selon le script : on détecte."""
+    return pd.read_csv(path, sep=None, engine="python", encoding="utf-8-sig")
+
+
+def parse_dates_fr(dates: pd.Series) -> pd.Series:
+    """'Samedi 6 septembre 2025' -> Timestamp (vectorisé)."""
+    parts = dates.astype("string").str.extract(DATE_PARTS_RE)
+    month = parts[1].str.lower().map(MONTHS_FR)
+    return pd.to_datetime(
+        pd.DataFrame({"year": pd.to_numeric(parts[2]), "month": month, "day": pd.to_numeric(parts[0])}),
+        errors="coerce",
+    )
+
+
+def season_of(dates: pd.Series) -> pd.Series:
+    """Saison rugby (août -> juin) : 2025-09-06 -> '2025-2026'."""
+    start = dates.dt.year - (dates.dt.month < 8).astype("Int64")
+    return start.astype("string") + "-" + (start + 1).astype("string")
+
+
+# =========================
+# Résultats
+# =========================
+def enrich_results(results: pd.DataFrame) -> pd.DataFrame:
+    """Équivalent de T_FactResults, calculé une fois."""
+    df = results.copy()
+    df["date"] = parse_dates_fr(df["date"])
+    df["season"] = season_of(df["date"])
+    df["competition_code"] = df["competition"].map(COMPETITION_CODES).fillna("OTHER")
+    df["competition_key"] = df["competition_code"].map(COMPETITION_KEYS).fillna(0).astype(int)
+
+    df["home_team_key"] = df["team_home"].map(team_key)
+    df["away_team_key"] = df["team_away"].map(team_key)
+
+    ubb_key = team_key(UBB_TOKEN)
+    is_home = df["home_team_key"].str.endswith(ubb_key).to_numpy()
+    home = df["score_home"].to_numpy()
+    away = df["score_away"].to_numpy()
+
+    df["ubb_is_home"] = is_home
+    df["ubb_points"] = np.where(is_home, home, away)
+    df["opp_points"] = np.where(is_home, away, home)
+    df["ubb_diff"] = df["ubb_points"] - df["opp_points"]
+    df["ubb_result"] = np.select([df["ubb_diff"] > 0, df["ubb_diff"] == 0], ["W", "D"], "L")
+    df["opponent"] = np.where(is_home, df["team_away"], df["team_home"])
+
+    df["match_id"] = (
+        df["date"].dt.strftime("%Y%m%d") + "_" + df["competition_key"].astype(str)
+        + "_" + df["home_team_key"] + "_" + df["away_team_key"]
+    )
+    return df.sort_values(["date", "competition_key"], kind="stable").reset_index(drop=True)
+
+
+def team_match_long(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Une ligne par (équipe, match) : chaque match donne une ligne domicile
+    et une ligne extérieur. Base commune des tables de forme.
+    """
+    common = ["match_id", "date", "season", "competition", "competition_code"]
+    home = results[common].assign(
+        team=results["team_home"], team_key=results["home_team_key"],
+        opponent=results["team_away"], is_home=True,
+        pts_for=results["score_home"], pts_against=results["score_away"],
+    )
+    away = results[common].assign(
+        team=results["team_away"], team_key=results["away_team_key"],
+        opponent=results["team_home"], is_home=False,
+        pts_for=results["score_away"], pts_against=results["score_home"],
+    )
+    long = pd.concat([home, away], ignore_index=True)
+
+    diff = long["pts_for"] - long["pts_against"]
+    long["diff"] = diff
+    long["win"] = (diff > 0).astype(int)
+    long["draw"] = (diff == 0).astype(int)
+    long["loss"] = (diff < 0).astype(int)
+    long["result"] = np.select([diff > 0, diff == 0], ["W", "D"], "L")
+    return long.sort_values(["team_key", "date", "match_id"], kind="stable").reset_index(drop=True)
+
+
+def team_trend(long: pd.DataFrame, window: int = FORM_WINDOW) -> pd.DataFrame:
+    """Tendances par équipe : cumul et moyennes glissantes sur `window` matchs."""
+    df = long.copy()
+    g = df.groupby("team_key", sort=False)
+    df["match_no"] = g.cumcount() + 1
+    df["cum_pts_for"] = g["pts_for"].cumsum()
+    df["cum_pts_against"] = g["pts_against"].cumsum()
+
+    roll = g[["pts_for", "pts_against", "win"]].rolling(window, min_periods=1)
+    means = roll.mean().reset_index(level=0, drop=True)
+    df[f"last{window}_pts_for_avg"] = means["pts_for"].round(2)
+    df[f"last{window}_pts_against_avg"] = means["pts_against"].round(2)
+    df[f"last{window}_win_rate"] = means["win"].round(3)
+    return df
+
+
+def team_form(long: pd.DataFrame, window: int = FORM_WINDOW) -> pd.DataFrame:
+    """Bilan par équipe et compétition + forme sur les `window` derniers matchs."""
+    keys = ["team_key", "competition_code"]
+    totals = long.groupby(keys).agg(
+        team=("team", "last"),
+        matches=("match_id", "count"),
+        w=("win", "sum"),
+        n=("draw", "sum"),
+        d=("loss", "sum"),
+        pts_for=("pts_for", "sum"),
+        pts_against=("pts_against", "sum"),
+        last_match=("date", "max"),
+    )
+    totals["diff"] = totals["pts_for"] - totals["pts_against"]
+
+    last = long.groupby(keys, group_keys=False).tail(window)
+    recent = last.groupby(keys).agg(
+        **{
+            f"last{window}_form": ("result", "".join),  # ex: "WWLDW" (plus ancien -> plus récent)
+            f"last{window}_w": ("win", "sum"),
+            f"last{window}_pts_for": ("pts_for", "sum"),
+            f"last{window}_pts_against": ("pts_against", "sum"),
+        }
+    )
+    return totals.join(recent).reset_index()
+
+
+def home_away_splits(long: pd.DataFrame) -> pd.DataFrame:
+    keys = ["team_key", "competition_code", "is_home"]
+    out = long.groupby(keys).agg(
+        team=("team", "last"),
+        matches=("match_id", "count"),
+        w=("win", "sum"),
+        n=("draw", "sum"),
+        d=("loss", "sum"),
+        pts_for=("pts_for", "sum"),
+        pts_against=("pts_against", "sum"),
+    ).reset_index()
+    out["venue"] = np.where(out["is_home"], "Domicile", "Extérieur")
+    out["win_rate"] = (out["w"] / out["matches"]).round(3)
+    out["pts_for_avg"] = (out["pts_for"] / out["matches"]).round(2)
+    out["pts_against_avg"] = (out["pts_against"] / out["matches"]).round(2)
+    return out
+
+
+# =========================
+# Joueurs
+# =========================
+def player_rates(players: pd.DataFrame) -> pd.DataFrame:
+    """Essais / points par 80 minutes (= par match) et part des sélections."""
+    df = players.copy()
+    for col in ("caps", "matches", "tries", "points", "since_year"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+
+    matches = df["matches"].astype(float).to_numpy()
+    played = np.where(matches > 0, matches, np.nan)
+    minutes = played * MATCH_MINUTES
+
+    df["minutes_est"] = minutes
+    df["tries_per_80"] = np.round(df["tries"].astype(float).to_numpy() / minutes * MATCH_MINUTES, 3)
+    df["points_per_80"] = np.round(df["points"].astype(float).to_numpy() / minutes * MATCH_MINUTES, 3)
+    df["points_per_try"] = np.round(
+        df["points"].astype(float).to_numpy() / np.where(df["tries"].astype(float) > 0, df["tries"].astype(float), np.nan),
+        2,
+    )
+    df["position_rank_points_per_80"] = (
+        df.groupby("position")["points_per_80"].rank(ascending=False, method="min").astype("Int64")
+    )
+    cols = [
+        "player_id", "name", "position", "matches", "tries", "points", "caps",
+        "minutes_est", "tries_per_80", "points_per_80", "points_per_try", "position_rank_points_per_80",
+    ]
+    return df[[c for c in cols if c in df.columns]]
+
+
+# =========================
+# MAIN
+# =========================
+def build_aggregates(data_dir: Path = DATA_DIR) -> Dict[str, pd.DataFrame]:
+    results = enrich_results(read_csv_auto(data_dir / RESULTS_FILENAME))
+    long = team_match_long(results)
+
+    tables = {
+        "agg_results": results,
+        "agg_team_trend": team_trend(long),
+        "agg_team_form": team_form(long),
+        "agg_home_away": home_away_splits(long),
+    }
+    players_path = data_dir / PLAYERS_FILENAME
+    if players_path.exists():
+        tables["agg_player_rates"] = player_rates(read_csv_auto(players_path))
+    return tables
+
+
+def write_aggregates(tables: Dict[str, pd.DataFrame], out_dir: Path = OUTPUT_DIR) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, df in tables.items():
+        path = out_dir / f"{name}.csv"
+        df.to_csv(path, index=False, sep=CSV_SEP, encoding="utf-8-sig", date_format="%Y-%m-%d")
+        print(f"✅ {path} ({len(df)} lignes)")
+
+
+def main():
+    write_aggregates(build_aggregates(DATA_DIR), OUTPUT_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Archive compressée (style WARC) de toutes les pages HTML fetchées.
+
+Quand on corrige un parser (parse_month_section, parse_global_stats...), on
+ne peut régénérer l'historique qu'en re-scrapant... et les anciennes pages
+n'existent plus. Chaque réponse HTML est donc ajoutée à une archive
+append-only :
+
+    ARCHIVE_DIR/ubb-20260124-<pid>.warc.gz   un membre gzip par page (enregistrement WARC "resource")
+    ARCHIVE_DIR/index.sqlite                 url, type de page, date de fetch -> segment + offset + longueur
+
+Un membre gzip se décompresse seul : lire une page = seek(offset) +
+read(length). Une page identique à la précédente (même URL, même sha1) n'est
+pas réécrite : l'index pointe sur l'enregistrement existant. Un segment par
+jour et par processus : les workers de `crawl_worker --processes` n'ajoutent
+jamais dans le même fichier, l'offset lu avant l'écriture reste exact.
+
+Les sessions des extracteurs s'abonnent via `attach(session)` (hook
+requests). `reparse` rejoue une période de l'archive dans les extracteurs
+actuels, en parallèle, sans réseau :
+
+    python archive.py list --type player
+    python archive.py reparse --since 2025-09-01 --until 2026-01-31 --type calendar
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# =========================
+# CONFIG
+# =========================
+ARCHIVE_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data") / "archive"
+REPARSE_DIR = ARCHIVE_DIR.parent / "reparse"
+INDEX_FILENAME = "index.sqlite"
+SEGMENT_PATTERN = "ubb-{day}-{pid}.warc.gz"  # un segment par jour et par processus écrivain
+
+ARCHIVE_ENABLED = True
+REPARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# type de page déduit de l'URL (même découpage que crawl_targets.parse_page)
+PAGE_TYPES = [
+    ("player", re.compile(r"/effectif/j\d+-", re.IGNORECASE)),
+    ("roster", re.compile(r"/effectif\.html$", re.IGNORECASE)),
+    ("calendar", re.compile(r"/calendrier-resultats\.html$", re.IGNORECASE)),
+    ("ranking", re.compile(r"/classement\.html$", re.IGNORECASE)),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    url         TEXT NOT NULL,
+    page_type   TEXT,
+    fetched_at  REAL NOT NULL,
+    segment     TEXT NOT NULL,
+    offset      INTEGER NOT NULL,
+    length      INTEGER NOT NULL,
+    sha1        TEXT NOT NULL,
+    encoding    TEXT,
+    status      INTEGER
+);
+CREATE INDEX IF NOT EXISTS responses_url ON responses (url, fetched_at);
+CREATE INDEX IF NOT EXISTS responses_type ON responses (page_type, fetched_at);
+"""
+
+
+def page_type_of(url: str) -> Optional[str]:
+    path = url.split("?", 1)[0]
+    for page_type, pattern in PAGE_TYPES:
+        if pattern.search(path):
+            return page_type
+    return None
+
+
+# =========================
+# Enregistrements WARC
+# =========================
+def warc_record(url: str, body: bytes, fetched_at: float, encoding: Optional[str]) -> bytes:
+    date = datetime.fromtimestamp(fetched_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    content_type = "text/html" + (f"; charset={encoding}" if encoding else "")
+    header = (
+        "WARC/1.0\r\n"
+        "WARC-Type: resource\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Payload-Digest: sha1:{hashlib.sha1(body).hexdigest()}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "\r\n"
+    ).encode("utf-8")
+    return header + body + b"\r\n\r\n"
+
+
+def read_record(segment: Path, offset: int, length: int) -> bytes:
+    """Corps HTML d'un enregistrement (un membre gzip)."""
+    with open(segment, "rb") as fp:
+        fp.seek(offset)
+        record = gzip.decompress(fp.read(length))
+    header, _, rest = record.partition(b"\r\n\r\n")
+    m = re.search(rb"Content-Length: (\d+)", header)
+    return rest[: int(m.group(1))] if m else rest
+
+
+class HtmlArchive:
+    def __init__(self, root: Path = ARCHIVE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # fetchs concurrents (crawl_targets) ; entre processus : segments distincts
+        self._conn = sqlite3.connect(self.root / INDEX_FILENAME, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # ---------- écriture ----------
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        fetched_at: Optional[float] = None,
+        encoding: Optional[str] = None,
+        status: int = 200,
+        page_type: Optional[str] = None,
+    ) -> None:
+        fetched_at = fetched_at or time.time()
+        digest = hashlib.sha1(body).hexdigest()
+        page_type = page_type or page_type_of(url)
+
+        with self._lock:
+            last = self._conn.execute(
+                "SELECT segment, offset, length, sha1 FROM responses WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,),
+            ).fetchone()
+            if last and last[3] == digest:
+                segment, offset, length = last[0], last[1], last[2]  # page inchangée : on réutilise
+            else:
+                segment = SEGMENT_PATTERN.format(day=time.strftime("%Y%m%d", time.localtime(fetched_at)), pid=os.getpid())
+                member = gzip.compress(warc_record(url, body, fetched_at, encoding))
+                with open(self.root / segment, "ab") as fp:
+                    offset = fp.seek(0, os.SEEK_END)
+                    fp.write(member)
+                length = len(member)
+
+            self._conn.execute(
+                "INSERT INTO responses (url, page_type, fetched_at, segment, offset, length, sha1, encoding, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, page_type, fetched_at, segment, offset, length, digest, encoding, status),
+            )
+            self._conn.commit()
+
+    def hook(self, r, *args, **kwargs):
+        """Hook `response` de requests : archive les réponses HTML 200."""
+        if r.status_code == 200 and "html" in r.headers.get("Content-Type", "text/html"):
+            try:
+                self.put(r.url, r.content, encoding=r.encoding, status=r.status_code)
+            except Exception as e:  # l'archive ne doit jamais casser un scraping
+                print(f"❌ archive {r.url}: {e}")
+        return r
+
+    def attach(self, session):
+        session.hooks["response"].append(self.hook)
+        return session
+
+    # ---------- lecture ----------
+    def entries(
+        self,
+        page_type: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        url: Optional[str] = None,
+    ) -> List[Dict]:
+        sql = "SELECT * FROM responses WHERE 1 = 1"
+        params: list = []
+        for clause, value in (
+            ("page_type = ?", page_type), ("fetched_at >= ?", since), ("fetched_at < ?", until), ("url = ?", url),
+        ):
+            if value is not None:
+                sql += f" AND {clause}"
+                params.append(value)
+        cur = self._conn.execute(sql + " ORDER BY fetched_at", params)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur]
+
+    def body(self, entry: Dict) -> bytes:
+        return read_record(self.root / entry["segment"], entry["offset"], entry["length"])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_DEFAULT: Optional[HtmlArchive] = None
+
+
+def attach(session):
+    """Branche l'archive par défaut sur une session (no-op si ARCHIVE_ENABLED = False)."""
+    global _DEFAULT
+    if not ARCHIVE_ENABLED:
+        return session
+    if _DEFAULT is None:
+        _DEFAULT = HtmlArchive(ARCHIVE_DIR)
+    return _DEFAULT.attach(session)
+
+
+# =========================
+# Re-parse
+# =========================
+def parse_archived(task: Tuple[str, str, str, int, int, Optional[str]]) -> List[Dict]:
+    """Worker (processus) : lit un enregistrement et le passe dans l'extracteur actuel."""
+    segment, url, page_type, offset, length, encoding = task
+    html = read_record(Path(segment), offset, length).decode(encoding or "utf-8", errors="replace")
+    if page_type == "player":
+        import extract_players
+        rows = [extract_players.parse_player(url, html)]
+    elif page_type == "calendar":
+        import extract_results
+        rows = list(extract_results.parse_results(html))
+    elif page_type == "ranking":
+        import extract_classement
+        rows = list(extract_classement.parse_classements(html))
+    else:
+        return []
+    return [r.as_dict() for r in rows]
+
+
+def record_class(page_type: str):
+    from records import MatchRow, PlayerRow, StandingRow
+    return {"player": PlayerRow, "calendar": MatchRow, "ranking": StandingRow}[page_type]
+
+
+def reparse(
+    page_type: str,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    archive: Optional[HtmlArchive] = None,
+    out_dir: Path = REPARSE_DIR,
+    workers: int = REPARSE_WORKERS,
+) -> Path:
+    """Rejoue les pages archivées d'un type -> CSV (une ligne par record, avec fetched_at / url)."""
+    from sinks import CsvSink
+
+    archive = archive or HtmlArchive(ARCHIVE_DIR)
+    entries = archive.entries(page_type=page_type, since=since, until=until)
+    tasks = [
+        (str(archive.root / e["segment"]), e["url"], page_type, e["offset"], e["length"], e["encoding"])
+        for e in entries
+    ]
+    columns = ["fetched_at", "url"] + [f.name for f in fields(record_class(page_type)) if f.name != "url"]
+    out_path = out_dir / f"{page_type}_reparse.csv"
+
+    with CsvSink(out_path, columns) as sink, ProcessPoolExecutor(max_workers=workers) as pool:
+        for entry, rows in zip(entries, pool.map(parse_archived, tasks, chunksize=8)):
+            fetched = datetime.fromtimestamp(entry["fetched_at"]).isoformat(timespec="seconds")
+            for row in rows:
+                sink.write({**row, "fetched_at": fetched, "url": row.get("url") or entry["url"]})
+
+    print(f"✅ {len(entries)} pages '{page_type}' re-parsées -> {out_path} ({sink.count} lignes)")
+    return out_path
+
+
+def to_timestamp(day: Optional[str]) -> Optional[float]:
+    return datetime.strptime(day, "%Y-%m-%d").timestamp() if day else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive HTML (WARC) et re-parse hors ligne")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("list", "reparse"):
+        p = sub.add_parser(name)
+        p.add_argument("--type", choices=[t for t, _ in PAGE_TYPES], required=(name == "reparse"))
+        p.add_argument("--since", help="AAAA-MM-JJ (inclus)")
+        p.add_argument("--until", help="AAAA-MM-JJ (exclu)")
+        if name == "reparse":
+            p.add_argument("--workers", type=int, default=REPARSE_WORKERS)
+    args = parser.parse_args()
+
+    archive = HtmlArchive(ARCHIVE_DIR)
+    since, until = to_timestamp(args.since), to_timestamp(args.until)
+    if args.cmd == "list":
+        for e in archive.entries(page_type=args.type, since=since, until=until):
+            fetched = datetime.fromtimestamp(e["fetched_at"]).isoformat(timespec="seconds")
+            print(f"{fetched}  {e['page_type'] or '-':<9} {e['segment']}@{e['offset']}  {e['url']}")
+    else:
+        if args.type == "roster":
+            parser.error("les pages effectif ne produisent pas de dataset")
+        reparse(args.type, since, until, archive, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Backfill des saisons passées (calendrier-résultats, classement, effectif).
+
+URL_RESULTS / ROSTER_URL ne pointent que sur la saison en cours. Ici, les
+pages des saisons passées sont construites depuis SEASON_URLS, fetchées en
+parallèle sous le throttle partagé de crawl_targets (politesse par hôte),
+parsées par les extracteurs existants dans le pool de processus de
+pipeline.py, puis écrites par saison :
+
+    OUTPUT_DIR/2023-2024/results.csv
+    OUTPUT_DIR/2023-2024/ubb_top14_classement.csv, ubb_champions_cup_classement.csv
+    OUTPUT_DIR/2023-2024/players.csv   (effectif de la saison ; les fiches donnent les totaux actuels)
+
+Le paramètre de saison des URLs n'est pas garanti : le calendrier parsé doit
+contenir des matchs de la saison demandée (sinon la page est en échec et la
+saison n'est pas écrite, classement et effectif compris), pour ne pas
+enregistrer la saison en cours sous le nom d'une saison passée.
+
+Reprise : chaque page (et chaque fiche joueur, partagée entre saisons) est
+persistée dans un checkpoint SQLite dès qu'elle est parsée ; relancer ne
+refait que ce qui manque. Une saison passée ne change plus : pas de
+rafraîchissement.
+
+    python backfill.py                    # les 10 saisons précédentes
+    python backfill.py 2019-2020 2020-2021
+    python backfill.py --seasons 5 --no-players
+"""
+
+import argparse
+import re
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+import crawl_targets
+import extract_classement
+import extract_players
+import extract_results
+import partitions
+from checkpoint import CrawlCheckpoint, body_hash
+from fingerprint import DriftError
+from pipeline import PARSE_WORKERS, FetchParsePipeline, Job
+from records import MatchRow, PlayerRow, StandingRow
+from sinks import CsvSink
+
+
+# =========================
+# CONFIG
+# =========================
+OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data") / "seasons"
+CHECKPOINT_FILENAME = "backfill_checkpoint.sqlite"
+
+DEFAULT_SEASONS = 10
+
+# sélecteur de saison du site : {season} = "2023-2024", {start} = 2023, {end} = 2024
+SEASON_URLS = {
+    "calendar": "https://www.ubbrugby.com/equipes/equipe-premiere/calendrier-resultats.html?saison={season}",
+    "ranking": "https://www.ubbrugby.com/equipes/equipe-premiere/classement.html?saison={season}",
+    "roster": "https://www.ubbrugby.com/equipes/equipe-premiere/effectif.html?saison={season}",
+}
+
+PAST_SEASON_REFRESH = 10 * 365 * 86400  # une saison terminée ne bouge plus
+
+SEASON_RE = re.compile(r"^(\d{4})-(\d{4})$")
+
+
+# =========================
+# Saisons
+# =========================
+def current_season_start(today: Optional[date] = None) -> int:
+    """Saison rugby août -> juin : 2026-01-24 -> 2025."""
+    today = today or date.today()
+    return today.year if today.month >= 8 else today.year - 1
+
+
+def past_seasons(n: int = DEFAULT_SEASONS, today: Optional[date] = None) -> List[str]:
+    start = current_season_start(today)
+    return [f"{y}-{y + 1}" for y in range(start - 1, start - 1 - n, -1)]
+
+
+def season_urls(season: str) -> Dict[str, str]:
+    m = SEASON_RE.match(season)
+    if not m or int(m.group(2)) != int(m.group(1)) + 1:
+        raise ValueError(f"saison invalide : {season} (attendu AAAA-AAAA)")
+    return {kind: tpl.format(season=season, start=m.group(1), end=m.group(2)) for kind, tpl in SEASON_URLS.items()}
+
+
+def season_mismatch(season: str, rows: List[MatchRow]) -> Optional[str]:
+    """Motif de rejet si le calendrier parsé n'est pas celui de `season` (None si conforme)."""
+    labels = []
+    for row in rows:
+        try:
+            labels.append(partitions.season_label(date.fromisoformat(row.date_iso or "")))
+        except ValueError:
+            continue
+    if not labels:
+        return f"calendrier {season} : aucun match daté, saison non vérifiable"
+    other = sorted({label for label in labels if label != season})
+    if other:
+        return f"calendrier {season} : matchs d'une autre saison ({', '.join(other)}) -> paramètre de saison ignoré par le site ?"
+    return None
+
+
+# =========================
+# Crawl
+# =========================
+def parse_page(job: Job, body: bytes, encoding: Optional[str]):
+    """Processus du pool : extracteurs de crawl_targets + hash du HTML (checkpoint)."""
+    result, fp = crawl_targets.parse_page(job, body, encoding)
+    return result, fp, body_hash(body.decode(encoding or "utf-8", errors="replace"))
+
+
+def backfill(
+    seasons: List[str],
+    session: requests.Session,
+    out_dir: Path = OUTPUT_DIR,
+    players: bool = True,
+) -> CrawlCheckpoint:
+    """Crawl (ou reprise) des pages des saisons ; le checkpoint contient tous les records."""
+    pages = {url: (kind, season) for season in seasons for kind, url in season_urls(season).items()}
+    if not players:
+        pages = {url: ks for url, ks in pages.items() if ks[0] != "roster"}
+
+    ckpt = CrawlCheckpoint(out_dir / CHECKPOINT_FILENAME, refresh_after=PAST_SEASON_REFRESH)
+    ckpt.add(list(pages))
+    pipeline = FetchParsePipeline(
+        partial(crawl_targets.fetch, session),
+        parse_page,
+        io_workers=crawl_targets.MAX_WORKERS,
+        parse_workers=PARSE_WORKERS,
+        queue_size=crawl_targets.QUEUE_SIZE,
+    )
+
+    submitted = set()  # fiche partagée entre saisons : un seul fetch
+
+    def submit_players(urls: List[str], season: str) -> None:
+        ckpt.add(urls)
+        pending = set(ckpt.pending())
+        for url in urls:
+            if url in pending and url not in submitted:
+                submitted.add(url)
+                pipeline.submit(("player", season, url))
+
+    todo = set(ckpt.pending())
+    for url in todo:
+        if url in pages:
+            kind, season = pages[url]
+            pipeline.submit((kind, season, url))
+
+    # reprise : effectifs déjà faits, fiches joueurs encore à faire
+    if players:
+        for row in ckpt.rows():
+            ks = pages.get(row["url"])
+            if ks and ks[0] == "roster" and row["record"] is not None and row["url"] not in todo:
+                submit_players(row["record"]["rows"], ks[1])
+
+    def on_result(job: Job, result, error: Optional[BaseException]) -> None:
+        kind, season, url = job
+        try:
+            if error is not None:
+                raise error
+            result, fp, digest = result
+            crawl_targets.GUARD.compare(kind, fp, url)
+            if kind == "player":
+                row, _ = result
+                ckpt.mark_done(url, digest, row.as_dict())
+                return
+            if kind == "calendar":
+                mismatch = season_mismatch(season, result)
+                if mismatch:
+                    raise ValueError(mismatch)
+            rows = result if kind == "roster" else [r.as_dict() for r in result]
+            ckpt.mark_done(url, digest, {"rows": rows})
+            print(f"✅ [{season}] {kind} : {len(rows)} lignes")
+            if kind == "roster":
+                submit_players(result, season)
+        except DriftError as e:
+            print(f"❌ [{season}] {kind} : {e}")
+        except Exception as e:
+            ckpt.mark_failed(url, str(e))
+            print(f"❌ [{season}] {kind} {url}: {e}")
+
+    pipeline.run(on_result)
+    return ckpt
+
+
+# =========================
+# Export par saison
+# =========================
+def write_seasons(ckpt: CrawlCheckpoint, seasons: List[str], out_dir: Path = OUTPUT_DIR) -> Dict[str, Dict[str, int]]:
+    records = {row["url"]: row["record"] for row in ckpt.rows() if row["record"] is not None}
+    counts: Dict[str, Dict[str, int]] = {}
+
+    for season in seasons:
+        urls = season_urls(season)
+        season_dir = out_dir / season
+        counts[season] = {}
+
+        calendar = records.get(urls["calendar"])
+        rows = [MatchRow(**r) for r in calendar["rows"]] if calendar is not None else []
+        mismatch = season_mismatch(season, rows) if calendar is not None else f"calendrier {season} non crawlé"
+        if mismatch:  # saison non vérifiée : ni résultats, ni classement, ni effectif
+            print(f"❌ [{season}] {mismatch} : saison non écrite")
+            continue
+
+        rows.sort(key=lambda r: r.date_iso)
+        with CsvSink(season_dir / extract_results.OUTPUT_FILENAME, extract_results.RESULT_COLUMNS,
+                     constants={"source_url": urls["calendar"]}) as sink:
+            for row in rows:
+                sink.write(row)
+        counts[season]["results"] = sink.count
+        partitions.write_dataset("results", (r.as_dict() for r in rows), extract_results.RESULT_COLUMNS,
+                                 partitions.match_partition, constants={"source_url": urls["calendar"]})
+
+        ranking = records.get(urls["ranking"])
+        if ranking is not None:
+            constants = {"source_url": urls["ranking"]}
+            with CsvSink(season_dir / extract_classement.TOP14_FILENAME, extract_classement.TOP14_COLUMNS,
+                         sep=extract_classement.CSV_SEP, constants=constants) as top14, \
+                    CsvSink(season_dir / extract_classement.CHAMPIONS_CUP_FILENAME, extract_classement.CC_COLUMNS,
+                            sep=extract_classement.CSV_SEP, constants=constants) as cc:
+                rows = [StandingRow(**r) for r in ranking["rows"]]
+                for row in rows:
+                    (top14 if row.competition == "Top 14" else cc).write(row)
+            counts[season]["top14"] = top14.count
+            counts[season]["champions_cup"] = cc.count
+            extract_classement.write_partitions(rows, season, constants)
+
+        roster = records.get(urls["roster"])
+        if roster is not None:
+            with CsvSink(season_dir / extract_players.OUTPUT_FILENAME, extract_players.PLAYER_COLUMNS) as sink:
+                for url in roster["rows"]:
+                    record = records.get(url)
+                    sink.write(PlayerRow(**record) if record is not None else
+                               PlayerRow(player_id=extract_players.extract_player_id(url), url=url, error="non crawlé"))
+            counts[season]["players"] = sink.count
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill des saisons passées")
+    parser.add_argument("seasons", nargs="*", help="ex: 2022-2023 (défaut : les N saisons précédentes)")
+    parser.add_argument("--seasons", dest="n", type=int, default=DEFAULT_SEASONS, help="nombre de saisons passées")
+    parser.add_argument("--no-players", action="store_true", help="sans effectifs ni fiches joueurs")
+    args = parser.parse_args()
+
+    seasons = args.seasons or past_seasons(args.n)
+    print(f"✅ {len(seasons)} saison(s) : {', '.join(seasons)}")
+
+    with backfill(seasons, crawl_targets.build_session(), OUTPUT_DIR, players=not args.no_players) as ckpt:
+        print(f"📌 Checkpoint : {ckpt.stats()}")
+        for season, counts in write_seasons(ckpt, seasons, OUTPUT_DIR).items():
+            print(f"✅ [{season}] {OUTPUT_DIR / season} {counts}")
+    print(f"⏱️ Throttle : {crawl_targets.THROTTLE.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+Flux de changements (CDC) commun à tous les datasets.
+
+Les consommateurs (Power BI, scripts, API) rechargent results, classements,
+players et photos en entier et font leur propre diff. Ici, après chaque
+publication, chaque dataset est comparé à l'état précédent, clé par clé :
+
+    results            date + competition + team_home + team_away
+    classement_top14   competition (TOP14) + team
+    classement_cup     competition (CUP) + team
+    players            player_id
+    PlayersPhotosURL   player_id
+
+et chaque différence devient un événement insert / update / delete, numéroté
+(`seq`, croissant sur tous les datasets) et ajouté à un journal JSONL :
+
+    DATA_DIR/changelog/000000000001.jsonl   segments, nommés par leur 1er seq
+    DATA_DIR/changelog/changelog.sqlite     état par clé (hash + ligne), seq validé, offsets des consommateurs
+
+    {"seq": 42, "ts": "2026-01-24T18:05:00", "release": "20260124-180500",
+     "dataset": "results", "op": "update", "key": {...}, "row": {...},
+     "before": {...}, "changed": ["score_home", "score_away"]}
+
+Un consommateur reprend à son offset (dernier seq traité) : lire les
+nouveaux événements coûte O(changements), quelle que soit la taille des
+datasets. Les segments sont écrits avant la validation de l'état : après un
+arrêt brutal, les événements non validés sont retirés à la réouverture par
+le producteur et recalculés au capture suivant (un seul producteur :
+`capture_all`, appelé par le scheduler). Par défaut, ChangeFeed s'ouvre en
+lecture : un consommateur ne touche jamais aux événements en cours d'écriture.
+
+    feed = ChangeFeed()                  # producer=False
+    consumer = Consumer(feed, "powerbi", datasets=["results"])
+    for event in consumer.poll():
+        ...
+    consumer.commit()
+
+    python changelog.py capture                       # datasets de la version courante
+    python changelog.py tail --after 40 --dataset results
+    python changelog.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import publish
+from fastpath import read_csv_rows
+
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = publish.DATA_DIR
+CHANGELOG_DIR = DATA_DIR / "changelog"
+STATE_FILENAME = "changelog.sqlite"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_BYTES = 16 * 1024 * 1024  # nouveau segment au-delà (lecture : on saute les segments entiers)
+
+DEFAULT_BATCH = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class Tracked:
+    name: str                         # dataset publié (fichier <name>.csv)
+    key: Tuple[str, ...]
+    competition: Optional[str] = None  # classements : compétition ajoutée à la clé
+
+    def key_of(self, row: Dict) -> Optional[Dict]:
+        key = {c: row.get(c) for c in self.key}
+        if any(v is None for v in key.values()):
+            return None  # ligne en erreur (ex: fiche joueur sans id) : pas suivie
+        if self.competition:
+            key = {"competition": self.competition, **key}
+        return key
+
+
+TRACKED = [
+    Tracked("results", ("date", "competition", "team_home", "team_away")),
+    Tracked("classement_top14", ("team",), "TOP14"),
+    Tracked("classement_cup", ("team",), "CUP"),
+    Tracked("players", ("player_id",)),
+    Tracked("PlayersPhotosURL", ("player_id",)),
+]
+
+
+# =========================
+# HELPERS
+# =========================
+def dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def row_hash(row: Dict) -> str:
+    return hashlib.sha1(dumps(row).encode("utf-8")).hexdigest()
+
+
+def changed_columns(before: Dict, after: Dict) -> List[str]:
+    return sorted(c for c in before.keys() | after.keys() if before.get(c) != after.get(c))
+
+
+def event_line(event: Dict) -> str:
+    """`seq` en tête de ligne : line_seq() le lit sans décoder tout l'événement."""
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def line_seq(line: str) -> int:
+    return int(line[len('{"seq":'):line.index(",")])
+
+
+def segment_name(first_seq: int) -> str:
+    return f"{first_seq:012d}{SEGMENT_SUFFIX}"
+
+
+# =========================
+# Journal
+# =========================
+class ChangeFeed:
+    """
+    Journal JSONL segmenté + état SQLite. Par défaut (API, consommateurs) :
+    lecture et offsets seulement, sans reprise ni capture. `producer=True`
+    (capture_all uniquement) : création, reprise après arrêt brutal, capture.
+    """
+
+    def __init__(self, root: Path = CHANGELOG_DIR, producer: bool = False):
+        self.root = Path(root)
+        self.producer = producer
+        if not producer:
+            # mode=rw : pas de création d'un journal vide si le producteur n'a jamais tourné
+            self._conn = sqlite3.connect((self.root / STATE_FILENAME).resolve().as_uri() + "?mode=rw", uri=True)
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.root / STATE_FILENAME)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS state (
+                dataset TEXT NOT NULL, key TEXT NOT NULL, hash TEXT NOT NULL, row TEXT NOT NULL,
+                PRIMARY KEY (dataset, key)
+            );
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS consumers (name TEXT PRIMARY KEY, seq INTEGER NOT NULL, updated_at TEXT);
+            INSERT OR IGNORE INTO meta VALUES ('seq', 0);
+            """
+        )
+        self._conn.commit()
+        self._recover()
+
+    # ---- segments
+    def segments(self) -> List[Tuple[int, Path]]:
+        return sorted(
+            (int(p.stem), p) for p in self.root.glob(f"*{SEGMENT_SUFFIX}") if p.stem.isdigit()
+        )
+
+    def last_seq(self) -> int:
+        """Dernier seq validé (les lignes au-delà d'un segment ne sont pas encore valides)."""
+        return self._conn.execute("SELECT value FROM meta WHERE name = 'seq'").fetchone()[0]
+
+    def _recover(self) -> None:
+        """Retire les événements écrits mais non validés (arrêt entre segment et commit)."""
+        committed = self.last_seq()
+        for first, path in reversed(self.segments()):
+            if first > committed:
+                path.unlink()
+                continue
+            with open(path, encoding="utf-8") as fp:
+                lines = fp.readlines()
+            keep = [line for line in lines if line.endswith("\n") and line_seq(line) <= committed]
+            if len(keep) != len(lines):
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_text("".join(keep), encoding="utf-8")
+                os.replace(tmp, path)
+                print(f"📌 Changelog : {len(lines) - len(keep)} événements non validés retirés ({path.name})")
+            break
+
+    def _append(self, events: List[Dict]) -> None:
+        segments = self.segments()
+        path = segments[-1][1] if segments else None
+        if path is None or path.stat().st_size >= SEGMENT_BYTES:
+            path = self.root / segment_name(events[0]["seq"])
+        with open(path, "a", encoding="utf-8") as fp:
+            for event in events:
+                fp.write(event_line(event))
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def read(self, after: int = 0, datasets: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """Événements validés de seq > `after`, dans l'ordre (segments antérieurs sautés)."""
+        committed = self.last_seq()
+        wanted = set(datasets) if datasets else None
+        segments = self.segments()
+        start = 0
+        for i, (first, _) in enumerate(segments):
+            if first <= after + 1:
+                start = i
+        for _, path in segments[start:]:
+            with open(path, encoding="utf-8") as fp:
+                for line in fp:
+                    if not line.endswith("\n"):
+                        return  # ligne en cours d'écriture
+                    seq = line_seq(line)
+                    if seq <= after:
+                        continue
+                    if seq > committed:
+                        return  # pas encore validé
+                    event = json.loads(line)
+                    if wanted is None or event["dataset"] in wanted:
+                        yield event
+
+    # ---- capture
+    def capture(self, tracked: Tracked, rows: List[Dict], release: Optional[str] = None, ts: Optional[str] = None) -> Dict[str, int]:
+        """Diff de `rows` avec l'état du dataset -> événements ajoutés au journal."""
+        if not self.producer:
+            raise RuntimeError("ChangeFeed ouvert en consommateur : pas de capture")
+        ts = ts or datetime.now().isoformat(timespec="seconds")
+
+        current: Dict[str, Tuple[Dict, Dict]] = {}
+        for row in rows:
+            key = tracked.key_of(row)
+            if key is not None:
+                current[dumps(key)] = (key, row)
+        previous = {
+            k: (h, r) for k, h, r in self._conn.execute(
+                "SELECT key, hash, row FROM state WHERE dataset = ?", (tracked.name,)
+            )
+        }
+
+        seq = self.last_seq()
+        events, upserts = [], []
+        base = {"ts": ts, "release": release, "dataset": tracked.name}
+        for k in sorted(current):
+            key, row = current[k]
+            h = row_hash(row)
+            old = previous.get(k)
+            if old is not None and old[0] == h:
+                continue
+            seq += 1
+            if old is None:
+                events.append({"seq": seq, **base, "op": "insert", "key": key, "row": row})
+            else:
+                before = json.loads(old[1])
+                events.append({
+                    "seq": seq, **base, "op": "update", "key": key, "row": row,
+                    "before": before, "changed": changed_columns(before, row),
+                })
+            upserts.append((tracked.name, k, h, dumps(row)))
+        deleted = sorted(previous.keys() - current.keys())
+        for k in deleted:
+            seq += 1
+            events.append({"seq": seq, **base, "op": "delete", "key": json.loads(k), "before": json.loads(previous[k][1])})
+
+        counts = {op: sum(e["op"] == op for e in events) for op in ("insert", "update", "delete")}
+        if not events:
+            return counts
+
+        self._append(events)
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)", upserts)
+            self._conn.executemany("DELETE FROM state WHERE dataset = ? AND key = ?", [(tracked.name, k) for k in deleted])
+            self._conn.execute("UPDATE meta SET value = ? WHERE name = 'seq'", (seq,))
+        return counts
+
+    # ---- consommateurs
+    def offset(self, consumer: str) -> int:
+        row = self._conn.execute("SELECT seq FROM consumers WHERE name = ?", (consumer,)).fetchone()
+        return row[0] if row else 0
+
+    def commit_offset(self, consumer: str, seq: int) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO consumers VALUES (?, ?, ?)",
+                (consumer, seq, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def consumers(self) -> Dict[str, Dict]:
+        return {
+            name: {"seq": seq, "updated_at": updated_at}
+            for name, seq, updated_at in self._conn.execute("SELECT name, seq, updated_at FROM consumers ORDER BY name")
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "seq": self.last_seq(),
+            "segments": len(self.segments()),
+            "keys": dict(self._conn.execute("SELECT dataset, COUNT(*) FROM state GROUP BY dataset")),
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ChangeFeed":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Consumer:
+    """Lecteur nommé : reprend au dernier offset validé (`commit`)."""
+
+    def __init__(self, feed: ChangeFeed, name: str, datasets: Optional[Sequence[str]] = None):
+        self.feed = feed
+        self.name = name
+        self.datasets = set(datasets) if datasets else None
+        self.position = feed.offset(name)  # dernier seq lu (filtré ou non)
+
+    def poll(self, limit: int = DEFAULT_BATCH) -> List[Dict]:
+        out = []
+        for event in self.feed.read(self.position):
+            self.position = event["seq"]
+            if self.datasets is None or event["dataset"] in self.datasets:
+                out.append(event)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def commit(self, seq: Optional[int] = None) -> None:
+        self.feed.commit_offset(self.name, self.position if seq is None else seq)
+
+
+# =========================
+# Capture des datasets publiés
+# =========================
+def capture_all(data_dir: Path = DATA_DIR, root: Path = CHANGELOG_DIR, tracked: Sequence[Tracked] = TRACKED) -> Dict[str, Dict[str, int]]:
+    """Datasets de la version courante (DATA_DIR/current, sinon DATA_DIR)."""
+    current = data_dir / publish.CURRENT_LINK
+    src = current if current.exists() else data_dir
+    release = publish.current_release(data_dir)
+    counts = {}
+    with ChangeFeed(root, producer=True) as feed:
+        for t in tracked:
+            path = src / f"{t.name}.csv"
+            if not path.exists():
+                continue
+            counts[t.name] = feed.capture(t, read_csv_rows(path), release=release)
+            print(f"✅ Changelog {t.name} : {counts[t.name]}")
+        print(f"📌 Changelog : seq {feed.last_seq()}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flux de changements des datasets (CDC)")
+    parser.add_argument("--dir", default=str(CHANGELOG_DIR))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("capture")
+    p = sub.add_parser("tail")
+    p.add_argument("--after", type=int, default=0)
+    p.add_argument("--dataset", action="append")
+    p.add_argument("--limit", type=int, default=100)
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    if args.cmd == "capture":
+        capture_all(DATA_DIR, Path(args.dir))
+        return
+
+    with ChangeFeed(Path(args.dir)) as feed:
+        if args.cmd == "tail":
+            for i, event in enumerate(feed.read(args.after, args.dataset)):
+                if i >= args.limit:
+                    break
+                print(dumps(event))
+        else:
+            print(f"📌 {feed.stats()}")
+            for name, info in feed.consumers().items():
+                print(f"  {name}: {info}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Checkpoint durable d'un crawl (frontière d'URLs dans SQLite).
+
+Pour chaque URL : statut, date de fetch, hash du HTML, record parsé (JSON)
+et dernière erreur. Si le script plante au joueur 40/55, le run suivant ne
+refait que les URLs non terminées ; les URLs en échec sont réessayées avec
+un backoff exponentiel sur les runs suivants.
+
+    ckpt = CrawlCheckpoint(OUTPUT_DIR / "players_checkpoint.sqlite")
+    ckpt.add(urls)
+    for url in ckpt.pending():
+        ...
+        ckpt.mark_done(url, body_hash(html), record.as_dict())   # ou ckpt.mark_failed(url, str(e))
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+# =========================
+# CONFIG
+# =========================
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url           TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    fetched_at    REAL,
+    next_retry_at REAL,
+    body_hash     TEXT,
+    record        TEXT,
+    error         TEXT
+)
+"""
+
+
+def body_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class CrawlCheckpoint:
+    """
+    - `refresh_after` : un record plus vieux que ça (secondes) est re-crawlé
+      (sinon un run terminé ne rafraîchirait plus jamais les stats) ;
+    - backoff des échecs : base_backoff * 2^(tentatives-1), plafonné ;
+    - au-delà de `max_attempts`, l'URL est abandonnée (reste en échec).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        refresh_after: float = 12 * 3600,
+        base_backoff: float = 60.0,
+        max_backoff: float = 24 * 3600,
+        max_attempts: int = 8,
+    ):
+        self.path = Path(path)
+        self.refresh_after = refresh_after
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    # ---------- frontière ----------
+    def add(self, urls: List[str]) -> None:
+        """Ajoute les URLs inconnues (l'ordre d'ajout = ordre d'export)."""
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO frontier (url, status) VALUES (?, ?)",
+            [(u, PENDING) for u in urls],
+        )
+        self._conn.commit()
+
+    def pending(self, now: Optional[float] = None) -> List[str]:
+        """URLs à (re)faire : jamais faites, échecs dont le backoff est écoulé, records périmés."""
+        now = time.time() if now is None else now
+        cur = self._conn.execute(
+            """
+            SELECT url FROM frontier
+            WHERE status = ?
+               OR (status = ? AND attempts < ? AND COALESCE(next_retry_at, 0) <= ?)
+               OR (status = ? AND COALESCE(fetched_at, 0) <= ? AND COALESCE(next_retry_at, 0) <= ?)
+            ORDER BY rowid
+            """,
+            (PENDING, FAILED, self.max_attempts, now, DONE, now - self.refresh_after, now),
+        )
+        return [r[0] for r in cur]
+
+    def mark_done(self, url: str, digest: str, record: Dict) -> None:
+        """`digest` = body_hash(html), calculé par l'appelant (éventuellement dans un autre processus)."""
+        self._conn.execute(
+            """
+            UPDATE frontier
+            SET status = ?, attempts = 0, fetched_at = ?, next_retry_at = NULL,
+                body_hash = ?, record = ?, error = NULL
+            WHERE url = ?
+            """,
+            (DONE, time.time(), digest, json.dumps(record, ensure_ascii=False), url),
+        )
+        self._conn.commit()
+
+    def mark_failed(self, url: str, error: str) -> None:
+        (attempts,) = self._conn.execute(
+            "SELECT attempts FROM frontier WHERE url = ?", (url,)
+        ).fetchone() or (0,)
+        attempts += 1
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+        self._conn.execute(
+            """
+            UPDATE frontier
+            SET attempts = ?, next_retry_at = ?, error = ?,
+                status = CASE WHEN status = ? THEN ? ELSE ? END
+            WHERE url = ?
+            """,
+            # un record déjà valide reste "done" : on garde l'ancienne version plutôt que rien
+            (attempts, time.time() + delay, error, DONE, DONE, FAILED, url),
+        )
+        self._conn.commit()
+
+    # ---------- lecture ----------
+    def rows(self) -> Iterator[Dict]:
+        """Toutes les URLs avec leur état, dans l'ordre d'ajout."""
+        cur = self._conn.execute(
+            "SELECT url, status, attempts, fetched_at, body_hash, record, error FROM frontier ORDER BY rowid"
+        )
+        for url, status, attempts, fetched_at, h, record, error in cur:
+            yield {
+                "url": url,
+                "status": status,
+                "attempts": attempts,
+                "fetched_at": fetched_at,
+                "body_hash": h,
+                "record": json.loads(record) if record else None,
+                "error": error,
+            }
+
+    def stats(self) -> Dict[str, int]:
+        cur = self._conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status")
+        return {status: n for status, n in cur}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "CrawlCheckpoint":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
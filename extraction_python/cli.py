@@ -0,0 +1,145 @@
+"""
+Point d'entrée unique des scripts : `python cli.py <commande> [args]`.
+
+Chaque sous-commande n'importe son module qu'au moment de l'exécuter :
+`python cli.py flags` ne charge ni pandas ni bs4, `python cli.py aggregates`
+charge pandas parce qu'il en a besoin. Les arguments suivant la commande
+sont transmis au script (sys.argv).
+
+    python cli.py                     # liste des commandes
+    python cli.py players
+    python cli.py publish rollback
+    python cli.py bench               # temps d'import par commande vs budget
+"""
+
+import importlib
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+
+# =========================
+# CONFIG
+# =========================
+# commande -> (module, fonction, description)
+COMMANDS: Dict[str, Tuple[str, str, str]] = {
+    "players": ("extract_players", "main", "fiches joueurs -> players.csv"),
+    "results": ("extract_results", "main", "calendrier-résultats -> results.csv"),
+    "classement": ("extract_classement", "main", "classements Top 14 + Champions Cup"),
+    "top14": ("extract_classement_top14", "main", "classement Top 14 (tableau)"),
+    "cup": ("extract_classement_cup", "main", "classement Champions Cup (tableau)"),
+    "photos": ("photo_extract", "main", "URLs des photos joueurs"),
+    "urls": ("url_extract", "main", "liens GitHub des fichiers joueurs"),
+    "flags": ("test_flags", "main", "URLs des drapeaux (GitHub)"),
+    "crawl": ("crawl_targets", "main", "crawl multi-équipes (targets.json)"),
+    "backfill": ("backfill", "main", "saisons passées -> seasons/<saison>/"),
+    "worker": ("crawl_worker", "main", "crawl distribué : seed / work / stats / export"),
+    "discover": ("discover", "main", "découverte d'URLs (sitemap + liens /equipes/)"),
+    "aggregates": ("aggregates", "main", "tables agrégées pour Power BI"),
+    "standings": ("standings", "main", "classement recalculé + projections"),
+    "history": ("player_history", "main", "snapshots joueurs + stats par match"),
+    "similar": ("player_similarity", "main", "joueurs proches + percentiles par poste"),
+    "partitions": ("partitions", "main", "datasets par saison / compétition (list / rebuild)"),
+    "publish": ("publish", "main", "publication versionnée (list / rollback)"),
+    "changes": ("changelog", "main", "flux de changements : capture / tail / stats"),
+    "search": ("search_index", "main", "index plein texte : build / recherche joueurs, équipes, matchs"),
+    "fingerprint": ("fingerprint", "main", "empreintes de structure (reset)"),
+    "schedule": ("scheduler", "main", "scheduler résident"),
+    "live": ("live", "main", "suivi live du score"),
+    "api": ("read_api", "main", "API JSON locale"),
+    "archive": ("archive", "main", "archive HTML : list / reparse hors ligne"),
+}
+
+# budget de temps d'import (ms) des commandes "légères" ; None = non suivi
+IMPORT_BUDGET_MS: Dict[str, Optional[float]] = {
+    "cli": 30,
+    "flags": 100,
+    "publish": 100,
+    "api": 150,
+    "fingerprint": 200,
+}
+BENCH_RUNS = 3
+HERE = os.path.dirname(os.path.abspath(__file__))  # modules importés par leur nom : cwd des sous-processus
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)\s*$")
+
+
+# =========================
+# Bench des imports
+# =========================
+def import_time_ms(module: str, runs: int = BENCH_RUNS) -> Tuple[Optional[float], str]:
+    """
+    Temps d'import cumulé de `module` (python -X importtime), meilleur de
+    `runs` processus neufs ; (None, erreur) si l'import échoue.
+    """
+    best = float("inf")
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=HERE,
+        )
+        if proc.returncode != 0:
+            errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+            return None, errors[-1] if errors else f"code {proc.returncode}"
+        for line in proc.stderr.splitlines():
+            m = IMPORTTIME_RE.match(line)
+            if m and m.group(2) == module:
+                best = min(best, int(m.group(1)) / 1000)
+    return best, ""
+
+
+def bench() -> int:
+    over = 0
+    rows = [("cli", "cli")] + [(cmd, spec[0]) for cmd, spec in COMMANDS.items()]
+    print(f"{'commande':<12} {'module':<26} {'import (ms)':>11} {'budget':>8}")
+    for cmd, module in rows:
+        ms, error = import_time_ms(module)
+        budget = IMPORT_BUDGET_MS.get(cmd)
+        if ms is None:
+            print(f"{cmd:<12} {module:<26} {'échec':>11} {budget if budget is not None else '-':>8}  ❌ {error}")
+            over += 1
+            continue
+        flag = ""
+        if budget is not None and ms > budget:
+            flag = "  ❌"
+            over += 1
+        print(f"{cmd:<12} {module:<26} {ms:>11.1f} {budget if budget is not None else '-':>8}{flag}")
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.abspath(__file__)], capture_output=True, cwd=HERE)
+    print(f"\n⏱️ Démarrage à froid 'python cli.py' : {(time.perf_counter() - start) * 1000:.0f} ms")
+    return 1 if over else 0
+
+
+def usage() -> None:
+    print(__doc__)
+    for cmd, (module, _func, desc) in COMMANDS.items():
+        print(f"  {cmd:<12} {desc}  ({module}.py)")
+    print(f"  {'bench':<12} temps d'import par commande vs budget")
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        usage()
+        return 0
+
+    cmd, args = argv[0], argv[1:]
+    if cmd == "bench":
+        return bench()
+    if cmd not in COMMANDS:
+        print(f"❌ commande inconnue : {cmd}")
+        usage()
+        return 2
+
+    module, func, _desc = COMMANDS[cmd]
+    sys.argv = [f"{module}.py"] + args  # les scripts lisent leurs arguments dans sys.argv
+    result = getattr(importlib.import_module(module), func)()
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Crawl multi-équipes / multi-clubs sur les mêmes templates de pages.
+
+Les cibles viennent de targets.json (cf. targets.py). Toutes les pages
+(effectif, fiches joueurs, calendrier, classement) de toutes les équipes
+sont fetchées en parallèle ; la concurrence est bornée globalement
+(MAX_WORKERS) et par hôte (throttle partagé). Le parsing tourne dans un pool
+de processus (cf. pipeline.py). Les sorties sont partitionnées par équipe :
+OUTPUT_DIR/<slug>/players.csv, results.csv, classements.
+
+    python crawl_targets.py                 # toutes les cibles "enabled"
+    python crawl_targets.py ubb-espoirs     # sélection par slug
+"""
+
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import extract_classement
+import extract_players
+import extract_results
+from checkpoint import CrawlCheckpoint, body_hash
+from fingerprint import DriftError, DriftGuard, fingerprint
+from pipeline import PARSE_WORKERS, FetchParsePipeline, Job
+from records import MatchRow, StandingRow
+from sinks import CsvSink, SqliteSink
+from targets import Target, load_targets
+from throttle import AdaptiveThrottle
+
+
+# =========================
+# CONFIG
+# =========================
+OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data") / "teams"
+
+MAX_WORKERS = 16           # requêtes simultanées, tous hôtes confondus
+QUEUE_SIZE = 32            # pages brutes en attente de parsing (back-pressure)
+PER_HOST_CONCURRENCY = 4   # plafond par hôte (le throttle s'adapte en dessous)
+SLEEP_SECONDS = 1.0        # délai initial par hôte
+
+THROTTLE = AdaptiveThrottle(initial_delay=SLEEP_SECONDS, max_concurrency=PER_HOST_CONCURRENCY)
+GUARD = DriftGuard()  # mêmes templates pour toutes les équipes : une référence par type de page
+
+
+# =========================
+# HELPERS
+# =========================
+def build_session() -> requests.Session:
+    session = extract_players.build_session()
+    # une connexion par worker au maximum
+    adapter = HTTPAdapter(
+        max_retries=session.get_adapter("https://").max_retries,
+        pool_maxsize=MAX_WORKERS,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch(session: requests.Session, url: str) -> Tuple[bytes, Optional[str]]:
+    """Stage réseau : renvoie le HTML brut (bytes) + l'encodage annoncé."""
+    r = THROTTLE.fetch(session, url, timeout=extract_players.TIMEOUT)
+    r.raise_for_status()
+    return r.content, r.encoding
+
+
+def parse_page(job: Job, body: bytes, encoding: Optional[str]):
+    """
+    Stage parsing (exécuté dans un processus du pool) : HTML brut -> (records
+    compacts, empreinte de structure), sans accès réseau ni disque.
+    """
+    kind, _slug, url = job
+    html = body.decode(encoding or "utf-8", errors="replace")
+    if kind == "roster":
+        result = extract_players.parse_player_urls(url, html)
+    elif kind == "player":
+        result = extract_players.parse_player(url, html), body_hash(html)
+    elif kind == "calendar":
+        result = list(extract_results.parse_results(html))
+    elif kind == "ranking":
+        result = list(extract_classement.parse_classements(html))
+    else:
+        raise ValueError(f"type de page inconnu: {kind}")
+    return result, fingerprint(kind, html)
+
+
+class TeamCrawl:
+    """État d'une équipe pendant le crawl (dossier de sortie + checkpoint joueurs)."""
+
+    def __init__(self, target: Target, root: Path):
+        self.target = target
+        self.out_dir = root / target.slug
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.ckpt = CrawlCheckpoint(self.out_dir / extract_players.CHECKPOINT_FILENAME)
+        self.player_urls: List[str] = []
+        self.counts: Dict[str, int] = {}
+        self.drift: Dict[str, str] = {}  # type de page -> diff (export correspondant annulé)
+        self.drifted_players = 0         # fiches en dérive (cf. extract_players.DRIFT_PAGES_LIMIT)
+
+
+# =========================
+# Écriture par type de page
+# =========================
+def write_results(team: TeamCrawl, rows: List[MatchRow]) -> None:
+    with SqliteSink(
+        team.out_dir / extract_results.STORE_FILENAME, "results",
+        extract_results.RESULT_COLUMNS, extract_results.RESULT_KEY,
+        constants={"source_url": team.target.calendar_url}, replace={"source_url": team.target.calendar_url},
+    ) as store:
+        for row in rows:
+            store.write(row)
+        team.counts["results"] = store.export_csv(team.out_dir / extract_results.OUTPUT_FILENAME)
+
+
+def write_standings(team: TeamCrawl, rows: List[StandingRow]) -> None:
+    constants = {"source_url": team.target.ranking_url}
+    top14_path = team.out_dir / extract_classement.TOP14_FILENAME
+    cc_path = team.out_dir / extract_classement.CHAMPIONS_CUP_FILENAME
+
+    with CsvSink(top14_path, extract_classement.TOP14_COLUMNS, sep=extract_classement.CSV_SEP, constants=constants) as top14, \
+            CsvSink(cc_path, extract_classement.CC_COLUMNS, sep=extract_classement.CSV_SEP, constants=constants) as cc:
+        for row in rows:
+            (top14 if row.competition == "Top 14" else cc).write(row)
+
+    team.counts["top14"] = top14.count
+    team.counts["champions_cup"] = cc.count
+
+
+def write_players(team: TeamCrawl) -> None:
+    out_path = team.out_dir / extract_players.OUTPUT_FILENAME
+    with CsvSink(out_path, extract_players.PLAYER_COLUMNS) as sink:
+        for row in extract_players.iter_player_rows(team.ckpt, team.player_urls):
+            sink.write(row)
+    team.counts["players"] = sink.count
+
+
+# =========================
+# Crawl
+# =========================
+def crawl(targets: List[Target], session: requests.Session) -> List[TeamCrawl]:
+    teams = {t.slug: TeamCrawl(t, OUTPUT_DIR) for t in targets}
+    pipeline = FetchParsePipeline(
+        partial(fetch, session),
+        parse_page,
+        io_workers=MAX_WORKERS,
+        parse_workers=PARSE_WORKERS,
+        queue_size=QUEUE_SIZE,
+    )
+
+    for team in teams.values():
+        t = team.target
+        if t.roster_url:
+            pipeline.submit(("roster", t.slug, t.roster_url))
+        if t.calendar_url:
+            pipeline.submit(("calendar", t.slug, t.calendar_url))
+        if t.ranking_url:
+            pipeline.submit(("ranking", t.slug, t.ranking_url))
+
+    # Appelé dans ce thread : les écritures (SQLite, CSV) ne sont jamais concurrentes
+    def on_result(job: Job, result, error: Optional[BaseException]) -> None:
+        kind, slug, url = job
+        team = teams[slug]
+        try:
+            if error is not None:
+                raise error
+            result, fp = result
+            GUARD.compare(kind, fp, url)  # avant toute écriture
+            if kind == "roster":
+                team.player_urls = result
+                team.ckpt.add(team.player_urls)
+                todo = team.ckpt.pending()
+                print(f"✅ [{slug}] {len(team.player_urls)} joueurs, {len(todo)} à crawler")
+                for player_url in todo:
+                    pipeline.submit(("player", slug, player_url))
+            elif kind == "player":
+                row, digest = result
+                team.ckpt.mark_done(url, digest, row.as_dict())
+            elif kind == "calendar":
+                write_results(team, result)
+            elif kind == "ranking":
+                write_standings(team, result)
+        except DriftError as e:
+            if kind == "player":  # une fiche atypique n'annule pas l'export de l'effectif
+                team.ckpt.mark_failed(url, str(e))
+                team.drifted_players += 1
+                if team.drifted_players < extract_players.DRIFT_PAGES_LIMIT:
+                    print(f"❌ [{slug}] {e}")
+                    return
+            team.drift.setdefault(kind, str(e))
+        except Exception as e:
+            if kind == "player":
+                team.ckpt.mark_failed(url, str(e))
+            print(f"❌ [{slug}] {kind} {url}: {e}")
+
+    pipeline.run(on_result)
+
+    for team in teams.values():
+        for kind, diff in team.drift.items():
+            print(f"❌ [{team.target.slug}] {kind} : {diff}")
+        if team.target.roster_url and not ({"roster", "player"} & set(team.drift)):
+            write_players(team)
+        team.ckpt.close()
+
+    return list(teams.values())
+
+
+def main():
+    targets = load_targets(slugs=sys.argv[1:] or None)
+    print(f"✅ {len(targets)} cible(s) : {', '.join(t.slug for t in targets)}")
+
+    teams = crawl(targets, build_session())
+
+    for team in teams:
+        print(f"✅ [{team.target.slug}] {team.out_dir} {team.counts}")
+    print(f"⏱️ Throttle : {THROTTLE.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Crawl distribué : les pages des cibles (targets.json) deviennent des jobs
+d'une file partagée (cf. job_queue.py), traités par N workers (processus
+ou machines).
+
+  - seed   : met en file effectif / calendrier / classement des cibles ;
+             un job "roster" met ensuite en file une fiche par joueur ;
+  - work   : lance des workers (bail + heartbeat, politesse par hôte
+             partagée entre tous les workers de la file) ;
+  - export : écrit les CSV par équipe (même découpage que crawl_targets.py)
+             à partir des résultats terminés.
+
+Les jobs sont idempotents (clé = type + URL) : un job repris après la mort
+d'un worker réécrit le même résultat. Le débit monte avec le nombre de
+workers jusqu'à la limite de politesse (POLITENESS_SECONDS par hôte).
+
+    python crawl_worker.py seed [slug ...]
+    python crawl_worker.py work --processes 4
+    python crawl_worker.py work --queue redis://192.168.1.20:6379/0
+    python crawl_worker.py stats
+    python crawl_worker.py export
+"""
+
+import argparse
+import multiprocessing
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+import crawl_targets
+import extract_classement
+import extract_players
+import extract_results
+from fingerprint import DriftError, DriftGuard
+from job_queue import LEASE_SECONDS, Queue, QueuedJob, open_queue, worker_name
+from records import MatchRow, PlayerRow, StandingRow
+from sinks import CsvSink
+from targets import load_targets
+from throttle import AdaptiveThrottle, host_of
+
+
+# =========================
+# CONFIG
+# =========================
+QUEUE_PATH = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data") / "crawl_queue.sqlite"
+OUTPUT_DIR = crawl_targets.OUTPUT_DIR
+
+POLITENESS_SECONDS = 1.0     # une requête par seconde et par hôte, tous workers confondus
+REFRESH_AFTER = 12 * 3600    # un job terminé depuis plus longtemps est refait au prochain seed
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+IDLE_WAIT = 2.0
+
+# la politesse est gérée par la file ; le throttle local garde l'AIMD (429/503, Retry-After)
+THROTTLE = AdaptiveThrottle(initial_delay=0.0, min_delay=0.0, max_concurrency=1)
+GUARD = DriftGuard()
+
+
+# =========================
+# Jobs
+# =========================
+def fetch_page(queue: Queue, session: requests.Session, url: str) -> str:
+    queue.acquire_host(host_of(url), POLITENESS_SECONDS)
+    r = THROTTLE.fetch(session, url, timeout=extract_players.TIMEOUT)
+    r.raise_for_status()
+    return r.text
+
+
+def job_roster(queue: Queue, session: requests.Session, payload: Dict) -> List[str]:
+    html = fetch_page(queue, session, payload["url"])
+    GUARD.check("roster", html, payload["url"])
+    urls = extract_players.parse_player_urls(payload["url"], html)
+    for url in urls:
+        queue.put("player", {"slug": payload["slug"], "url": url}, key=f"player:{url}", refresh_after=REFRESH_AFTER)
+    return urls
+
+
+def job_player(queue: Queue, session: requests.Session, payload: Dict) -> Dict:
+    html = fetch_page(queue, session, payload["url"])
+    GUARD.check("player", html, payload["url"])
+    return extract_players.parse_player(payload["url"], html).as_dict()
+
+
+def job_calendar(queue: Queue, session: requests.Session, payload: Dict) -> List[Dict]:
+    html = fetch_page(queue, session, payload["url"])
+    GUARD.check("calendar", html, payload["url"])
+    return [row.as_dict() for row in extract_results.parse_results(html)]
+
+
+def job_ranking(queue: Queue, session: requests.Session, payload: Dict) -> List[Dict]:
+    """Top 14 + poules Champions Cup : même page classement.html que les scrapers top14 / cup."""
+    html = fetch_page(queue, session, payload["url"])
+    GUARD.check("ranking", html, payload["url"])
+    return [row.as_dict() for row in extract_classement.parse_classements(html)]
+
+
+JOBS = {
+    "roster": job_roster,
+    "player": job_player,
+    "calendar": job_calendar,
+    "ranking": job_ranking,
+}
+
+
+def seed(queue: Queue, slugs: Optional[List[str]] = None) -> int:
+    added = 0
+    for t in load_targets(slugs=slugs or None):
+        for kind, url in (("roster", t.roster_url), ("calendar", t.calendar_url), ("ranking", t.ranking_url)):
+            if url:
+                added += queue.put(kind, {"slug": t.slug, "url": url}, key=f"{kind}:{url}", refresh_after=REFRESH_AFTER)
+    return added
+
+
+# =========================
+# Worker
+# =========================
+class Heartbeat:
+    """Prolonge le bail du job en cours tant que le handler tourne."""
+
+    def __init__(self, queue: Queue, job: QueuedJob, worker: str):
+        self.queue, self.job, self.worker = queue, job, worker
+        self.stop = threading.Event()
+        self.lost = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stop.wait(HEARTBEAT_SECONDS):
+            if not self.queue.heartbeat(self.job, self.worker):
+                self.lost = True  # bail repris : le résultat sera ignoré
+                return
+
+    def close(self) -> None:
+        self.stop.set()
+        self.thread.join()
+
+
+def work(queue: Queue, session: requests.Session, worker: Optional[str] = None, stop: Optional[threading.Event] = None, until_idle: bool = True) -> int:
+    """Boucle d'un worker ; renvoie le nombre de jobs terminés."""
+    worker = worker or worker_name()
+    stop = stop or threading.Event()
+    done = 0
+
+    while not stop.is_set():
+        job = queue.lease(worker)
+        if job is None:
+            if until_idle and queue.idle():
+                break
+            stop.wait(IDLE_WAIT)
+            continue
+
+        hb = Heartbeat(queue, job, worker)
+        try:
+            result = JOBS[job.kind](queue, session, job.payload)
+            if queue.complete(job, worker, result):
+                done += 1
+        except DriftError as e:
+            queue.fail(job, worker, str(e), retry=False)  # inutile de réessayer : corriger le parser
+            print(f"❌ [{worker}] {job.kind} {job.payload['url']}: {e}")
+        except Exception as e:
+            queue.fail(job, worker, str(e))
+            print(f"❌ [{worker}] {job.kind} {job.payload['url']}: {e}")
+        finally:
+            hb.close()
+
+    return done
+
+
+def run_worker(target: str) -> int:
+    """Point d'entrée d'un processus worker (sa propre connexion et sa session)."""
+    queue = open_queue(target)
+    try:
+        done = work(queue, extract_players.build_session())
+        print(f"✅ [{worker_name()}] {done} jobs")
+        return done
+    finally:
+        queue.close()
+
+
+# =========================
+# Export
+# =========================
+def export(queue: Queue, slugs: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Résultats terminés -> OUTPUT_DIR/<slug>/players.csv, results.csv, classements."""
+    results = queue.results()
+    counts: Dict[str, Dict[str, int]] = {}
+
+    for t in load_targets(slugs=slugs or None):
+        team = crawl_targets.TeamCrawl(t, OUTPUT_DIR)
+        try:
+            for kind, url in (("calendar", t.calendar_url), ("ranking", t.ranking_url)):
+                done = results.get(f"{kind}:{url}")
+                if done is None:
+                    continue
+                if kind == "calendar":
+                    crawl_targets.write_results(team, [MatchRow(**r) for r in done["result"]])
+                else:
+                    crawl_targets.write_standings(team, [StandingRow(**r) for r in done["result"]])
+
+            roster = results.get(f"roster:{t.roster_url}")
+            if roster is not None:
+                out_path = team.out_dir / extract_players.OUTPUT_FILENAME
+                with CsvSink(out_path, extract_players.PLAYER_COLUMNS) as sink:
+                    for url in roster["result"]:
+                        player = results.get(f"player:{url}")
+                        if player is not None:
+                            sink.write(PlayerRow(**player["result"]))
+                        else:
+                            sink.write(PlayerRow(player_id=extract_players.extract_player_id(url), url=url, error="non crawlé"))
+                team.counts["players"] = sink.count
+        finally:
+            team.ckpt.close()
+        counts[t.slug] = team.counts
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl distribué (file de jobs partagée)")
+    parser.add_argument("--queue", default=str(QUEUE_PATH), help="fichier SQLite, redis://... ou 'local'")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("seed")
+    p.add_argument("slugs", nargs="*")
+    p = sub.add_parser("work")
+    p.add_argument("--processes", type=int, default=1)
+    sub.add_parser("stats")
+    p = sub.add_parser("export")
+    p.add_argument("slugs", nargs="*")
+    args = parser.parse_args()
+
+    if args.cmd == "work" and args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            done = sum(pool.map(run_worker, [args.queue] * args.processes))
+        print(f"✅ {done} jobs terminés ({args.processes} workers)")
+        return
+
+    queue = open_queue(args.queue)
+    try:
+        if args.cmd == "seed":
+            print(f"✅ {seed(queue, args.slugs)} jobs mis en file")
+        elif args.cmd == "work":
+            print(f"✅ {work(queue, extract_players.build_session())} jobs terminés")
+        elif args.cmd == "stats":
+            print(f"📌 Jobs : {queue.stats()}")
+            for worker, info in queue.workers().items():
+                print(f"  {worker}: {info}")
+        else:
+            for slug, counts in export(queue, args.slugs).items():
+                print(f"✅ [{slug}] {OUTPUT_DIR / slug} {counts}")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
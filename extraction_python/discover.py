@@ -0,0 +1,324 @@
+"""
+Découverte d'URLs : sitemap.xml + graphe de liens sous /equipes/.
+
+`collect_player_urls` ne voit que les joueurs liés depuis une page
+effectif. Ici :
+  1. les sitemaps (robots.txt "Sitemap:" + /sitemap.xml, index récursifs,
+     .xml.gz) donnent les URLs et leur `lastmod` ;
+  2. un parcours en largeur des pages sous /equipes/ (effectifs, calendriers,
+     classements des autres équipes / saisons) complète ce que le sitemap oublie ;
+  3. chaque URL est classée par template (player / roster / calendar /
+     ranking, cf. archive.PAGE_TYPES).
+
+Le "déjà vu" est un filtre de Bloom (≈ 1,8 Mo pour 1 million d'URLs à 0,1 %
+de faux positifs) conservé entre les runs : la colonne `new` signale les
+URLs jamais vues, `lastmod` les pages modifiées.
+
+    python discover.py                       # -> discovered_urls.csv
+    python discover.py --max-pages 2000 --enqueue   # + jobs du crawl distribué (crawl_worker.py)
+"""
+
+import argparse
+import gzip
+import hashlib
+import math
+import re
+import struct
+import xml.etree.ElementTree as ET
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+import extract_players
+from archive import page_type_of
+from sinks import CsvSink
+from throttle import AdaptiveThrottle
+
+
+# =========================
+# CONFIG
+# =========================
+SITE = "https://www.ubbrugby.com"
+SCOPE_PREFIX = "/equipes/"  # graphe de liens : on ne suit que ces pages
+SEEDS = [f"{SITE}/equipes/equipe-premiere/effectif.html"]
+
+OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
+OUTPUT_FILENAME = "discovered_urls.csv"
+SEEN_FILENAME = "discovery_seen.bloom"
+
+MAX_PAGES = 500            # pages HTML fetchées par run (les sitemaps ne comptent pas)
+MAX_DEPTH = 4
+FOLLOW_PLAYERS = False     # les fiches joueurs sont des feuilles : découvertes, pas parcourues
+BLOOM_CAPACITY = 1_000_000
+BLOOM_ERROR_RATE = 0.001     # entre les runs : une URL neuve prise pour connue (rare) reste émise, new = False
+RUN_ERROR_RATE = 1e-6        # dans un run : un faux positif ferait perdre l'URL
+
+COLUMNS = ["url", "page_type", "lastmod", "source", "depth", "new"]
+
+THROTTLE = AdaptiveThrottle(initial_delay=extract_players.SLEEP_SECONDS, min_delay=extract_players.MIN_SLEEP_SECONDS)
+
+SITEMAP_LINE_RE = re.compile(r"^\s*sitemap:\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+
+
+# =========================
+# Filtre de Bloom
+# =========================
+class BloomFilter:
+    """
+    Ensemble probabiliste compact : pas de faux négatif, faux positifs à
+    `error_rate` près jusqu'à `capacity` éléments. k positions par double
+    hachage (blake2b 128 bits).
+    """
+
+    MAGIC = b"UBBBLOOM1"
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.m = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def add(self, item: str) -> bool:
+        """Ajoute ; True si l'élément était absent."""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def save(self, path: Path) -> None:
+        tmp = Path(path).with_suffix(".tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(self.MAGIC + struct.pack("<QIQ", self.m, self.k, self.count))
+            fp.write(self.bits)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE) -> "BloomFilter":
+        bloom = cls(capacity, error_rate)
+        if not Path(path).exists():
+            return bloom
+        data = Path(path).read_bytes()
+        if not data.startswith(cls.MAGIC):
+            raise ValueError(f"{path} : pas un filtre de Bloom")
+        offset = len(cls.MAGIC)
+        bloom.m, bloom.k, bloom.count = struct.unpack_from("<QIQ", data, offset)
+        bloom.bits = bytearray(data[offset + struct.calcsize("<QIQ"):])
+        return bloom
+
+
+# =========================
+# HELPERS
+# =========================
+def normalize_url(url: str) -> str:
+    """Schéma / hôte en minuscules, sans fragment : une page = une clé."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def in_scope(url: str, site: str = SITE) -> bool:
+    parts = urlsplit(url)
+    return parts.netloc == urlsplit(site).netloc and parts.path.startswith(SCOPE_PREFIX)
+
+
+def fetch(session: requests.Session, url: str) -> Optional[requests.Response]:
+    r = THROTTLE.fetch(session, url, timeout=extract_players.TIMEOUT)
+    return r if r.status_code == 200 else None
+
+
+# =========================
+# Sitemaps
+# =========================
+def parse_sitemap(body: bytes) -> Tuple[List[Tuple[str, Optional[str]]], List[str]]:
+    """XML (éventuellement gzip) -> ([(url, lastmod)], [sous-sitemaps])."""
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    root = ET.fromstring(body)
+    urls, children = [], []
+    for node in root:
+        tag = node.tag.rsplit("}", 1)[-1]
+        fields = {child.tag.rsplit("}", 1)[-1]: (child.text or "").strip() for child in node}
+        if not fields.get("loc"):
+            continue
+        if tag == "sitemap":
+            children.append(fields["loc"])
+        elif tag == "url":
+            urls.append((fields["loc"], fields.get("lastmod") or None))
+    return urls, children
+
+
+def sitemap_roots(session: requests.Session, site: str = SITE) -> List[str]:
+    roots = [f"{site}/sitemap.xml"]
+    r = fetch(session, f"{site}/robots.txt")
+    if r is not None:
+        roots = SITEMAP_LINE_RE.findall(r.text) + roots
+    return list(dict.fromkeys(roots))
+
+
+def iter_sitemap_urls(session: requests.Session, site: str = SITE) -> Iterator[Tuple[str, Optional[str]]]:
+    todo = deque(sitemap_roots(session, site))
+    done = set()
+    while todo:
+        sitemap_url = todo.popleft()
+        if sitemap_url in done:
+            continue
+        done.add(sitemap_url)
+        r = fetch(session, sitemap_url)
+        if r is None:
+            continue
+        try:
+            urls, children = parse_sitemap(r.content)
+        except (ET.ParseError, OSError) as e:
+            print(f"❌ sitemap {sitemap_url}: {e}")
+            continue
+        todo.extend(children)
+        yield from urls
+
+
+# =========================
+# Graphe de liens
+# =========================
+LINKS_ONLY = SoupStrainer("a", href=True)
+
+
+def extract_links(base_url: str, html: str) -> List[str]:
+    soup = BeautifulSoup(html, "html.parser", parse_only=LINKS_ONLY)
+    return [normalize_url(urljoin(base_url, a["href"])) for a in soup.find_all("a", href=True)]
+
+
+# =========================
+# Découverte
+# =========================
+class Discovery:
+    def __init__(self, seen: BloomFilter):
+        self.seen = seen          # entre les runs : URL déjà connue ?
+        self.run_seen = BloomFilter(error_rate=RUN_ERROR_RATE)  # ce run : URL déjà émise ?
+        self.rows: List[Dict] = []
+
+    def emit(self, url: str, source: str, depth: int, lastmod: Optional[str] = None) -> bool:
+        url = normalize_url(url)
+        if not self.run_seen.add(url):
+            return False
+        self.rows.append({
+            "url": url,
+            "page_type": page_type_of(url),
+            "lastmod": lastmod,
+            "source": source,
+            "depth": depth,
+            "new": self.seen.add(url),
+        })
+        return True
+
+    def crawl(self, session: requests.Session, seeds: List[str], max_pages: int = MAX_PAGES, max_depth: int = MAX_DEPTH) -> int:
+        """Parcours en largeur des pages dans SCOPE_PREFIX ; renvoie le nombre de pages fetchées."""
+        frontier = deque((normalize_url(s), 0) for s in seeds)
+        queued = BloomFilter(error_rate=RUN_ERROR_RATE)
+        for url, _ in frontier:
+            queued.add(url)
+        fetched = 0
+
+        while frontier and fetched < max_pages:
+            url, depth = frontier.popleft()
+            r = fetch(session, url)
+            fetched += 1
+            if r is None or "html" not in r.headers.get("Content-Type", "text/html"):
+                continue
+            self.emit(url, "link", depth)
+
+            for link in extract_links(url, r.text):
+                if not in_scope(link):
+                    continue
+                self.emit(link, "link", depth + 1)
+                follow = FOLLOW_PLAYERS or page_type_of(link) != "player"
+                if follow and depth + 1 <= max_depth and queued.add(link):
+                    frontier.append((link, depth + 1))
+        return fetched
+
+
+def enqueue(rows: List[Dict]) -> int:
+    """URLs classées -> jobs du crawl distribué (slug de la cible dont l'URL dépend, sinon 'decouverte')."""
+    import crawl_worker
+    from job_queue import open_queue
+    from targets import load_targets
+
+    prefixes = []
+    for t in load_targets(include_disabled=True):
+        if t.roster_url:
+            prefixes.append((urlsplit(t.roster_url).path.rsplit("/", 1)[0] + "/", t.slug))
+
+    queue = open_queue(crawl_worker.QUEUE_PATH)
+    added = 0
+    try:
+        for row in rows:
+            if row["page_type"] not in crawl_worker.JOBS:
+                continue
+            path = urlsplit(row["url"]).path
+            slug = next((s for p, s in prefixes if path.startswith(p)), "decouverte")
+            added += queue.put(
+                row["page_type"], {"slug": slug, "url": row["url"]},
+                key=f"{row['page_type']}:{row['url']}", refresh_after=crawl_worker.REFRESH_AFTER,
+            )
+    finally:
+        queue.close()
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Découverte d'URLs (sitemap + liens sous /equipes/)")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH)
+    parser.add_argument("--no-sitemap", action="store_true")
+    parser.add_argument("--enqueue", action="store_true", help="met les pages classées en file (crawl_worker.py)")
+    args = parser.parse_args()
+
+    session = extract_players.build_session()
+    seen_path = OUTPUT_DIR / SEEN_FILENAME
+    disco = Discovery(BloomFilter.load(seen_path))
+
+    if not args.no_sitemap:
+        for url, lastmod in iter_sitemap_urls(session):
+            if in_scope(normalize_url(url)):
+                disco.emit(url, "sitemap", 0, lastmod)
+        print(f"✅ Sitemap : {len(disco.rows)} URLs sous {SCOPE_PREFIX}")
+
+    fetched = disco.crawl(session, SEEDS, args.max_pages, args.max_depth)
+
+    out_path = OUTPUT_DIR / OUTPUT_FILENAME
+    with CsvSink(out_path, COLUMNS, encoding="utf-8-sig") as sink:
+        for row in disco.rows:
+            sink.write(row)
+    disco.seen.save(seen_path)
+
+    by_type: Dict[str, int] = {}
+    for row in disco.rows:
+        by_type[row["page_type"] or "autre"] = by_type.get(row["page_type"] or "autre", 0) + 1
+    new = sum(row["new"] for row in disco.rows)
+    print(f"✅ {out_path} ({sink.count} URLs, {new} nouvelles, {fetched} pages fetchées) {by_type}")
+
+    if args.enqueue:
+        print(f"✅ {enqueue(disco.rows)} jobs mis en file")
+    print(f"⏱️ Throttle : {THROTTLE.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
 import re
+from datetime import date
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, List, Iterator, Optional, Tuple
 
 import requests
-import pandas as pd
 from bs4 import BeautifulSoup, Tag
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import archive
+import partitions
+from fingerprint import DriftGuard
+from records import StandingRow
+from sinks import CsvSink
+
 
 # =========================
 # CONFIG
@@ -23,19 +29,37 @@ TIMEOUT = 20
 OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
 TOP14_FILENAME = "ubb_top14_classement.csv"
 CHAMPIONS_CUP_FILENAME = "ubb_champions_cup_classement.csv"
+CSV_SEP = ";"  # comme extract_classement_top14 / _cup (mêmes fichiers, requêtes Power BI)
+
+# ordre + colonnes propres
+TOP14_COLUMNS = [
+    "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
+    "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
+]
+CC_COLUMNS = [
+    "pool", "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
+    "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
+]
 
 DEBUG = False  # True si tu veux afficher des exemples de lignes parsées
 
+GUARD = DriftGuard()  # structure de la page classement (cf. fingerprint.py)
+
 
 # =========================
 # Regex / helpers
 # =========================
 WS_RE = re.compile(r"\s+")
-INT_RE = re.compile(r"^\d+$")
 SIGNED_INT_RE = re.compile(r"[+-]?\d+")
 
-HEADER_LINE_RE = re.compile(r"^Pos\s+Équipe\s+Pts\s+MJ", re.IGNORECASE)
-VENUE_RE = re.compile(r"^À\s+(domicile|l'extérieur)$", re.IGNORECASE)
+# une seule regex par ligne : header (Pos Équipe Pts MJ ...), rang, lieu, "Image"
+LINE_TOKEN_RE = re.compile(
+    r"(?P<header>(?i:Pos\s+Équipe\s+Pts\s+MJ).*)"
+    r"|(?P<rank>\d+)"
+    r"|(?P<venue>(?i:À\s+(?:domicile|l'extérieur)))"
+    r"|(?P<image>(?i:image))",
+    re.DOTALL,
+)
 POOL_RE = re.compile(r"^Poule\s+(\d+)$", re.IGNORECASE)
 
 
@@ -58,13 +82,14 @@ def build_session() -> requests.Session:
     session.headers.update(HEADERS)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
+    archive.attach(session)  # copie de chaque page HTML (re-parse sans re-fetch)
     return session
 
 
-def get_soup(session: requests.Session, url: str) -> BeautifulSoup:
+def get_html(session: requests.Session, url: str) -> str:
     r = session.get(url, timeout=TIMEOUT)
     r.raise_for_status()
-    return BeautifulSoup(r.text, "html.parser")
+    return r.text
 
 
 def dedup_consecutive(lines: List[str]) -> List[str]:
@@ -123,7 +148,50 @@ def classify_section(section_name: str) -> Tuple[Optional[str], Optional[str]]:
     return None, None
 
 
-def parse_section(section_name: str, lines: List[str]) -> List[Dict]:
+# =========================
+# Lexer + automate
+# =========================
+# tokens : chaque ligne est classée une seule fois (LINE_TOKEN_RE + comptage des ints)
+T_HEADER, T_RANK, T_VENUE, T_IMAGE, T_STATS, T_TEXT = range(6)
+ANY = None
+
+# états de l'automate
+SEEK, AFTER_RANK, AFTER_TEAM, AFTER_STATS, AFTER_NEXT = range(5)
+STATS_WINDOW = 6  # lignes après l'équipe où chercher les stats
+
+# (état, token) -> (action, état suivant, ligne consommée) ; ANY = tout autre token
+STANDINGS_FSM = {
+    (SEEK, T_RANK): ("rank", AFTER_RANK, True),
+    (SEEK, ANY): (None, SEEK, True),  # header, texte... ignorés
+    (AFTER_RANK, T_IMAGE): (None, AFTER_RANK, True),  # souvent un "Image" juste après
+    (AFTER_RANK, ANY): ("team", AFTER_TEAM, True),
+    (AFTER_TEAM, T_STATS): ("stats", AFTER_STATS, True),
+    (AFTER_TEAM, ANY): (None, AFTER_TEAM, True),
+    (AFTER_STATS, T_IMAGE): (None, AFTER_STATS, True),
+    (AFTER_STATS, T_VENUE): ("venue", SEEK, True),
+    (AFTER_STATS, T_RANK): ("emit", SEEK, False),  # équipe suivante
+    (AFTER_STATS, ANY): ("next_match", AFTER_NEXT, True),  # ex: "SP Sam. 24 Jan."
+    (AFTER_NEXT, T_VENUE): ("venue", SEEK, True),  # À domicile / À l'extérieur
+    (AFTER_NEXT, ANY): ("emit", SEEK, False),
+}
+
+
+def lex_lines(lines: List[str]) -> List[Tuple[int, object]]:
+    """Ligne -> (token, valeur) : rang (int), stats (10 ints) ou texte."""
+    tokens: List[Tuple[int, object]] = []
+    for line in lines:
+        m = LINE_TOKEN_RE.fullmatch(line)
+        if m is None:
+            stats = parse_stats_line(line)
+            tokens.append((T_STATS, stats) if stats else (T_TEXT, line))
+        elif m.lastgroup == "rank":
+            tokens.append((T_RANK, int(line)))
+        else:
+            tokens.append(({"header": T_HEADER, "venue": T_VENUE, "image": T_IMAGE}[m.lastgroup], line))
+    return tokens
+
+
+def parse_section(section_name: str, lines: List[str]) -> List[StandingRow]:
     competition, pool_label = classify_section(section_name)
     if competition is None:
         return []
@@ -132,142 +200,117 @@ def parse_section(section_name: str, lines: List[str]) -> List[Dict]:
         print(f"\n--- {competition} | {section_name} ---")
         print(lines[:30])
 
-    out: List[Dict] = []
+    out: List[StandingRow] = []
+    tokens = lex_lines(lines)
+    n = len(tokens)
+    state = SEEK
+    row: Dict[str, object] = {}
+    team_idx = 0
     i = 0
-    n = len(lines)
-
-    while i < n:
-        line = lines[i]
-
-        # ligne header (Pos Équipe Pts MJ ...)
-        if HEADER_LINE_RE.match(line):
-            i += 1
-            continue
-
-        # une ligne d'équipe commence par le rang (1,2,3,...)
-        if INT_RE.match(line):
-            rank = int(line)
-            i += 1
 
-            # souvent un "Image" juste après
-            while i < n and lines[i].lower() == "image":
-                i += 1
-            if i >= n:
-                break
+    def emit() -> None:
+        pts, mj, bo, bd, v, n_, d, pts_for, pts_against, diff = row["stats"]  # type: ignore
+        out.append(StandingRow(
+            rank=row["rank"],  # type: ignore
+            team=row["team"],  # type: ignore
+            pts=pts,
+            mj=mj,
+            bo=bo,
+            bd=bd,
+            v=v,
+            n=n_,
+            d=d,
+            pts_for=pts_for,
+            pts_against=pts_against,
+            diff=diff,
+            next_match=row.get("next_match"),  # type: ignore
+            next_venue=row.get("next_venue"),  # type: ignore
+            competition=competition,
+            pool=pool_label,  # None pour Top14 ; "Poule X" pour CC
+        ))
+
+    while True:
+        if state == AFTER_TEAM and (i >= n or i > team_idx + STATS_WINDOW):
+            # pas de stats dans la fenêtre : on n'émet rien, on repart après l'équipe
+            state, i = SEEK, team_idx + 1
+        if i >= n:
+            break
 
-            team = lines[i]
+        kind, value = tokens[i]
+        action, state, consumed = STANDINGS_FSM.get((state, kind)) or STANDINGS_FSM[(state, ANY)]
+
+        if action == "rank":
+            row = {"rank": value}
+        elif action == "team":
+            row["team"] = lines[i]
+            team_idx = i
+        elif action == "stats":
+            row["stats"] = value
+        elif action == "next_match":
+            row["next_match"] = lines[i]
+        elif action == "venue":
+            row["next_venue"] = lines[i]
+            emit()
+        elif action == "emit":
+            emit()
+
+        if consumed:
             i += 1
 
-            # stats: on cherche LA prochaine ligne qui a au moins 10 ints
-            stats = None
-            stats_idx = None
-            for j in range(i, min(i + 6, n)):  # fenêtre courte, suffisant ici
-                st = parse_stats_line(lines[j])
-                if st:
-                    stats = st
-                    stats_idx = j
-                    break
-
-            if stats is None:
-                # on ne jette pas d'erreur, on avance
-                continue
-
-            # on saute jusqu'après la ligne stats
-            i = stats_idx + 1  # type: ignore
-
-            pts, mj, bo, bd, v, n_, d, pts_for, pts_against, diff = stats
-
-            # encore un "Image" parfois
-            while i < n and lines[i].lower() == "image":
-                i += 1
-
-            # prochain match (ex: "SP Sam. 24 Jan.")
-            next_match = None
-            if i < n and not VENUE_RE.match(lines[i]) and not INT_RE.match(lines[i]):
-                next_match = lines[i]
-                i += 1
-
-            # lieu (À domicile / À l'extérieur)
-            next_venue = None
-            if i < n and VENUE_RE.match(lines[i]):
-                next_venue = lines[i]
-                i += 1
-
-            out.append({
-                "rank": rank,
-                "team": team,
-                "pts": pts,
-                "mj": mj,
-                "bo": bo,
-                "bd": bd,
-                "v": v,
-                "n": n_,
-                "d": d,
-                "pts_for": pts_for,
-                "pts_against": pts_against,
-                "diff": diff,
-                "next_match": next_match,
-                "next_venue": next_venue,
-                "source_url": URL,
-                "competition": competition,
-                "pool": pool_label,  # None pour Top14 ; "Poule X" pour CC
-            })
-            continue
-
-        i += 1
+    if state in (AFTER_STATS, AFTER_NEXT):  # dernière équipe de la section
+        emit()
 
     return out
 
 
-def scrape_ubb_classements(url: str = URL) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    session = build_session()
-    soup = get_soup(session, url)
-
-    rows: List[Dict] = []
+def parse_classements(html: str) -> Iterator[StandingRow]:
+    """
+    Parsing pur (sans réseau) de la page classement : lignes Top 14 et
+    Champions Cup, dans l'ordre de la page (déjà trié par poule puis rang).
+    """
+    soup = BeautifulSoup(html, "html.parser")
 
     for h2 in soup.find_all("h2"):
         section_name = clean_text(h2.get_text(" ", strip=True))
         lines = iter_lines_until_next_h2(h2)
-        rows.extend(parse_section(section_name, lines))
-
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return pd.DataFrame(), pd.DataFrame()
+        yield from parse_section(section_name, lines)
 
-    df_top14 = df[df["competition"] == "Top 14"].copy()
-    df_cc = df[df["competition"] == "Champions Cup"].copy()
 
-    # ordre + colonnes propres
-    top14_cols = [
-        "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
-        "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
-    ]
-    cc_cols = [
-        "pool", "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
-        "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
-    ]
-
-    df_top14 = df_top14[top14_cols].sort_values(by=["rank"]).reset_index(drop=True)
-    df_cc = df_cc[cc_cols].sort_values(by=["pool", "rank"]).reset_index(drop=True)
-
-    return df_top14, df_cc
-
-
-def main():
-    df_top14, df_cc = scrape_ubb_classements(URL)
+def scrape_ubb_classements(url: str = URL) -> Iterator[StandingRow]:
+    """Générateur : fetch + contrôle de structure + parsing de la page classement."""
+    session = build_session()
+    html = get_html(session, url)
+    GUARD.check("ranking", html, url)
+    yield from parse_classements(html)
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+def main(session: Optional[requests.Session] = None):
     top14_path = OUTPUT_DIR / TOP14_FILENAME
     cc_path = OUTPUT_DIR / CHAMPIONS_CUP_FILENAME
 
-    df_top14.to_csv(top14_path, index=False, encoding="utf-8-sig")
-    df_cc.to_csv(cc_path, index=False, encoding="utf-8-sig")
-
-    print(f"✅ Export Top 14: {top14_path} ({len(df_top14)} lignes)")
-    print(f"✅ Export Champions Cup: {cc_path} ({len(df_cc)} lignes)")
-    print(df_top14.head(5))
-    print(df_cc.head(5))
+    html = get_html(session or build_session(), URL)
+    GUARD.check("ranking", html, URL)  # avant d'ouvrir (et vider) les CSV
+
+    constants = {"source_url": URL}
+    rows = list(parse_classements(html))
+    with CsvSink(top14_path, TOP14_COLUMNS, sep=CSV_SEP, constants=constants) as top14, \
+            CsvSink(cc_path, CC_COLUMNS, sep=CSV_SEP, constants=constants) as cc:
+        for row in rows:
+            (top14 if row.competition == "Top 14" else cc).write(row)
+
+    print(f"✅ Export Top 14: {top14_path} ({top14.count} lignes)")
+    print(f"✅ Export Champions Cup: {cc_path} ({cc.count} lignes)")
+    write_partitions(rows, partitions.season_label(date.today()), constants)
+
+
+def write_partitions(rows: List[StandingRow], season: str, constants: Dict) -> None:
+    """Copie partitionnée (saison, compétition) pour le refresh incrémental (cf. partitions.py)."""
+    top14 = [r for r in rows if r.competition == "Top 14"]
+    cc = [r for r in rows if r.competition != "Top 14"]
+    partitions.write_dataset("classement_top14", top14, TOP14_COLUMNS,
+                             partitions.standing_partition(season, "Top 14"), constants=constants)
+    partitions.write_dataset("classement_cup", cc, CC_COLUMNS,
+                             partitions.standing_partition(season, "Champions Cup"), constants=constants)
 
 
 if __name__ == "__main__":
@@ -1,13 +1,17 @@
 import re
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 import requests
-import pandas as pd
 from bs4 import BeautifulSoup, Tag
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import archive
+from fingerprint import DriftGuard
+from records import StandingRow
+from sinks import CsvSink
+
 
 # =========================
 # CONFIG
@@ -26,6 +30,13 @@ OUT_FILENAME = "ubb_champions_cup_classement.csv"
 # Pour Excel FR : mets ";" (sinon tout part dans une seule colonne)
 CSV_SEP = ";"
 
+COLUMNS = [
+    "pool", "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
+    "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
+]
+
+GUARD = DriftGuard()  # structure de la page classement (cf. fingerprint.py)
+
 
 # =========================
 # Helpers
@@ -52,6 +63,7 @@ def build_session() -> requests.Session:
     session.headers.update(HEADERS)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
+    archive.attach(session)  # copie de chaque page HTML (re-parse sans re-fetch)
     return session
 
 
@@ -75,15 +87,14 @@ def parse_next_match_cell(td: Tag) -> Tuple[Optional[str], Optional[str]]:
     return next_match, next_venue
 
 
-def extract_rows_from_table(table: Tag, pool_label: str) -> List[Dict]:
+def extract_rows_from_table(table: Tag, pool_label: str) -> Iterator[StandingRow]:
     """
     Colonnes attendues :
     Pos | Équipe | Pts | MJ | BO | BD | V | N | D | P. | C. | Diff | Prochain match
     """
-    rows: List[Dict] = []
     tbody = table.find("tbody")
     if not tbody:
-        return rows
+        return
 
     for tr in tbody.find_all("tr", recursive=False):
         tds = tr.find_all("td", recursive=False)
@@ -119,37 +130,30 @@ def extract_rows_from_table(table: Tag, pool_label: str) -> List[Dict]:
         if len(tds) >= 13:
             next_match, next_venue = parse_next_match_cell(tds[12])
 
-        rows.append({
-            "pool": pool_label,
-            "rank": rank,
-            "team": team,
-            "pts": pts,
-            "mj": mj,
-            "bo": bo,
-            "bd": bd,
-            "v": v,
-            "n": n,
-            "d": d,
-            "pts_for": pts_for,
-            "pts_against": pts_against,
-            "diff": diff,
-            "next_match": next_match,
-            "next_venue": next_venue,
-            "source_url": URL,
-        })
-
-    return rows
-
-
-def scrape_champions_cup() -> pd.DataFrame:
-    session = build_session()
-    soup = get_soup(session, URL)
-
+        yield StandingRow(
+            pool=pool_label,
+            rank=rank,
+            team=team,
+            pts=pts,
+            mj=mj,
+            bo=bo,
+            bd=bd,
+            v=v,
+            n=n,
+            d=d,
+            pts_for=pts_for,
+            pts_against=pts_against,
+            diff=diff,
+            next_match=next_match,
+            next_venue=next_venue,
+        )
+
+
+def parse_champions_cup(soup: BeautifulSoup) -> Iterator[StandingRow]:
+    """Générateur : lignes de chaque poule, dans l'ordre de la page (poule puis rang)."""
     cc_tab = soup.find("div", id="ranking-tab-champions-cup")
     if not cc_tab:
-        return pd.DataFrame()
-
-    rows: List[Dict] = []
+        return
 
     # Chaque poule = h2.big-title + div.ranking-table-container + table.ranking-table
     for h2 in cc_tab.find_all("h2", class_="big-title"):
@@ -163,30 +167,26 @@ def scrape_champions_cup() -> pd.DataFrame:
         if not table:
             continue
 
-        rows.extend(extract_rows_from_table(table, pool_label))
-
-    df = pd.DataFrame(rows)
+        yield from extract_rows_from_table(table, pool_label)
 
-    cols = [
-        "pool", "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
-        "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
-    ]
-    if not df.empty:
-        df = df[cols].sort_values(["pool", "rank"]).reset_index(drop=True)
 
-    return df
+def scrape_champions_cup() -> Iterator[StandingRow]:
+    soup = get_soup(build_session(), URL)
+    GUARD.check("ranking", soup, URL)
+    yield from parse_champions_cup(soup)
 
 
 def main():
-    df = scrape_champions_cup()
-
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     out_path = OUTPUT_DIR / OUT_FILENAME
 
-    df.to_csv(out_path, index=False, encoding="utf-8-sig", sep=CSV_SEP)
+    soup = get_soup(build_session(), URL)
+    GUARD.check("ranking", soup, URL)  # avant d'ouvrir (et vider) le CSV
+
+    with CsvSink(out_path, COLUMNS, sep=CSV_SEP, encoding="utf-8-sig", constants={"source_url": URL}) as sink:
+        for row in parse_champions_cup(soup):
+            sink.write(row)
 
-    print(f"✅ Export Champions Cup: {out_path} ({len(df)} lignes)")
-    print(df.head(10))
+    print(f"✅ Export Champions Cup: {out_path} ({sink.count} lignes)")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,17 @@
 import re
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 import requests
-import pandas as pd
 from bs4 import BeautifulSoup, Tag
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import archive
+from fingerprint import DriftGuard
+from records import StandingRow
+from sinks import CsvSink
+
 
 # =========================
 # CONFIG
@@ -25,6 +29,13 @@ OUT_FILENAME = "ubb_top14_classement.csv"
 
 CSV_SEP = ";"  # Excel FR
 
+COLUMNS = [
+    "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
+    "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
+]
+
+GUARD = DriftGuard()  # structure de la page classement (cf. fingerprint.py)
+
 
 # =========================
 # Helpers
@@ -51,6 +62,7 @@ def build_session() -> requests.Session:
     session.headers.update(HEADERS)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
+    archive.attach(session)  # copie de chaque page HTML (re-parse sans re-fetch)
     return session
 
 
@@ -74,15 +86,14 @@ def parse_next_match_cell(td: Tag) -> Tuple[Optional[str], Optional[str]]:
     return next_match, next_venue
 
 
-def extract_rows_from_table(table: Tag) -> List[Dict]:
+def extract_rows_from_table(table: Tag) -> Iterator[StandingRow]:
     """
     Colonnes (Top 14) :
     Pos | Équipe | Pts | MJ | BO | BD | V | N | D | P. | C. | Diff | Prochain match
     """
-    rows: List[Dict] = []
     tbody = table.find("tbody")
     if not tbody:
-        return rows
+        return
 
     for tr in tbody.find_all("tr", recursive=False):
         tds = tr.find_all("td", recursive=False)
@@ -118,62 +129,54 @@ def extract_rows_from_table(table: Tag) -> List[Dict]:
         if len(tds) >= 13:
             next_match, next_venue = parse_next_match_cell(tds[12])
 
-        rows.append({
-            "rank": rank,
-            "team": team,
-            "pts": pts,
-            "mj": mj,
-            "bo": bo,
-            "bd": bd,
-            "v": v,
-            "n": n,
-            "d": d,
-            "pts_for": pts_for,
-            "pts_against": pts_against,
-            "diff": diff,
-            "next_match": next_match,
-            "next_venue": next_venue,
-            "source_url": URL,
-        })
-
-    return rows
-
-
-def scrape_top14() -> pd.DataFrame:
-    session = build_session()
-    soup = get_soup(session, URL)
-
+        yield StandingRow(
+            rank=rank,
+            team=team,
+            pts=pts,
+            mj=mj,
+            bo=bo,
+            bd=bd,
+            v=v,
+            n=n,
+            d=d,
+            pts_for=pts_for,
+            pts_against=pts_against,
+            diff=diff,
+            next_match=next_match,
+            next_venue=next_venue,
+        )
+
+
+def parse_top14(soup: BeautifulSoup) -> Iterator[StandingRow]:
+    """Générateur : lignes du classement Top 14, dans l'ordre de la page (rang)."""
     top14_tab = soup.find("div", id="ranking-tab-top-14")
     if not top14_tab:
-        return pd.DataFrame()
+        return
 
     table = top14_tab.find("table", class_="ranking-table")
     if not table:
-        return pd.DataFrame()
+        return
 
-    rows = extract_rows_from_table(table)
-    df = pd.DataFrame(rows)
+    yield from extract_rows_from_table(table)
 
-    cols = [
-        "rank", "team", "pts", "mj", "bo", "bd", "v", "n", "d",
-        "pts_for", "pts_against", "diff", "next_match", "next_venue", "source_url"
-    ]
-    if not df.empty:
-        df = df[cols].sort_values("rank").reset_index(drop=True)
 
-    return df
+def scrape_top14() -> Iterator[StandingRow]:
+    soup = get_soup(build_session(), URL)
+    GUARD.check("ranking", soup, URL)
+    yield from parse_top14(soup)
 
 
 def main():
-    df = scrape_top14()
-
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     out_path = OUTPUT_DIR / OUT_FILENAME
 
-    df.to_csv(out_path, index=False, encoding="utf-8-sig", sep=CSV_SEP)
+    soup = get_soup(build_session(), URL)
+    GUARD.check("ranking", soup, URL)  # avant d'ouvrir (et vider) le CSV
+
+    with CsvSink(out_path, COLUMNS, sep=CSV_SEP, encoding="utf-8-sig", constants={"source_url": URL}) as sink:
+        for row in parse_top14(soup):
+            sink.write(row)
 
-    print(f"✅ Export Top 14: {out_path} ({len(df)} lignes)")
-    print(df.head(10))
+    print(f"✅ Export Top 14: {out_path} ({sink.count} lignes)")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,21 @@
 import re
-import time
 from pathlib import Path
-from typing import Optional, Dict, List
-from urllib.parse import urljoin
+from typing import Optional, Dict, Iterator, List
+from urllib.parse import urljoin, urlsplit
 
-import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import archive
+from checkpoint import CrawlCheckpoint, body_hash
+from extract_spec import Field, Group, Spec, extract, raw_text
+from fingerprint import DriftError, DriftGuard
+from records import PlayerRow
+from sinks import CsvSink
+from throttle import AdaptiveThrottle
+
 
 # =========================
 # CONFIG
@@ -20,7 +26,8 @@ HEADERS = {
 }
 
 TIMEOUT = 20
-SLEEP_SECONDS = 1.0  # politesse serveur
+SLEEP_SECONDS = 1.0  # politesse serveur : délai initial, ajusté ensuite par le throttle
+MIN_SLEEP_SECONDS = 0.2  # plancher (ou Crawl-delay du robots.txt s'il est plus grand)
 
 # Page "générique" effectif (on récupère toutes les URLs joueurs ici)
 ROSTER_URL = "https://www.ubbrugby.com/equipes/equipe-premiere/effectif.html"
@@ -28,6 +35,35 @@ ROSTER_URL = "https://www.ubbrugby.com/equipes/equipe-premiere/effectif.html"
 # Dossier de sortie
 OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
 OUTPUT_FILENAME = "players.csv"
+CHECKPOINT_FILENAME = "players_checkpoint.sqlite"
+
+# Ordre propre des colonnes (sans macro_group / line_group_raw / position_text)
+PLAYER_COLUMNS = [
+    "player_id", "name", "position",
+    "height_cm", "weight_kg", "age", "nationality",
+    "since_year", "caps", "matches", "tries", "points",
+    "url", "error",
+]
+
+THROTTLE = AdaptiveThrottle(initial_delay=SLEEP_SECONDS, min_delay=MIN_SLEEP_SECONDS)
+GUARD = DriftGuard()  # structure effectif / fiches joueurs (cf. fingerprint.py)
+DRIFT_PAGES_LIMIT = 3  # fiches en dérive avant d'arrêter le crawl (refonte du site, pas une fiche atypique)
+
+# Fiche joueur : tous les champs en un parcours de l'arbre (cf. extract_spec.py)
+PLAYER_SPEC = Spec("player", (
+    Field("firstname", ".player-detail-firstname", raw_text),
+    Field("lastname", ".player-detail-lastname", raw_text),
+    Field("h1", "h1"),
+    Field("tags", ".player-detail-metadata .tag", many=True),
+    Group("info", ".player-detail-info-list dl", fields=(
+        Group("items", "div", many=True, fields=(Field("dt", "dt"), Field("dd", "dd"))),
+    )),
+    Field("since", ".player-global-stats-header h2"),
+    Group("stats", ".player-global-stats-list .player-detail-stat", many=True, fields=(
+        Field("value", ".player-detail-stat-value"),
+        Field("label", ".player-detail-stat-text"),
+    )),
+))
 
 
 # =========================
@@ -56,7 +92,9 @@ def extract_player_id(url: str) -> Optional[str]:
 
 def build_session() -> requests.Session:
     """
-    Session + retries (pratique si le site renvoie parfois 429/5xx).
+    Session + retries (pratique si le site renvoie parfois des 5xx).
+    Les 429 ne sont pas réessayés ici : c'est le throttle qui les gère
+    (Retry-After + ralentissement).
     """
     session = requests.Session()
     session.headers.update(HEADERS)
@@ -66,30 +104,40 @@ def build_session() -> requests.Session:
         connect=3,
         read=3,
         backoff_factor=0.8,
-        status_forcelist=(429, 500, 502, 503, 504),
+        status_forcelist=(500, 502, 504),
         allowed_methods=("GET",),
         raise_on_status=False,
     )
     adapter = HTTPAdapter(max_retries=retry)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
+    archive.attach(session)  # copie de chaque page HTML (re-parse sans re-fetch)
     return session
 
 
-def get_soup(session: requests.Session, url: str) -> BeautifulSoup:
-    r = session.get(url, timeout=TIMEOUT)
+def fetch_html(session: requests.Session, url: str) -> str:
+    r = THROTTLE.fetch(session, url, timeout=TIMEOUT)
     r.raise_for_status()
-    return BeautifulSoup(r.text, "html.parser")
+    return r.text
 
 
-def collect_player_urls(session: requests.Session, roster_url: str) -> List[str]:
+def player_url_pattern(roster_url: str) -> re.Pattern:
     """
-    Récupère automatiquement toutes les URLs joueurs depuis la page effectif.
-    On filtre les fiches joueurs: /effectif/j123-...
+    Fiches joueurs de l'équipe de la page effectif :
+    /equipes/equipe-premiere/effectif.html -> /equipes/equipe-premiere/effectif/j123-...
+    (même template pour les autres équipes / clubs).
     """
-    soup = get_soup(session, roster_url)
+    path = urlsplit(roster_url).path
+    if path.endswith(".html"):
+        path = path[: -len(".html")]
+    return re.compile(re.escape(path) + r"/j\d+-", re.IGNORECASE)
 
-    pattern = re.compile(r"/equipes/equipe-premiere/effectif/j\d+-", re.IGNORECASE)
+
+def parse_player_urls(roster_url: str, html: str) -> List[str]:
+    """Parsing pur de la page effectif -> URLs joueurs triées par numéro."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    pattern = player_url_pattern(roster_url)
     urls = set()
 
     for a in soup.select("a[href]"):
@@ -104,46 +152,50 @@ def collect_player_urls(session: requests.Session, roster_url: str) -> List[str]
     return sorted(urls, key=sort_key)
 
 
-def parse_dt_dd_block(soup: BeautifulSoup) -> Dict[str, str]:
+def collect_player_urls(session: requests.Session, roster_url: str) -> List[str]:
+    """
+    Récupère automatiquement toutes les URLs joueurs depuis la page effectif.
+    On filtre les fiches joueurs: /effectif/j123-...
+    """
+    html = fetch_html(session, roster_url)
+    GUARD.check("roster", html, roster_url)
+    return parse_player_urls(roster_url, html)
+
+
+def parse_dt_dd_block(data: Dict) -> Dict[str, str]:
     """
-    Lit le bloc "Infos clés" (dl/dt/dd) -> dictionnaire.
+    Bloc "Infos clés" (dl/dt/dd) de PLAYER_SPEC -> dictionnaire.
     Ex: Taille -> 182 cm ; Poids -> 148 kg ; Âge -> 34 ans ; Nationalité -> ...
     """
     out: Dict[str, str] = {}
-    dl = soup.select_one(".player-detail-info-list dl")
-    if not dl:
+    if not data["info"]:
         return out
 
-    for div in dl.select("div"):
-        dt = div.find("dt")
-        dd = div.find("dd")
-        if dt and dd:
-            key = clean_text(dt.get_text(" ", strip=True))
-            val = clean_text(dd.get_text(" ", strip=True))
+    for item in data["info"]["items"]:
+        if item["dt"] is not None and item["dd"] is not None:
+            key = clean_text(item["dt"])
+            val = clean_text(item["dd"])
             if key:
                 out[key] = val
     return out
 
 
-def parse_global_stats(soup: BeautifulSoup) -> Dict[str, Optional[int]]:
+def parse_global_stats(data: Dict) -> Dict[str, Optional[int]]:
     """
     Bloc 'Depuis 20xx' + stats globales (sélections, matchs, essais, points).
     """
     out = {"since_year": None, "caps": None, "matches": None, "tries": None, "points": None}
 
     # Depuis YYYY
-    h2 = soup.select_one(".player-global-stats-header h2")
-    if h2:
-        m = YEAR_RE.search(clean_text(h2.get_text(" ", strip=True)))
+    if data["since"] is not None:
+        m = YEAR_RE.search(clean_text(data["since"]))
         if m:
             out["since_year"] = int(m.group(1))
 
     # Liste stats (valeur + libellé)
-    for item in soup.select(".player-global-stats-list .player-detail-stat"):
-        val_el = item.select_one(".player-detail-stat-value")
-        txt_el = item.select_one(".player-detail-stat-text")
-        val = parse_int(val_el.get_text(" ", strip=True)) if val_el else None
-        label = clean_text(txt_el.get_text(" ", strip=True)).lower() if txt_el else ""
+    for item in data["stats"]:
+        val = parse_int(item["value"])
+        label = clean_text(item["label"]).lower() if item["label"] is not None else ""
 
         if val is None or not label:
             continue
@@ -161,22 +213,19 @@ def parse_global_stats(soup: BeautifulSoup) -> Dict[str, Optional[int]]:
     return out
 
 
-def parse_name_and_position(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
+def parse_name_and_position(data: Dict) -> Dict[str, Optional[str]]:
     """
     Nom: spans firstname/lastname si présents, sinon fallback h1.
     Poste: tags dans .player-detail-metadata (souvent: [ligne] puis [poste]).
     """
     # Name
-    fn = soup.select_one(".player-detail-firstname")
-    ln = soup.select_one(".player-detail-lastname")
-    if fn and ln:
-        name = f"{clean_text(fn.get_text())} {clean_text(ln.get_text())}"
+    if data["firstname"] is not None and data["lastname"] is not None:
+        name = f"{clean_text(data['firstname'])} {clean_text(data['lastname'])}"
     else:
-        h1 = soup.find("h1")
-        name = clean_text(h1.get_text(" ", strip=True)) if h1 else None
+        name = clean_text(data["h1"]) if data["h1"] is not None else None
 
     # Position (2e tag souvent)
-    tags = [clean_text(t.get_text(" ", strip=True)) for t in soup.select(".player-detail-metadata .tag")]
+    tags = [clean_text(t) for t in data["tags"]]
     position = None
     if len(tags) >= 2:
         position = tags[1]  # ex: "Pilier"
@@ -186,66 +235,106 @@ def parse_name_and_position(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
     return {"name": name, "position": position}
 
 
-def scrape_one_player(session: requests.Session, url: str) -> Dict:
-    soup = get_soup(session, url)
+def parse_player(url: str, html: str) -> PlayerRow:
+    """Parsing pur (sans réseau) d'une fiche joueur."""
+    data = extract(PLAYER_SPEC, BeautifulSoup(html, "html.parser"))
 
     player_id = extract_player_id(url)
-    meta = parse_name_and_position(soup)
-
-    info = parse_dt_dd_block(soup)
-    stats = parse_global_stats(soup)
-
-    return {
-        "player_id": player_id,
-        "name": meta.get("name"),
-        "position": meta.get("position"),
-        "height_cm": parse_int(info.get("Taille")),
-        "weight_kg": parse_int(info.get("Poids")),
-        "age": parse_int(info.get("Âge")),
-        "nationality": info.get("Nationalité"),
+    meta = parse_name_and_position(data)
+
+    info = parse_dt_dd_block(data)
+    stats = parse_global_stats(data)
+
+    return PlayerRow(
+        player_id=player_id,
+        name=meta.get("name"),
+        position=meta.get("position"),
+        height_cm=parse_int(info.get("Taille")),
+        weight_kg=parse_int(info.get("Poids")),
+        age=parse_int(info.get("Âge")),
+        nationality=info.get("Nationalité"),
         **stats,
-        "url": url,
-    }
+        url=url,
+    )
 
 
-def main():
-    session = build_session()
+def scrape_one_player(session: requests.Session, url: str) -> PlayerRow:
+    return parse_player(url, fetch_html(session, url))
 
-    player_urls = collect_player_urls(session, ROSTER_URL)
-    print(f"✅ {len(player_urls)} joueurs détectés depuis {ROSTER_URL}")
 
-    rows: List[Dict] = []
-    for i, url in enumerate(player_urls, start=1):
+def crawl_players(session: requests.Session, ckpt: CrawlCheckpoint) -> None:
+    """
+    Crawl des URLs non terminées du checkpoint : chaque fiche est persistée
+    (statut, hash du HTML, record) dès qu'elle est parsée.
+    Une fiche en dérive de structure est en échec (réessayée au run suivant) ;
+    à partir de DRIFT_PAGES_LIMIT fiches, la DriftError arrête le crawl et
+    l'export n'a pas lieu.
+    """
+    todo = ckpt.pending()
+    drifted = 0
+    for i, url in enumerate(todo, start=1):
         try:
-            print(f"[{i}/{len(player_urls)}] {url}")
-            rows.append(scrape_one_player(session, url))
+            print(f"[{i}/{len(todo)}] {url}")
+            html = fetch_html(session, url)
+            GUARD.check("player", html, url)
+            ckpt.mark_done(url, body_hash(html), parse_player(url, html).as_dict())
+        except DriftError as e:
+            ckpt.mark_failed(url, str(e))
+            drifted += 1
+            if drifted >= DRIFT_PAGES_LIMIT:
+                raise
+            print(f"❌ {e}")
         except Exception as e:
-            rows.append({
-                "player_id": extract_player_id(url),
-                "url": url,
-                "error": str(e),
-            })
-        time.sleep(SLEEP_SECONDS)
-
-    df = pd.DataFrame(rows)
-
-    # Ordre propre des colonnes (sans macro_group / line_group_raw / position_text)
-    cols_order = [
-        "player_id", "name", "position",
-        "height_cm", "weight_kg", "age", "nationality",
-        "since_year", "caps", "matches", "tries", "points",
-        "url", "error"
-    ]
-    df = df[[c for c in cols_order if c in df.columns] + [c for c in df.columns if c not in cols_order]]
-
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = OUTPUT_DIR / OUTPUT_FILENAME
+            ckpt.mark_failed(url, str(e))
+
+
+def iter_player_rows(ckpt: CrawlCheckpoint, player_urls: List[str]) -> Iterator[PlayerRow]:
+    """Lignes à exporter pour l'effectif courant (les échecs sortent en ligne 'error')."""
+    wanted = set(player_urls)
+    for row in ckpt.rows():
+        if row["url"] not in wanted:
+            continue
+        if row["record"] is not None:
+            yield PlayerRow(**row["record"])
+        else:
+            yield PlayerRow(player_id=extract_player_id(row["url"]), url=row["url"], error=row["error"])
+
 
-    # utf-8-sig = Excel Windows lit mieux les accents
-    df.to_csv(out_path, index=False, encoding="utf-8-sig")
+def main(session: Optional[requests.Session] = None):
+    session = session or build_session()
+
+    player_urls = collect_player_urls(session, ROSTER_URL)
+    print(f"✅ {len(player_urls)} joueurs détectés depuis {ROSTER_URL}")
+
+    out_path = OUTPUT_DIR / OUTPUT_FILENAME
 
-    print(f"\n✅ Export terminé : {out_path} ({len(df)} lignes)")
-    print(df.head(5))
+    # Checkpoint : relancer après un crash ne refait que les fiches non terminées
+    with CrawlCheckpoint(OUTPUT_DIR / CHECKPOINT_FILENAME) as ckpt:
+        ckpt.add(player_urls)
+        crawl_players(session, ckpt)
+        print(f"📌 Checkpoint : {ckpt.stats()}")
+
+        # utf-8-sig = Excel Windows lit mieux les accents
+        with CsvSink(out_path, PLAYER_COLUMNS, encoding="utf-8-sig") as sink:
+            for row in iter_player_rows(ckpt, player_urls):
+                sink.write(row)
+
+    print(f"\n✅ Export terminé : {out_path} ({sink.count} lignes)")
+    print(f"⏱️ Throttle : {THROTTLE.metrics()}")
+
+    # historique des compteurs + stats par match (cf. player_history.py)
+    try:
+        import player_history  # pandas : seulement en fin d'export
+        player_history.update(OUTPUT_DIR, OUTPUT_DIR)
+    except Exception as e:
+        print(f"❌ Historique joueurs : {e}")
+
+    # joueurs proches + percentiles par poste (cf. player_similarity.py)
+    try:
+        import player_similarity
+        player_similarity.write_tables(player_similarity.build_tables(OUTPUT_DIR), OUTPUT_DIR)
+    except Exception as e:
+        print(f"❌ Similarité joueurs : {e}")
 
 
 if __name__ == "__main__":
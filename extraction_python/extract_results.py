@@ -1,13 +1,18 @@
 import re
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Iterator, Optional, Tuple
 
 import requests
-import pandas as pd
 from bs4 import BeautifulSoup, Tag
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import archive
+import partitions
+from fingerprint import DriftGuard
+from records import MatchRow
+from sinks import SqliteSink
+
 
 # =========================
 # CONFIG
@@ -21,9 +26,18 @@ URL_RESULTS = "https://www.ubbrugby.com/equipes/equipe-premiere/calendrier-resul
 
 OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
 OUTPUT_FILENAME = "results.csv"
+STORE_FILENAME = "results.sqlite"
+
+RESULT_COLUMNS = [
+    "date", "competition", "journee", "team_home", "team_away",
+    "score_home", "score_away", "source_url",
+]
+RESULT_KEY = ["date_iso", "competition", "team_home", "team_away"]
 
 DEBUG = False  # True si tu veux afficher des logs
 
+GUARD = DriftGuard()  # structure de la page calendrier (cf. fingerprint.py)
+
 
 # =========================
 # Regex / parsing
@@ -31,10 +45,15 @@ DEBUG = False  # True si tu veux afficher des logs
 WS_RE = re.compile(r"\s+")
 WEEKDAYS_FR = r"(Lundi|Mardi|Mercredi|Jeudi|Vendredi|Samedi|Dimanche)"
 
-DATE_RE = re.compile(rf"^{WEEKDAYS_FR}\s+\d{{1,2}}\s+\w+\s+\d{{4}}$", re.IGNORECASE)
+COMPETITIONS = r"(?:Top 14|Champions Cup|Amical Clubs)"
 
-SCORE_LINE_RE = re.compile(r"^\s*(\d+)\s*-\s*(\d+)\s+(.*)$")
-COMP_RE = re.compile(r"^(Top 14|Champions Cup|Amical Clubs)\b", re.IGNORECASE)
+# une seule regex par ligne : date, score ("29 - 20 Équipes"), compétition (avec ou sans journée)
+LINE_TOKEN_RE = re.compile(
+    rf"(?P<date>(?i:{WEEKDAYS_FR})\s+\d{{1,2}}\s+\w+\s+\d{{4}})"
+    r"|(?P<score>\s*(?P<home>\d+)\s*-\s*(?P<away>\d+)\s+(?P<rest>.*))"
+    rf"|(?P<comp>(?i:{COMPETITIONS})\b[^-]*)"
+    rf"|(?P<dcomp>\s*(?i:{COMPETITIONS})\b[^-]*)-(?P<journee>.*)"
+)
 
 MONTHS_FR = {
     "janvier": 1, "février": 2, "fevrier": 2, "mars": 3, "avril": 4,
@@ -83,18 +102,19 @@ def build_session() -> requests.Session:
     session.headers.update(HEADERS)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
+    archive.attach(session)  # copie de chaque page HTML (re-parse sans re-fetch)
     return session
 
 
-def get_soup(session: requests.Session, url: str) -> BeautifulSoup:
+def get_html(session: requests.Session, url: str) -> str:
     r = session.get(url, timeout=TIMEOUT)
     r.raise_for_status()
-    return BeautifulSoup(r.text, "html.parser")
+    return r.text
 
 
 def to_date_iso(date_fr: str) -> Optional[str]:
     """
-    Utilisé uniquement pour le tri interne, mais on ne l'exporte PAS.
+    Utilisé uniquement comme clé de tri (SQLite), mais on ne l'exporte PAS.
     """
     date_fr = clean_text(date_fr)
     m = DATE_PARTS_RE.match(date_fr)
@@ -170,110 +190,145 @@ def iter_lines_until_next_month_header(start_header: Tag) -> List[str]:
     return dedup
 
 
-def parse_month_section(lines: List[str], source_url: str) -> List[Dict]:
+# =========================
+# Lexer + automate
+# =========================
+# tokens : chaque ligne est classée une seule fois (LINE_TOKEN_RE)
+T_DATE, T_COMP, T_SCORE, T_TEXT = range(4)
+ANY = None
+
+# états de l'automate
+SEEK, IN_MATCH = range(2)
+COMP_WINDOW = 3  # lignes après la date où chercher la compétition
+SCORE_WINDOW = 6  # ... et le score
+
+# (état, token) -> (action, état suivant) ; ANY = tout autre token
+RESULTS_FSM = {
+    (SEEK, T_DATE): ("date", IN_MATCH),
+    (SEEK, ANY): (None, SEEK),
+    (IN_MATCH, T_COMP): ("comp", IN_MATCH),
+    (IN_MATCH, T_SCORE): ("score", SEEK),
+    (IN_MATCH, ANY): (None, IN_MATCH),
+}
+
+
+def lex_lines(lines: List[str]) -> List[Tuple[int, object]]:
+    """Ligne -> (token, valeur) : compétition (comp, journée), score (home, away, reste) ou texte."""
+    tokens: List[Tuple[int, object]] = []
+    for line in lines:
+        m = LINE_TOKEN_RE.fullmatch(line)
+        if m is None:
+            tokens.append((T_TEXT, line))
+        elif m.lastgroup == "date":
+            tokens.append((T_DATE, line))
+        elif m.lastgroup == "score":
+            tokens.append((T_SCORE, (int(m.group("home")), int(m.group("away")), m.group("rest"))))
+        elif m.lastgroup == "comp":
+            tokens.append((T_COMP, (line, None)))
+        else:  # "Top 14 - 15e journée"
+            tokens.append((T_COMP, (m.group("dcomp").strip(), m.group("journee").strip())))
+    return tokens
+
+
+def parse_month_section(lines: List[str]) -> List[MatchRow]:
     """
-    ✅ NE RENVOIE PLUS month_section NI date_iso (on les enlève totalement).
+    ✅ NE RENVOIE PLUS month_section ; date_iso sert seulement de clé de tri.
+    source_url est une constante du dataset (passée au sink), pas une colonne par match.
     """
-    out: List[Dict] = []
+    out: List[MatchRow] = []
+    tokens = lex_lines(lines)
+    n = len(tokens)
+    state = SEEK
+    date_idx = 0
+    comp = journee = None
     i = 0
-    n = len(lines)
-
-    while i < n:
-        line = lines[i]
-
-        if DATE_RE.match(line):
-            date_str = line
-
-            comp = None
-            journee = None
-
-            for j in range(i + 1, min(i + 4, n)):
-                comp_line = lines[j]
-                if "-" in comp_line:
-                    left, right = [p.strip() for p in comp_line.split("-", 1)]
-                    if COMP_RE.match(left):
-                        comp = left
-                        journee = right
-                        break
-                else:
-                    if COMP_RE.match(comp_line):
-                        comp = comp_line
-                        break
-
-            score_home = score_away = None
-            team_home = team_away = None
-            score_idx = None
-
-            for j in range(i + 1, min(i + 7, n)):
-                m = SCORE_LINE_RE.match(lines[j])
-                if m:
-                    score_home = int(m.group(1))
-                    score_away = int(m.group(2))
-                    team_home, team_away = split_teams_from_rest(m.group(3))
-                    score_idx = j
-                    break
 
-            if score_home is not None and score_away is not None:
-                out.append({
-                    "date": date_str,
-                    "competition": comp,
-                    "journee": journee,
-                    "team_home": team_home,
-                    "team_away": team_away,
-                    "score_home": score_home,
-                    "score_away": score_away,
-                    "source_url": source_url,
-                })
-
-            i = (score_idx + 1) if score_idx is not None else (i + 1)
-            continue
+    while True:
+        if state == IN_MATCH and (i >= n or i > date_idx + SCORE_WINDOW):
+            # pas de score après la date : on repart à la ligne suivante
+            state, i = SEEK, date_idx + 1
+        if i >= n:
+            break
+
+        kind, value = tokens[i]
+        action, state = RESULTS_FSM.get((state, kind)) or RESULTS_FSM[(state, ANY)]
+
+        if action == "date":
+            date_idx = i
+            comp = journee = None
+        elif action == "comp":
+            if comp is None and i <= date_idx + COMP_WINDOW:
+                comp, journee = value  # type: ignore
+        elif action == "score":
+            # la compétition peut suivre le score (fenêtre de COMP_WINDOW lignes)
+            for j in range(i + 1, min(date_idx + COMP_WINDOW + 1, n)):
+                if comp is not None:
+                    break
+                if tokens[j][0] == T_COMP:
+                    comp, journee = tokens[j][1]  # type: ignore
+
+            score_home, score_away, rest = value  # type: ignore
+            team_home, team_away = split_teams_from_rest(rest)
+            date_str = lines[date_idx]
+            out.append(MatchRow(
+                date=date_str,
+                competition=comp,
+                journee=journee,
+                team_home=team_home,
+                team_away=team_away,
+                score_home=score_home,
+                score_away=score_away,
+                date_iso=to_date_iso(date_str) or "",
+            ))
 
         i += 1
 
     return out
 
 
-def scrape_results(url: str = URL_RESULTS) -> pd.DataFrame:
-    session = build_session()
-    soup = get_soup(session, url)
+def parse_results(html: str) -> Iterator[MatchRow]:
+    """
+    Parsing pur (sans réseau) de la page calendrier-résultats.
+    Les matchs sont produits section (mois) par section ; chaque ligne porte
+    une clé de tri `date_iso` (non exportée dans le CSV).
+    """
+    soup = BeautifulSoup(html, "html.parser")
 
     month_headers = find_month_headers(soup)
 
     if DEBUG:
         print(f"DEBUG: month_headers trouvés = {len(month_headers)}")
 
-    rows: List[Dict] = []
-    sort_keys: List[Optional[str]] = []
-
     for header in month_headers:
         lines = iter_lines_until_next_month_header(header)
-        parsed = parse_month_section(lines, url)
-
-        # Tri interne: on calcule un ISO temporaire (non exporté)
-        for row in parsed:
-            sort_keys.append(to_date_iso(row["date"]))
-            rows.append(row)
+        yield from parse_month_section(lines)
 
-    df = pd.DataFrame(rows)
-
-    # tri par date (sans colonne date_iso)
-    if not df.empty:
-        df["_date_iso_tmp"] = [d or "" for d in sort_keys]
-        df = df.sort_values(by=["_date_iso_tmp", "competition"], na_position="last").drop(columns=["_date_iso_tmp"])
-        df = df.reset_index(drop=True)
-
-    return df
 
+def scrape_results(url: str = URL_RESULTS, session: Optional[requests.Session] = None) -> Iterator[MatchRow]:
+    """
+    Générateur : fetch + parsing de la page calendrier-résultats.
+    DriftError (structure modifiée) est levée avant la 1re ligne.
+    """
+    session = session or build_session()
+    html = get_html(session, url)
+    GUARD.check("calendar", html, url)
+    yield from parse_results(html)
 
-def main():
-    df = scrape_results(URL_RESULTS)
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+def main(session: Optional[requests.Session] = None):
     out_path = OUTPUT_DIR / OUTPUT_FILENAME
 
-    df.to_csv(out_path, index=False, encoding="utf-8-sig")
-    print(f"✅ Export terminé: {out_path} ({len(df)} lignes)")
-    print(df.head(10))
+    # Les lignes sont persistées dans SQLite au fil de l'eau ;
+    # le tri par date vient de la clé de la table (plus de colonne temporaire).
+    with SqliteSink(
+        OUTPUT_DIR / STORE_FILENAME, "results", RESULT_COLUMNS, RESULT_KEY,
+        constants={"source_url": URL_RESULTS}, replace={"source_url": URL_RESULTS},
+    ) as store:
+        for row in scrape_results(URL_RESULTS, session):
+            store.write(row)
+        n = store.export_csv(out_path, encoding="utf-8-sig")
+        print(f"✅ Export terminé: {out_path} ({n} lignes)")
+        partitions.write_dataset("results", store.iter_rows(), RESULT_COLUMNS, partitions.match_partition)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+"""
+Extraction déclarative : une spec par template de page, exécutée en un seul
+parcours de l'arbre.
+
+Chaque extracteur faisait ses propres recherches (select_one, find...) : une
+traversée complète de l'arbre par champ, plus deux `select_one` par
+statistique, et soupsieve qui recompile les sélecteurs à chaque appel. Ici :
+
+    PLAYER_SPEC = Spec("player", (
+        Field("firstname", ".player-detail-firstname", raw_text),
+        Field("tags", ".player-detail-metadata .tag", many=True),
+        Group("stats", ".player-global-stats-list .player-detail-stat", many=True, fields=(
+            Field("value", ".player-detail-stat-value"),
+            Field("label", ".player-detail-stat-text"),
+        )),
+    ))
+    data = extract(PLAYER_SPEC, soup)   # {"firstname": ..., "tags": [...], "stats": [{...}, ...]}
+
+La spec est compilée une fois (compile_spec, en cache) en plan : chaque
+sélecteur devient une suite d'étapes (tag, id, classes, attributs). Le
+parcours (ordre du document) fait avancer tous les champs en même temps ;
+un champ `many=False` prend le premier élément trouvé (= select_one), un
+`Group` extrait ses sous-champs dans chacun de ses éléments (= item.select_one).
+Ajouter un champ n'ajoute pas de passe.
+
+Sélecteurs supportés : descendants uniquement (`a b`), composés de tag, `*`,
+`#id`, `.classe` et `[attr]`, `[attr=v]`, `[attr^=v]`, `[attr$=v]`, `[attr*=v]`.
+Pour le reste (regex sur un attribut...), `when=` filtre les éléments.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, Tag
+
+
+# =========================
+# Valeurs
+# =========================
+def text(el: Tag) -> str:
+    return el.get_text(" ", strip=True)
+
+
+def raw_text(el: Tag) -> str:
+    return el.get_text()
+
+
+def attr(name: str) -> Callable[[Tag], Optional[str]]:
+    return lambda el: el.get(name)
+
+
+# =========================
+# Spec
+# =========================
+@dataclass(frozen=True, slots=True)
+class Field:
+    name: str
+    css: str
+    get: Callable[[Tag], Any] = text
+    many: bool = False
+    when: Optional[Callable[[Tag], bool]] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Group:
+    """Éléments `css` -> un dict de sous-champs par élément (cherchés dans ses descendants)."""
+    name: str
+    css: str
+    fields: Tuple[Union[Field, "Group"], ...]
+    many: bool = False
+    when: Optional[Callable[[Tag], bool]] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Spec:
+    name: str
+    fields: Tuple[Union[Field, Group], ...]
+
+
+# =========================
+# Compilation
+# =========================
+COMPOUND_RE = re.compile(r"^(?P<tag>[\w-]+|\*)?(?P<rest>(?:[.#][\w-]+|\[[^\]]+\])*)$")
+PART_RE = re.compile(r"([.#])([\w-]+)|\[\s*([\w-]+)\s*(?:([\^$*]?=)\s*(?:\"([^\"]*)\"|'([^']*)'|([^\]\s]*)))?\s*\]")
+
+ATTR_OPS = {
+    None: lambda value, ref: True,
+    "=": lambda value, ref: value == ref,
+    "^=": lambda value, ref: value.startswith(ref),
+    "$=": lambda value, ref: value.endswith(ref),
+    "*=": lambda value, ref: ref in value,
+}
+
+
+class SpecError(ValueError):
+    """Sélecteur hors du sous-ensemble supporté."""
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    """Un sélecteur composé (ex: `div.a.b[href]`)."""
+    tag: Optional[str]
+    id: Optional[str]
+    classes: frozenset
+    attrs: Tuple[Tuple[str, Optional[str], str], ...]
+
+    def match(self, el: Tag, classes) -> bool:
+        """`classes` : classes de l'élément, lues une fois pour tous les curseurs."""
+        if self.tag is not None and el.name != self.tag:
+            return False
+        if self.classes and not self.classes.issubset(classes):
+            return False
+        if self.id is not None and el.get("id") != self.id:
+            return False
+        for name, op, ref in self.attrs:
+            value = el.get(name)
+            if value is None:
+                return False
+            if isinstance(value, list):  # attributs multi-valués (class, rel...)
+                value = " ".join(value)
+            if not ATTR_OPS[op](value, ref):
+                return False
+        return True
+
+
+def compile_selector(css: str) -> Tuple[Step, ...]:
+    steps = []
+    for compound in css.split():
+        m = COMPOUND_RE.match(compound)
+        if not m:
+            raise SpecError(f"sélecteur non supporté : {css!r} ({compound!r})")
+        tag = m.group("tag")
+        ident, classes, attrs = None, set(), []
+        for p in PART_RE.finditer(m.group("rest")):
+            if p.group(1) == "#":
+                ident = p.group(2)
+            elif p.group(1) == ".":
+                classes.add(p.group(2))
+            else:
+                ref = next((g for g in p.group(5, 6, 7) if g is not None), "")
+                attrs.append((p.group(3), p.group(4), ref))
+        steps.append(Step(None if tag in (None, "*") else tag.lower(), ident, frozenset(classes), tuple(attrs)))
+    if not steps:
+        raise SpecError("sélecteur vide")
+    return tuple(steps)
+
+
+@dataclass(frozen=True, slots=True)
+class Node:
+    """Champ compilé : étapes du sélecteur + sous-plan pour un Group."""
+    field: Union[Field, Group]
+    steps: Tuple[Step, ...]
+    children: Tuple["Node", ...] = ()
+
+
+def _compile(fields) -> Tuple[Node, ...]:
+    nodes = []
+    for f in fields:
+        children = _compile(f.fields) if isinstance(f, Group) else ()
+        nodes.append(Node(f, compile_selector(f.css), children))
+    return tuple(nodes)
+
+
+@lru_cache(maxsize=None)
+def compile_spec(spec: Spec) -> Tuple[Node, ...]:
+    return _compile(spec.fields)
+
+
+# =========================
+# Exécution
+# =========================
+def _init(nodes: Tuple[Node, ...]) -> Dict:
+    """Champs `many` : listes ; champs simples : absents tant que non trouvés."""
+    return {n.field.name: [] for n in nodes if n.field.many}
+
+
+def _finish(nodes: Tuple[Node, ...], out: Dict) -> Dict:
+    for n in nodes:
+        if n.field.name not in out:
+            out[n.field.name] = None
+        if n.children:
+            items = out[n.field.name]
+            for item in (items if n.field.many else [items] if items is not None else []):
+                _finish(n.children, item)
+    return out
+
+
+def _walk(parent: Tag, cursors: List[Tuple[Node, int, Dict]]) -> None:
+    """
+    Parcours préfixe. Curseur = (champ, masque, sortie) : bit i du masque =
+    les i premières étapes du sélecteur sont satisfaites par un ancêtre.
+    """
+    for el in parent.contents:
+        if not isinstance(el, Tag):
+            continue
+        classes = el.attrs.get("class") or ()
+        nxt = []
+        inner = []
+        for node, mask, out in cursors:
+            f = node.field
+            if not f.many and f.name in out:
+                continue  # premier élément déjà trouvé
+            steps = node.steps
+            last = len(steps) - 1
+            new = mask
+            hit = False
+            for i in range(last + 1):
+                if mask >> i & 1 and steps[i].match(el, classes):
+                    if i == last:
+                        hit = True
+                    else:
+                        new |= 1 << (i + 1)
+            if hit and (f.when is None or f.when(el)):
+                if node.children:
+                    value = _init(node.children)
+                    inner.extend((child, 1, value) for child in node.children)
+                else:
+                    value = f.get(el)
+                if f.many:
+                    out[f.name].append(value)
+                else:
+                    out[f.name] = value
+            nxt.append((node, new, out))
+        if el.contents:
+            _walk(el, nxt + inner)
+
+
+def extract(spec: Spec, soup: Union[BeautifulSoup, Tag]) -> Dict:
+    """Tous les champs de la spec en un parcours de `soup`."""
+    nodes = compile_spec(spec)
+    out = _init(nodes)
+    _walk(soup, [(node, 1, out) for node in nodes])
+    return _finish(nodes, out)
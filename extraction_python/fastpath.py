@@ -0,0 +1,65 @@
+"""
+Helpers légers (bibliothèque standard uniquement) pour les commandes courtes.
+
+Importer pandas / bs4 / requests coûte plusieurs centaines de ms ; les
+commandes qui lisent juste quelques CSV (publication, API, scheduler...)
+passent par ici au lieu de pd.read_csv ; les modules lourds ne sont
+importés qu'au moment où l'on en a besoin (cf. cli.py).
+"""
+
+import csv
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List
+
+
+INT_RE = re.compile(r"^[+-]?\d+$")
+FLOAT_RE = re.compile(r"^[+-]?\d+\.\d*$")
+
+
+def strip_accents(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+def team_key(name) -> str:
+    """Clé stable d'équipe (sans accents, minuscules, alphanumérique) : 'Bordeaux-Bègles' -> 'bordeauxbegles'."""
+    if not isinstance(name, str):
+        return ""
+    return re.sub(r"[^a-z0-9]", "", strip_accents(name).lower())
+
+
+def detect_sep(header_line: str) -> str:
+    """Les exports utilisent ',' ou ';' selon le script."""
+    return ";" if header_line.count(";") > header_line.count(",") else ","
+
+
+def convert(value: str):
+    """'12' -> 12 ; '2012.0' -> 2012 ; '' -> None ; sinon texte."""
+    if value == "":
+        return None
+    if INT_RE.match(value):
+        return int(value)
+    if FLOAT_RE.match(value):
+        f = float(value)
+        return int(f) if f.is_integer() else f
+    return value
+
+
+def read_csv_rows(path: Path, typed: bool = True) -> List[Dict]:
+    """
+    CSV -> liste de dicts, sans pandas. utf-8 avec ou sans BOM, sinon cp1252
+    (fichiers saisis sous Excel) ; séparateur détecté.
+    """
+    raw = Path(path).read_bytes()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("cp1252")
+    lines = text.splitlines()
+    sep = detect_sep(lines[0] if lines else "")
+    reader = csv.DictReader(lines, delimiter=sep)
+    if not typed:
+        return list(reader)
+    return [{k: convert(v or "") for k, v in row.items()} for row in reader]
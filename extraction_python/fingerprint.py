@@ -0,0 +1,275 @@
+"""
+Détection de dérive de structure (schema drift) des pages scrapées.
+
+Quand le site change son HTML, les extracteurs ne plantent pas : ils
+renvoient 0 ligne (parse_section), sautent les lignes (len(tds) < 12) ou un
+dict vide (parse_dt_dd_block)... et on écrase un bon CSV par un CSV vide.
+
+Chaque type de page a une liste de sondes (sélecteurs CSS, + texte attendu
+si besoin) = les éléments dont dépendent les extracteurs. L'empreinte d'une
+page = pour chaque sonde : présence, chemin tag/classes du 1er élément
+trouvé et, pour les lignes de tableau, le nombre de cellules. On la compare
+(hash des sondes obligatoires) à l'empreinte de référence de fingerprints.json
+à chaque fetch ; si elle diffère, DriftError (avec le diff) et l'export n'a
+pas lieu. Une sonde facultative (élément absent de certaines fiches : tags,
+stats d'un nouveau joueur) n'est comparée que si elle est présente des deux
+côtés.
+
+    GUARD = DriftGuard()
+    GUARD.check("ranking", html, url)      # lève DriftError si dérive
+
+    python fingerprint.py                  # affiche les références
+    python fingerprint.py reset ranking    # oublie une référence (ré-apprise au run suivant)
+"""
+
+import hashlib
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from bs4 import BeautifulSoup, Tag
+
+
+# =========================
+# CONFIG
+# =========================
+FINGERPRINTS_FILE = Path(__file__).with_name("fingerprints.json")
+PATH_DEPTH = 3  # élément + 2 ancêtres dans la signature de chemin
+
+
+@dataclass(frozen=True, slots=True)
+class Probe:
+    name: str
+    css: str
+    text: Optional[str] = None  # regex sur le texte de l'élément (extracteurs "texte")
+    cells: bool = False         # lignes de tableau : nombre de <td> directs
+    required: bool = True       # absence = page cassée ; False : élément absent de certaines pages
+
+
+MONTH_LABEL = (
+    r"^(Janvier|Février|Fevrier|Mars|Avril|Mai|Juin|Juillet|Août|Aout|"
+    r"Septembre|Octobre|Novembre|Décembre|Decembre)\s+20\d{2}$"
+)
+
+PAGE_PROBES: Dict[str, List[Probe]] = {
+    # effectif.html -> liens /effectif/j123-...
+    "roster": [
+        Probe("player_links", 'a[href*="/effectif/j"]'),
+    ],
+    # fiche joueur (extract_players.parse_player)
+    "player": [
+        Probe("info_list", ".player-detail-info-list dl > div > dt"),
+        Probe("info_values", ".player-detail-info-list dl > div > dd"),
+        Probe("stats_header", ".player-global-stats-header h2", required=False),  # pas de stats : nouveau joueur
+        Probe("stat_value", ".player-global-stats-list .player-detail-stat .player-detail-stat-value", required=False),
+        Probe("stat_text", ".player-global-stats-list .player-detail-stat .player-detail-stat-text", required=False),
+        Probe("firstname", ".player-detail-firstname"),
+        Probe("lastname", ".player-detail-lastname"),
+        Probe("metadata_tags", ".player-detail-metadata .tag", required=False),
+    ],
+    # calendrier-resultats.html (extract_results : titres de mois puis lignes texte)
+    "calendar": [
+        Probe("month_headers", "h2, h3, h4", text=MONTH_LABEL),
+    ],
+    # classement.html (extract_classement : texte sous les h2 ; *_top14 / *_cup : tableaux)
+    "ranking": [
+        Probe("section_top14", "h2", text=r"^Classement$"),
+        Probe("section_pools", "h2", text=r"^Poule\s+\d+$"),
+        Probe("top14_rows", "div#ranking-tab-top-14 table.ranking-table > tbody > tr", cells=True),
+        Probe("cup_titles", "div#ranking-tab-champions-cup h2.big-title"),
+        Probe(
+            "cup_rows",
+            "div#ranking-tab-champions-cup div.ranking-table-container table.ranking-table > tbody > tr",
+            cells=True,
+        ),
+        Probe("team_cell", "div.ranking-table-team"),
+    ],
+}
+
+
+class DriftError(ValueError):
+    """La structure d'une page ne correspond plus à sa référence."""
+
+
+# =========================
+# Empreintes
+# =========================
+WS_RE = re.compile(r"\s+")
+
+
+def tag_signature(el: Tag) -> str:
+    """<div class="b a" id="x"> -> 'div#x.a.b' (classes triées)."""
+    sig = el.name
+    if el.get("id"):
+        sig += "#" + el["id"]
+    for cls in sorted(el.get("class") or []):
+        sig += "." + cls
+    return sig
+
+
+def tag_path(el: Tag, depth: int = PATH_DEPTH) -> str:
+    parts = []
+    while isinstance(el, Tag) and el.name != "[document]" and len(parts) < depth:
+        parts.append(tag_signature(el))
+        el = el.parent
+    return " > ".join(reversed(parts))
+
+
+def probe_signature(soup: BeautifulSoup, probe: Probe) -> Dict:
+    found = soup.select(probe.css)
+    if probe.text:
+        text_re = re.compile(probe.text, re.IGNORECASE)
+        found = [el for el in found if text_re.match(WS_RE.sub(" ", el.get_text(" ", strip=True)))]
+
+    sig: Dict = {"present": bool(found), "path": tag_path(found[0]) if found else None}
+    if probe.cells:
+        sig["cells"] = sorted({len(tr.find_all("td", recursive=False)) for tr in found})
+    return sig
+
+
+def stable_digest(page_type: str, probes: Dict) -> str:
+    """Hash des sondes obligatoires (les facultatives varient d'une page à l'autre)."""
+    required = {p.name: probes.get(p.name) for p in PAGE_PROBES[page_type] if p.required}
+    return hashlib.sha1(json.dumps(required, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def fingerprint(page_type: str, page: Union[str, bytes, BeautifulSoup]) -> Dict:
+    """Empreinte structurelle d'une page (HTML ou soupe déjà construite)."""
+    soup = page if isinstance(page, BeautifulSoup) else BeautifulSoup(page, "html.parser")
+    probes = {p.name: probe_signature(soup, p) for p in PAGE_PROBES[page_type]}
+    return {"digest": stable_digest(page_type, probes), "probes": probes}
+
+
+def optional_changed(page_type: str, baseline: Dict, current: Dict) -> List[str]:
+    """Sondes facultatives présentes des deux côtés mais de structure différente."""
+    old, new = baseline.get("probes", {}), current.get("probes", {})
+    return [
+        p.name for p in PAGE_PROBES[page_type]
+        if not p.required
+        and (old.get(p.name) or {}).get("present") and (new.get(p.name) or {}).get("present")
+        and old[p.name] != new[p.name]
+    ]
+
+
+def diff_fingerprints(baseline: Dict, current: Dict, names: Optional[Sequence[str]] = None) -> List[str]:
+    lines = []
+    old, new = baseline.get("probes", {}), current.get("probes", {})
+    for name in sorted(names if names is not None else set(old) | set(new)):
+        a, b = old.get(name) or {}, new.get(name) or {}
+        for field in sorted(set(a) | set(b)):
+            if a.get(field) != b.get(field):
+                lines.append(f"  - {name}.{field}: {a.get(field)!r} -> {b.get(field)!r}")
+    return lines
+
+
+def missing_probes(page_type: str, fp: Dict) -> List[str]:
+    return [
+        p.name for p in PAGE_PROBES[page_type]
+        if p.required and not fp["probes"].get(p.name, {}).get("present")
+    ]
+
+
+# =========================
+# Références
+# =========================
+class DriftGuard:
+    """
+    Compare les empreintes aux références de `path`. Un type de page sans
+    référence est appris au premier fetch valide (`learn=True`).
+    """
+
+    def __init__(self, path: Path = FINGERPRINTS_FILE, learn: bool = True):
+        self.path = Path(path)
+        self.learn = learn
+        self._baselines: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        with open(self.path, encoding="utf-8") as fp:
+            return json.load(fp)
+
+    @property
+    def baselines(self) -> Dict[str, Dict]:
+        if self._baselines is None:
+            self._baselines = self._load()
+        return self._baselines
+
+    def _save(self, data: Dict[str, Dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        tmp.replace(self.path)
+        self._baselines = data
+
+    def accept(self, page_type: str, fp: Dict, url: str = "") -> None:
+        """Enregistre `fp` comme référence (relit le fichier : plusieurs scripts le partagent)."""
+        data = self._load()
+        data[page_type] = {**fp, "url": url, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self._save(data)
+
+    def compare(self, page_type: str, fp: Dict, url: str = "") -> None:
+        """
+        Lève DriftError si une sonde obligatoire s'écarte de la référence (ou
+        manque), ou si une sonde facultative présente des deux côtés a changé.
+        """
+        baseline = self.baselines.get(page_type)
+        if baseline is not None and stable_digest(page_type, baseline.get("probes", {})) == fp["digest"]:
+            changed = optional_changed(page_type, baseline, fp)
+            if not changed:
+                return  # cas normal : une comparaison de hash
+            self._raise(page_type, url, diff_fingerprints(baseline, fp, changed))
+
+        missing = missing_probes(page_type, fp)
+        if baseline is None and not missing:
+            if self.learn:
+                self.accept(page_type, fp, url)
+                print(f"📌 Empreinte de référence enregistrée pour '{page_type}' ({self.path})")
+            return
+
+        required = [p.name for p in PAGE_PROBES[page_type] if p.required]
+        lines = diff_fingerprints(baseline or {}, fp, required)
+        if missing:
+            lines.insert(0, f"  sondes absentes : {', '.join(missing)}")
+        self._raise(page_type, url, lines)
+
+    @staticmethod
+    def _raise(page_type: str, url: str, lines: List[str]) -> None:
+        raise DriftError(
+            f"structure de la page '{page_type}' modifiée ({url or '?'}) :\n"
+            + "\n".join(lines)
+            + f"\n-> export annulé ; après mise à jour des extracteurs : python fingerprint.py reset {page_type}"
+        )
+
+    def check(self, page_type: str, page: Union[str, bytes, BeautifulSoup], url: str = "") -> Dict:
+        fp = fingerprint(page_type, page)
+        self.compare(page_type, fp, url)
+        return fp
+
+    def reset(self, page_types: Sequence[str]) -> None:
+        data = self._load()
+        for t in page_types:
+            data.pop(t, None)
+        self._save(data)
+
+
+def main():
+    guard = DriftGuard()
+    if sys.argv[1:2] == ["reset"]:
+        guard.reset(sys.argv[2:] or list(PAGE_PROBES))
+        print(f"✅ Références supprimées : {', '.join(sys.argv[2:]) or 'toutes'}")
+        return
+
+    for page_type, ref in sorted(guard.baselines.items()):
+        print(f"{page_type}: {ref['digest'][:12]} ({ref.get('recorded_at')}, {ref.get('url')})")
+        for name, sig in ref["probes"].items():
+            print(f"  {name}: {sig}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+"""
+File de jobs partagée entre workers de crawl (plusieurs processus ou machines).
+
+Un job = (kind, payload JSON) identifié par une clé unique (ex:
+"player:<url>") : le remettre en file ne crée pas de doublon, le rejouer
+réécrit le même résultat (jobs idempotents). Un worker prend un job avec un
+bail (`lease`) qu'il prolonge par heartbeat ; un bail expiré (worker
+planté) remet le job en file. Les échecs sont réessayés avec backoff
+exponentiel, puis le job passe "dead".
+
+La politesse est partagée : `acquire_host(host, interval)` réserve un
+créneau par hôte pour tous les workers de la file (une requête par
+`interval` secondes et par hôte, quel que soit le nombre de workers).
+
+Deux backends, même interface :
+  - SqliteQueue : un fichier SQLite (local, plusieurs processus) ;
+  - RedisQueue  : protocole Redis (serveur partagé entre machines), ou
+    LocalRedis, une doublure en mémoire (un seul processus, tests).
+
+    queue = open_queue("crawl_queue.sqlite")    # ou "redis://host:6379/0", "local"
+    queue.put("player", {"slug": "ubb", "url": url}, key=f"player:{url}")
+    job = queue.lease("worker-1", lease_seconds=60)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+# =========================
+# CONFIG
+# =========================
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 30.0
+MAX_BACKOFF = 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    key          TEXT NOT NULL UNIQUE,
+    kind         TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_until  REAL,
+    worker       TEXT,
+    result       TEXT,
+    error        TEXT,
+    updated_at   REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS hosts (
+    host         TEXT PRIMARY KEY,
+    next_allowed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker    TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL,
+    done      INTEGER NOT NULL DEFAULT 0,
+    failed    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class QueuedJob:
+    key: str
+    kind: str
+    payload: Dict
+    attempts: int
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident() % 10000}"
+
+
+def backoff(attempts: int) -> float:
+    return min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempts - 1))
+
+
+# =========================
+# Backend SQLite
+# =========================
+class SqliteQueue:
+    """
+    File dans un fichier SQLite (WAL). Chaque prise de bail / créneau se fait
+    dans une transaction BEGIN IMMEDIATE : deux processus ne peuvent pas
+    prendre le même job.
+    """
+
+    def __init__(self, path: Path, max_attempts: int = MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # heartbeat dans un thread du worker
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _tx(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    # ---------- producteur ----------
+    def put(self, kind: str, payload: Dict, key: Optional[str] = None, refresh_after: Optional[float] = None) -> bool:
+        """
+        Ajoute un job (True) ; une clé déjà connue est ignorée (False), sauf
+        un job terminé depuis plus de `refresh_after` secondes, remis en file.
+        """
+        key = key or f"{kind}:{json.dumps(payload, sort_keys=True)}"
+        now = time.time()
+
+        def run(conn):
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO jobs (key, kind, payload, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload, ensure_ascii=False), PENDING, now),
+            )
+            if cur.rowcount:
+                return True
+            if refresh_after is None:
+                return False
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = 0, error = NULL, updated_at = ? "
+                "WHERE key = ? AND status IN (?, ?) AND updated_at <= ?",
+                (PENDING, now, key, DONE, DEAD, now - refresh_after),
+            )
+            return cur.rowcount > 0
+
+        return self._tx(run)
+
+    # ---------- worker ----------
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Optional[QueuedJob]:
+        now = time.time()
+
+        def run(conn):
+            # baux expirés : job à refaire, ou abandonné s'il a épuisé ses tentatives
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'bail expiré', updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (DEAD, now, LEASED, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, key, kind, payload, attempts FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDING, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, key, kind, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = ?, updated_at = ? WHERE id = ?",
+                (LEASED, worker, now + lease_seconds, attempts + 1, now, job_id),
+            )
+            conn.execute(
+                "INSERT INTO workers (worker, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(worker) DO UPDATE SET last_seen = excluded.last_seen",
+                (worker, now),
+            )
+            return QueuedJob(key, kind, json.loads(payload), attempts + 1)
+
+        return self._tx(run)
+
+    def heartbeat(self, job: QueuedJob, worker: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Prolonge le bail ; False si le job a été repris par un autre worker."""
+        now = time.time()
+
+        def run(conn):
+            cur = conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE key = ? AND worker = ? AND status = ?",
+                (now + lease_seconds, now, job.key, worker, LEASED),
+            )
+            conn.execute("UPDATE workers SET last_seen = ? WHERE worker = ?", (now, worker))
+            return cur.rowcount > 0
+
+        return self._tx(run)
+
+    def complete(self, job: QueuedJob, worker: str, result=None) -> bool:
+        now = time.time()
+
+        def run(conn):
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE key = ? AND worker = ? AND status = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), now, job.key, worker, LEASED),
+            )
+            conn.execute("UPDATE workers SET done = done + 1, last_seen = ? WHERE worker = ?", (now, worker))
+            return cur.rowcount > 0
+
+        return self._tx(run)
+
+    def fail(self, job: QueuedJob, worker: str, error: str, retry: bool = True) -> None:
+        now = time.time()
+        dead = not retry or job.attempts >= self.max_attempts
+
+        def run(conn):
+            conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE key = ? AND worker = ? AND status = ?",
+                (DEAD if dead else PENDING, now + backoff(job.attempts), error, now, job.key, worker, LEASED),
+            )
+            conn.execute("UPDATE workers SET failed = failed + 1, last_seen = ? WHERE worker = ?", (now, worker))
+
+        self._tx(run)
+
+    # ---------- politesse partagée ----------
+    def acquire_host(self, host: str, interval: float) -> None:
+        """Réserve le prochain créneau de l'hôte (commun à tous les workers) et attend son heure."""
+        now = time.time()
+
+        def run(conn):
+            row = conn.execute("SELECT next_allowed FROM hosts WHERE host = ?", (host,)).fetchone()
+            slot = max(now, row[0] if row else 0.0)
+            conn.execute(
+                "INSERT INTO hosts (host, next_allowed) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_allowed = excluded.next_allowed",
+                (host, slot + interval),
+            )
+            return slot
+
+        slot = self._tx(run)
+        if slot > now:
+            time.sleep(slot - now)
+
+    # ---------- lecture ----------
+    def results(self, kind: Optional[str] = None) -> Dict[str, Dict]:
+        """Jobs terminés : clé -> {kind, payload, result}."""
+        sql = "SELECT key, kind, payload, result FROM jobs WHERE status = ?"
+        params: list = [DONE]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        return {k: {"kind": kd, "payload": json.loads(p), "result": json.loads(r)} for k, kd, p, r in rows}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def workers(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT worker, last_seen, done, failed FROM workers ORDER BY worker").fetchall()
+        return {w: {"last_seen": seen, "done": done, "failed": failed} for w, seen, done, failed in rows}
+
+    def idle(self) -> bool:
+        """Plus rien à faire ni en cours (les workers peuvent s'arrêter)."""
+        stats = self.stats()
+        return not stats.get(PENDING) and not stats.get(LEASED)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# =========================
+# Backend Redis
+# =========================
+class RedisQueue:
+    """
+    Même file sur un serveur Redis (client redis-py, decode_responses=True,
+    ou LocalRedis). Clés :
+      {prefix}job:<clé>   hash : kind, payload, status, attempts, worker, result, error, updated_at
+      {prefix}ready       zset : clé -> heure de disponibilité
+      {prefix}leased      zset : clé -> fin du bail
+      {prefix}keys        set  : toutes les clés (stats / résultats)
+      {prefix}host:<hôte> créneau de politesse (SET NX PX)
+      {prefix}workers     hash : worker -> JSON (last_seen, done, failed)
+    Une prise de bail est gagnée par le seul worker dont le ZREM renvoie 1.
+    """
+
+    def __init__(self, client, prefix: str = "ubbq:", max_attempts: int = MAX_ATTEMPTS):
+        self.r = client
+        self.prefix = prefix
+        self.max_attempts = max_attempts
+
+    def _job(self, key: str) -> str:
+        return f"{self.prefix}job:{key}"
+
+    def _touch_worker(self, worker: str, field: Optional[str] = None) -> None:
+        raw = self.r.hget(f"{self.prefix}workers", worker)
+        info = json.loads(raw) if raw else {"done": 0, "failed": 0}
+        info["last_seen"] = time.time()
+        if field:
+            info[field] += 1
+        self.r.hset(f"{self.prefix}workers", worker, json.dumps(info))
+
+    # ---------- producteur ----------
+    def put(self, kind: str, payload: Dict, key: Optional[str] = None, refresh_after: Optional[float] = None) -> bool:
+        key = key or f"{kind}:{json.dumps(payload, sort_keys=True)}"
+        now = time.time()
+        name = self._job(key)
+        if not self.r.hsetnx(name, "kind", kind):
+            status, updated = self.r.hget(name, "status"), float(self.r.hget(name, "updated_at") or 0)
+            if refresh_after is None or status not in (DONE, DEAD) or updated > now - refresh_after:
+                return False
+        self.r.hset(name, mapping={
+            "kind": kind, "payload": json.dumps(payload, ensure_ascii=False),
+            "status": PENDING, "attempts": 0, "error": "", "updated_at": now,
+        })
+        self.r.sadd(f"{self.prefix}keys", key)
+        self.r.zadd(f"{self.prefix}ready", {key: 0})
+        return True
+
+    # ---------- worker ----------
+    def _reap(self, now: float) -> None:
+        """Baux expirés -> remis en file (ou dead). Seul le worker qui gagne le ZREM s'en charge."""
+        for key in self.r.zrangebyscore(f"{self.prefix}leased", 0, now):
+            if not self.r.zrem(f"{self.prefix}leased", key):
+                continue
+            name = self._job(key)
+            if int(self.r.hget(name, "attempts") or 0) >= self.max_attempts:
+                self.r.hset(name, mapping={"status": DEAD, "error": "bail expiré", "updated_at": now})
+            else:
+                self.r.hset(name, mapping={"status": PENDING, "updated_at": now})
+                self.r.zadd(f"{self.prefix}ready", {key: now})
+
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Optional[QueuedJob]:
+        now = time.time()
+        self._reap(now)
+        for key in self.r.zrangebyscore(f"{self.prefix}ready", 0, now, start=0, num=8):
+            if not self.r.zrem(f"{self.prefix}ready", key):
+                continue  # pris par un autre worker
+            self.r.zadd(f"{self.prefix}leased", {key: now + lease_seconds})
+            name = self._job(key)
+            attempts = self.r.hincrby(name, "attempts", 1)
+            self.r.hset(name, mapping={"status": LEASED, "worker": worker, "updated_at": now})
+            self._touch_worker(worker)
+            data = self.r.hgetall(name)
+            return QueuedJob(key, data["kind"], json.loads(data["payload"]), int(attempts))
+        return None
+
+    def _owned(self, job: QueuedJob, worker: str) -> bool:
+        name = self._job(job.key)
+        return self.r.hget(name, "worker") == worker and self.r.hget(name, "status") == LEASED
+
+    def heartbeat(self, job: QueuedJob, worker: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        if not self._owned(job, worker):
+            return False
+        self.r.zadd(f"{self.prefix}leased", {job.key: time.time() + lease_seconds})
+        self._touch_worker(worker)
+        return True
+
+    def complete(self, job: QueuedJob, worker: str, result=None) -> bool:
+        if not self._owned(job, worker):
+            return False
+        self.r.zrem(f"{self.prefix}leased", job.key)
+        self.r.hset(self._job(job.key), mapping={
+            "status": DONE, "result": json.dumps(result, ensure_ascii=False), "error": "", "updated_at": time.time(),
+        })
+        self._touch_worker(worker, "done")
+        return True
+
+    def fail(self, job: QueuedJob, worker: str, error: str, retry: bool = True) -> None:
+        if not self._owned(job, worker):
+            return
+        now = time.time()
+        self.r.zrem(f"{self.prefix}leased", job.key)
+        dead = not retry or job.attempts >= self.max_attempts
+        self.r.hset(self._job(job.key), mapping={"status": DEAD if dead else PENDING, "error": error, "updated_at": now})
+        if not dead:
+            self.r.zadd(f"{self.prefix}ready", {job.key: now + backoff(job.attempts)})
+        self._touch_worker(worker, "failed")
+
+    # ---------- politesse partagée ----------
+    def acquire_host(self, host: str, interval: float) -> None:
+        name = f"{self.prefix}host:{host}"
+        while not self.r.set(name, "1", nx=True, px=max(1, int(interval * 1000))):
+            time.sleep(max(self.r.pttl(name), 10) / 1000)
+
+    # ---------- lecture ----------
+    def _all(self):
+        for key in sorted(self.r.smembers(f"{self.prefix}keys")):
+            yield key, self.r.hgetall(self._job(key))
+
+    def results(self, kind: Optional[str] = None) -> Dict[str, Dict]:
+        return {
+            key: {"kind": d["kind"], "payload": json.loads(d["payload"]), "result": json.loads(d["result"])}
+            for key, d in self._all()
+            if d.get("status") == DONE and (kind is None or d["kind"] == kind)
+        }
+
+    def stats(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for _key, d in self._all():
+            out[d.get("status")] = out.get(d.get("status"), 0) + 1
+        return out
+
+    def workers(self) -> Dict[str, Dict]:
+        return {w: json.loads(v) for w, v in sorted(self.r.hgetall(f"{self.prefix}workers").items())}
+
+    def idle(self) -> bool:
+        stats = self.stats()
+        return not stats.get(PENDING) and not stats.get(LEASED)
+
+    def close(self) -> None:
+        pass
+
+
+class LocalRedis:
+    """
+    Doublure en mémoire du sous-ensemble Redis utilisé par RedisQueue
+    (valeurs str, comme decode_responses=True). Thread-safe, un seul processus.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, object] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory):
+        if name in self._expires and self._expires[name] <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        if name not in self._data and factory is not None:
+            self._data[name] = factory()
+        return self._data.get(name)
+
+    # hash
+    def hsetnx(self, name, key, value) -> int:
+        with self._lock:
+            h = self._get(name, dict)
+            if key in h:
+                return 0
+            h[key] = str(value)
+            return 1
+
+    def hset(self, name, key=None, value=None, mapping=None) -> int:
+        with self._lock:
+            h = self._get(name, dict)
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            added = len(set(items) - set(h))
+            h.update({k: str(v) for k, v in items.items()})
+            return added
+
+    def hget(self, name, key):
+        with self._lock:
+            return (self._get(name, None) or {}).get(key)
+
+    def hgetall(self, name) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._get(name, None) or {})
+
+    def hincrby(self, name, key, amount=1) -> int:
+        with self._lock:
+            h = self._get(name, dict)
+            h[key] = str(int(h.get(key, 0)) + amount)
+            return int(h[key])
+
+    # set
+    def sadd(self, name, *values) -> int:
+        with self._lock:
+            s = self._get(name, set)
+            added = len(set(values) - s)
+            s.update(values)
+            return added
+
+    def smembers(self, name):
+        with self._lock:
+            return set(self._get(name, None) or ())
+
+    # zset
+    def zadd(self, name, mapping) -> int:
+        with self._lock:
+            z = self._get(name, dict)
+            added = len(set(mapping) - set(z))
+            z.update({k: float(v) for k, v in mapping.items()})
+            return added
+
+    def zrem(self, name, *values) -> int:
+        with self._lock:
+            z = self._get(name, dict)
+            return sum(1 for v in values if z.pop(v, None) is not None)
+
+    def zrangebyscore(self, name, min, max, start=None, num=None):
+        with self._lock:
+            z = self._get(name, None) or {}
+            keys = [k for k, s in sorted(z.items(), key=lambda kv: (kv[1], kv[0])) if float(min) <= s <= float(max)]
+        if start is not None and num is not None:
+            keys = keys[start:start + num]
+        return keys
+
+    # chaînes avec expiration
+    def set(self, name, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._get(name, None) is not None:
+                return None
+            self._data[name] = str(value)
+            if px:
+                self._expires[name] = time.time() + px / 1000
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    def pttl(self, name) -> int:
+        with self._lock:
+            if self._get(name, None) is None:
+                return -2
+            if name not in self._expires:
+                return -1
+            return int((self._expires[name] - time.time()) * 1000)
+
+
+Queue = Union[SqliteQueue, RedisQueue]
+
+
+def open_queue(target: Union[str, Path]) -> Queue:
+    """'redis://...' -> RedisQueue (paquet redis requis) ; 'local' -> doublure en mémoire ; sinon fichier SQLite."""
+    target = str(target)
+    if target.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # optionnel : seulement pour le mode multi-machines
+        return RedisQueue(redis.Redis.from_url(target, decode_responses=True))
+    if target == "local":
+        return RedisQueue(LocalRedis())
+    return SqliteQueue(Path(target))
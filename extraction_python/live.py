@@ -0,0 +1,324 @@
+"""
+Mode "live" jour de match : score UBB mis à jour en quelques secondes.
+
+Toutes les POLL_SECONDS :
+  1. GET conditionnel de calendrier-resultats.html (If-None-Match /
+     If-Modified-Since) : 304 = rien à faire ; sinon hash du corps, identique
+     au précédent = rien à faire non plus (serveur sans ETag) ;
+  2. on ne parse que le fragment HTML du mois en cours (découpé entre les
+     titres de mois dans le texte brut), pas la saison complète ;
+  3. diff avec le dernier état (clé date / compétition / équipes -> score) ;
+  4. chaque changement est publié sur un pub/sub interne : fichier JSONL,
+     webhook local (POST JSON) et/ou flux SSE (http://localhost:PORT/events).
+
+    python live.py                                      # fichier + SSE
+    python live.py --webhook http://localhost:5000/hook --every 15
+"""
+
+import argparse
+import hashlib
+import json
+import queue
+import re
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+import extract_results
+from records import MatchRow
+from throttle import AdaptiveThrottle
+
+
+# =========================
+# CONFIG
+# =========================
+URL = extract_results.URL_RESULTS
+OUTPUT_DIR = extract_results.OUTPUT_DIR
+EVENTS_FILENAME = "live_events.jsonl"
+STATE_FILENAME = "live_state.json"
+
+POLL_SECONDS = 20
+SSE_PORT = 8765
+SSE_KEEPALIVE = 15
+WEBHOOK_TIMEOUT = 5
+
+THROTTLE = AdaptiveThrottle(initial_delay=POLL_SECONDS / 2, respect_robots=False)
+
+Event = Dict
+MatchKey = Tuple[str, str, str, str]
+
+
+# =========================
+# Fetch conditionnel
+# =========================
+class ConditionalFetcher:
+    """GET avec validateurs HTTP ; renvoie None si la page n'a pas changé."""
+
+    def __init__(self, session: requests.Session, url: str = URL):
+        self.session = session
+        self.url = url
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.digest: Optional[str] = None
+        self.stats = {"polls": 0, "not_modified": 0, "unchanged": 0, "changed": 0}
+
+    def poll(self) -> Optional[str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        self.stats["polls"] += 1
+        r = THROTTLE.fetch(self.session, self.url, timeout=extract_results.TIMEOUT, headers=headers)
+        if r.status_code == 304:
+            self.stats["not_modified"] += 1
+            return None
+        r.raise_for_status()
+        self.etag = r.headers.get("ETag") or self.etag
+        self.last_modified = r.headers.get("Last-Modified") or self.last_modified
+
+        digest = hashlib.sha1(r.content).hexdigest()
+        if digest == self.digest:
+            self.stats["unchanged"] += 1
+            return None
+        self.digest = digest
+        self.stats["changed"] += 1
+        return r.text
+
+
+# =========================
+# Fragment du mois en cours
+# =========================
+def month_label_re(month: int, year: int) -> re.Pattern:
+    """Titre de mois dans le HTML brut, ex: '>Janvier 2026<' (avec ou sans accent)."""
+    names = "|".join(k for k, v in extract_results.MONTHS_FR.items() if v == month)
+    return re.compile(rf">\s*({names})\s+{year}\s*<", re.IGNORECASE)
+
+
+ANY_MONTH_LABEL_RE = re.compile(
+    r">\s*(" + "|".join(extract_results.MONTHS_FR) + r")\s+20\d{2}\s*<", re.IGNORECASE
+)
+
+
+def month_fragment(html: str, day: date) -> Optional[str]:
+    """HTML entre le titre du mois de `day` et le titre de mois suivant (None si absent)."""
+    m = month_label_re(day.month, day.year).search(html)
+    if not m:
+        return None
+    start = html.rfind("<", 0, m.start() + 1)  # début de la balise du titre
+    nxt = ANY_MONTH_LABEL_RE.search(html, m.end())
+    end = html.rfind("<", 0, nxt.start() + 1) if nxt else len(html)
+    return html[start:end]
+
+
+def parse_current_matches(html: str, day: date) -> List[MatchRow]:
+    """Matchs (avec score) du mois en cours ; repli sur la page entière si le fragment manque."""
+    fragment = month_fragment(html, day)
+    if fragment is None:
+        return list(extract_results.parse_results(html))
+    soup = BeautifulSoup(fragment, "html.parser")
+    rows: List[MatchRow] = []
+    for header in extract_results.find_month_headers(soup):
+        rows.extend(extract_results.parse_month_section(extract_results.iter_lines_until_next_month_header(header)))
+    return rows
+
+
+def match_key(row: MatchRow) -> MatchKey:
+    return (row.date_iso, row.competition or "", row.team_home or "", row.team_away or "")
+
+
+def diff_scores(previous: Dict[MatchKey, Dict], rows: List[MatchRow]) -> List[Event]:
+    events = []
+    for row in rows:
+        if extract_results.UBB_TOKEN not in f"{row.team_home} {row.team_away}":
+            continue
+        key = match_key(row)
+        before = previous.get(key)
+        now = row.as_dict()
+        if before is None or (before["score_home"], before["score_away"]) != (row.score_home, row.score_away):
+            events.append({
+                "type": "score",
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "match": now,
+                "previous": None if before is None else [before["score_home"], before["score_away"]],
+            })
+        previous[key] = now
+    return events
+
+
+# =========================
+# Pub/sub
+# =========================
+class Broker:
+    """Pub/sub en mémoire : chaque abonné reçoit chaque événement (erreurs isolées)."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[Event], None]] = []
+
+    def subscribe(self, fn: Callable[[Event], None]) -> None:
+        self._subscribers.append(fn)
+
+    def publish(self, event: Event) -> None:
+        for fn in self._subscribers:
+            try:
+                fn(event)
+            except Exception as e:
+                print(f"❌ abonné {getattr(fn, '__name__', fn)} : {e}")
+
+
+def file_subscriber(path: Path) -> Callable[[Event], None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    def append(event: Event) -> None:
+        with open(path, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps(event, ensure_ascii=False) + "\n")
+    return append
+
+
+def webhook_subscriber(url: str, session: requests.Session) -> Callable[[Event], None]:
+    def post(event: Event) -> None:
+        session.post(url, json=event, timeout=WEBHOOK_TIMEOUT).raise_for_status()
+    return post
+
+
+class SseHub:
+    """Flux Server-Sent Events : GET /events, un événement JSON par message."""
+
+    def __init__(self, port: int = SSE_PORT):
+        self.port = port
+        self._clients: List["queue.Queue[Event]"] = []
+        self._lock = threading.Lock()
+        self.last: Optional[Event] = None  # envoyé à la connexion d'un client
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/events":
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                q = hub._add()
+                try:
+                    if hub.last is not None:
+                        self._send(hub.last)
+                    while True:
+                        try:
+                            self._send(q.get(timeout=SSE_KEEPALIVE))
+                        except queue.Empty:
+                            self.wfile.write(b": keepalive\n\n")
+                            self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    hub._remove(q)
+
+            def _send(self, event: Event) -> None:
+                self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+
+    def _add(self) -> "queue.Queue[Event]":
+        q: "queue.Queue[Event]" = queue.Queue()
+        with self._lock:
+            self._clients.append(q)
+        return q
+
+    def _remove(self, q) -> None:
+        with self._lock:
+            self._clients.remove(q)
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __call__(self, event: Event) -> None:
+        self.last = event
+        with self._lock:
+            for q in self._clients:
+                q.put(event)
+
+
+# =========================
+# Boucle
+# =========================
+def load_state(path: Path) -> Dict[MatchKey, Dict]:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as fp:
+        return {tuple(k.split("|")): v for k, v in json.load(fp).items()}
+
+
+def save_state(path: Path, state: Dict[MatchKey, Dict]) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump({"|".join(k): v for k, v in state.items()}, fp, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def run_live(broker: Broker, session: requests.Session, every: float = POLL_SECONDS, stop: Optional[threading.Event] = None) -> None:
+    stop = stop or threading.Event()
+    state_path = OUTPUT_DIR / STATE_FILENAME
+    state = load_state(state_path)
+    fetcher = ConditionalFetcher(session, URL)
+
+    while not stop.is_set():
+        start = time.monotonic()
+        try:
+            html = fetcher.poll()
+            if html is not None:
+                events = diff_scores(state, parse_current_matches(html, date.today()))
+                for event in events:
+                    m = event["match"]
+                    print(f"🏉 {m['team_home']} {m['score_home']} - {m['score_away']} {m['team_away']}")
+                    broker.publish(event)
+                if events:
+                    save_state(state_path, state)
+        except Exception as e:
+            print(f"❌ poll : {e}")
+        stop.wait(max(0.0, every - (time.monotonic() - start)))
+
+    print(f"⏱️ Polls : {fetcher.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suivi live du score UBB")
+    parser.add_argument("--every", type=float, default=POLL_SECONDS, help="secondes entre deux polls")
+    parser.add_argument("--webhook", help="URL locale appelée (POST JSON) à chaque changement")
+    parser.add_argument("--file", default=str(OUTPUT_DIR / EVENTS_FILENAME), help="fichier JSONL des événements")
+    parser.add_argument("--sse-port", type=int, default=SSE_PORT, help="port du flux SSE (0 = désactivé)")
+    args = parser.parse_args()
+
+    session = extract_results.build_session()
+    broker = Broker()
+    if args.file:
+        broker.subscribe(file_subscriber(Path(args.file)))
+    if args.webhook:
+        broker.subscribe(webhook_subscriber(args.webhook, session))
+    if args.sse_port:
+        hub = SseHub(args.sse_port)
+        hub.start()
+        broker.subscribe(hub)
+        print(f"✅ SSE : http://127.0.0.1:{args.sse_port}/events")
+
+    try:
+        run_live(broker, session, args.every)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
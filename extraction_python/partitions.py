@@ -0,0 +1,309 @@
+"""
+Datasets partitionnés par saison et compétition (refresh incrémental).
+
+Power BI relit chaque CSV en entier à chaque refresh (requêtes T_*) : le
+temps de refresh croît avec l'historique. Les exporteurs écrivent donc aussi
+une copie partitionnée de leurs datasets :
+
+    DATA_DIR/partitions/results/season=2025-2026/competition=TOP14/part.csv
+    DATA_DIR/partitions/results/season=2025-2026/competition=CUP/part.csv
+    DATA_DIR/partitions/results/_manifest.json
+
+Le manifeste donne les colonnes et le séparateur du dataset (ceux de son
+export plat) et liste chaque partition : chemin, saison, compétition,
+nombre de lignes, sha256 et date de modification du fichier. Une partition
+dont le contenu n'a pas changé n'est pas réécrite (même hash, même date) : un
+consommateur (refresh incrémental Power BI, script) ne recharge que les
+partitions modifiées depuis sa dernière lecture (`changed_partitions`).
+
+Un export ne remplace que les partitions qu'il produit : la saison en cours
+réécrite par les scrapers ne touche pas aux saisons passées (backfill.py).
+Chaque partition est écrite dans un fichier temporaire puis renommée
+(os.replace), le manifeste en dernier : un lecteur ne voit jamais de
+partition à moitié écrite.
+
+    python partitions.py                      # manifestes : partitions, lignes, dates
+    python partitions.py --since 2026-01-20   # partitions modifiées depuis
+    python partitions.py rebuild              # partitionne les CSV existants de DATA_DIR
+"""
+
+import argparse
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from publish import file_sha256
+from sinks import CsvSink, to_row
+
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
+PARTITIONS_DIR = DATA_DIR / "partitions"
+SEASONS_DIR = DATA_DIR / "seasons"  # sorties de backfill.py
+MANIFEST_FILENAME = "_manifest.json"
+PART_FILENAME = "part.csv"
+
+COMPETITION_CODES = {"Top 14": "TOP14", "Champions Cup": "CUP", "Amical Clubs": "FRIENDLY"}
+UNKNOWN = "inconnue"  # date ou compétition non reconnue
+
+Partition = Tuple[str, str]  # (saison, code compétition)
+
+
+# =========================
+# Clés de partition
+# =========================
+def season_label(d: date) -> str:
+    """Saison rugby (août -> juin) : 2025-09-06 -> '2025-2026'."""
+    start = d.year if d.month >= 8 else d.year - 1
+    return f"{start}-{start + 1}"
+
+
+def competition_code(name: Optional[str]) -> str:
+    return COMPETITION_CODES.get(name, "OTHER") if name else UNKNOWN
+
+
+def match_partition(row: Dict) -> Partition:
+    """Ligne de results (avec `date_iso`, clé de tri des extracteurs)."""
+    try:
+        season = season_label(date.fromisoformat(row.get("date_iso") or ""))
+    except ValueError:
+        season = UNKNOWN
+    return season, competition_code(row.get("competition"))
+
+
+def standing_partition(season: str, competition: str) -> Callable[[Dict], Partition]:
+    """Un classement n'a pas de date : la saison est celle de la page scrapée."""
+    code = competition_code(competition)
+    return lambda row: (season, code)
+
+
+def column_partition(row: Dict) -> Partition:
+    """Tables qui portent déjà `season` / `competition` (ex: fact_player_match)."""
+    season = row.get("season")
+    return (str(season) if season and season == season else UNKNOWN), competition_code(row.get("competition"))
+
+
+def partition_path(season: str, competition: str) -> Path:
+    """Découpage "clé=valeur" (lisible par les connecteurs dossier : Power BI, pandas, Spark)."""
+    return Path(f"season={season}") / f"competition={competition}" / PART_FILENAME
+
+
+# =========================
+# Manifeste
+# =========================
+def load_manifest(dataset_dir: Path) -> Dict:
+    path = dataset_dir / MANIFEST_FILENAME
+    if not path.exists():
+        return {"dataset": dataset_dir.name, "partitions": []}
+    with open(path, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def save_manifest(dataset_dir: Path, manifest: Dict) -> None:
+    path = dataset_dir / MANIFEST_FILENAME
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def changed_partitions(manifest: Dict, seen: Dict[str, str]) -> List[Dict]:
+    """Partitions dont le hash diffère de `seen` (chemin -> sha256 de la dernière lecture)."""
+    return [p for p in manifest["partitions"] if seen.get(p["path"]) != p["sha256"]]
+
+
+def modified_since(manifest: Dict, since: datetime) -> List[Dict]:
+    return [p for p in manifest["partitions"] if datetime.fromisoformat(p["modified_at"]) >= since]
+
+
+# =========================
+# Sink partitionné
+# =========================
+class PartitionedSink:
+    """
+    Même interface que sinks.CsvSink, une partition par clé `partition_of(row)`.
+    À la fermeture : partitions identiques à l'existant abandonnées, les autres
+    renommées en place, puis manifeste mis à jour. En cas d'exception dans le
+    `with`, rien n'est remplacé.
+    """
+
+    def __init__(
+        self,
+        dataset_dir: Path,
+        fieldnames: Sequence[str],
+        partition_of: Callable[[Dict], Partition],
+        sep: str = ",",
+        encoding: str = "utf-8-sig",
+        constants: Optional[Dict] = None,
+    ):
+        self.dataset_dir = Path(dataset_dir)
+        self.fieldnames = list(fieldnames)
+        self.partition_of = partition_of
+        self.sep = sep
+        self.encoding = encoding
+        self.constants = constants or {}
+        self.count = 0
+        self.written: List[str] = []    # partitions réécrites (contenu changé)
+        self.unchanged: List[str] = []
+        self._sinks: Dict[Partition, CsvSink] = {}
+
+    def __enter__(self) -> "PartitionedSink":
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def write(self, row) -> None:
+        row = to_row(row, self.constants)
+        key = self.partition_of(row)
+        sink = self._sinks.get(key)
+        if sink is None:
+            path = self.dataset_dir / partition_path(*key)
+            sink = CsvSink(path.with_name(path.name + ".tmp"), self.fieldnames, sep=self.sep, encoding=self.encoding)
+            self._sinks[key] = sink.__enter__()
+        sink.write(row)
+        self.count += 1
+
+    def _commit(self, key: Partition, sink: CsvSink) -> Dict:
+        tmp = sink.path
+        path = tmp.with_name(PART_FILENAME)
+        digest = file_sha256(tmp)
+        rel = path.relative_to(self.dataset_dir).as_posix()
+        if path.exists() and file_sha256(path) == digest:
+            tmp.unlink()
+            self.unchanged.append(rel)
+        else:
+            os.replace(tmp, path)
+            self.written.append(rel)
+        return {
+            "path": rel,
+            "season": key[0],
+            "competition": key[1],
+            "rows": sink.count,
+            "bytes": path.stat().st_size,
+            "sha256": digest,
+            "modified_at": datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds"),
+        }
+
+    def close(self) -> None:
+        if not self._sinks:
+            return
+        for sink in self._sinks.values():
+            sink.close()
+        entries = {p["path"]: p for p in load_manifest(self.dataset_dir)["partitions"]}
+        for key, sink in self._sinks.items():
+            entry = self._commit(key, sink)
+            entries[entry["path"]] = entry
+        self._sinks = {}
+
+        save_manifest(self.dataset_dir, {
+            "dataset": self.dataset_dir.name,
+            "columns": self.fieldnames,
+            "sep": self.sep,
+            "partition_by": ["season", "competition"],
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": sum(p["rows"] for p in entries.values()),
+            "partitions": sorted(entries.values(), key=lambda p: p["path"]),
+        })
+
+    def abort(self) -> None:
+        for sink in self._sinks.values():
+            sink.close()
+            sink.path.unlink(missing_ok=True)
+        self._sinks = {}
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_dataset(
+    name: str,
+    rows: Iterable,
+    fieldnames: Sequence[str],
+    partition_of: Callable[[Dict], Partition],
+    root: Path = PARTITIONS_DIR,
+    constants: Optional[Dict] = None,
+    sep: str = ",",
+) -> PartitionedSink:
+    with PartitionedSink(root / name, fieldnames, partition_of, sep=sep, constants=constants) as sink:
+        for row in rows:
+            sink.write(row)
+    print(f"✅ Partitions {name} : {len(sink.written)} réécrites, {len(sink.unchanged)} inchangées ({sink.count} lignes)")
+    return sink
+
+
+# =========================
+# Reconstruction depuis les CSV plats
+# =========================
+def rebuild(data_dir: Path = DATA_DIR, root: Path = PARTITIONS_DIR, seasons_dir: Path = SEASONS_DIR) -> None:
+    """
+    Partitionne les exports existants (saison en cours dans DATA_DIR, saisons
+    passées de backfill.py, table de faits joueurs). Extracteurs importés ici
+    seulement (bs4 / requests) : la lecture des manifestes reste légère.
+    """
+    import extract_classement
+    import extract_results
+    from fastpath import read_csv_rows
+
+    season_dirs = [data_dir] + (sorted(p for p in seasons_dir.iterdir() if p.is_dir()) if seasons_dir.exists() else [])
+    current = season_label(date.today())
+
+    def read(path: Path) -> List[Dict]:
+        return read_csv_rows(path, typed=False) if path.exists() else []
+
+    matches = []
+    for d in season_dirs:
+        for row in read(d / extract_results.OUTPUT_FILENAME):
+            row["date_iso"] = extract_results.to_date_iso(row.get("date") or "")
+            matches.append(row)
+    write_dataset("results", matches, extract_results.RESULT_COLUMNS, match_partition, root)
+
+    for name, filename, columns, competition in (
+        ("classement_top14", extract_classement.TOP14_FILENAME, extract_classement.TOP14_COLUMNS, "Top 14"),
+        ("classement_cup", extract_classement.CHAMPIONS_CUP_FILENAME, extract_classement.CC_COLUMNS, "Champions Cup"),
+    ):
+        rows = []
+        for d in season_dirs:
+            for row in read(d / filename):
+                row["season"] = current if d == data_dir else d.name  # hors `columns` : non exporté
+                rows.append(row)
+        write_dataset(name, rows, columns, lambda row, _c=competition: (row["season"], competition_code(_c)), root)
+
+    import player_history  # pandas
+
+    fact = read(data_dir / player_history.FACT_FILENAME)
+    if fact:
+        write_dataset("fact_player_match", fact, player_history.FACT_COLUMNS, column_partition, root,
+                      sep=player_history.CSV_SEP)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Datasets partitionnés par saison et compétition")
+    parser.add_argument("cmd", nargs="?", default="list", choices=["list", "rebuild"])
+    parser.add_argument("--since", help="partitions modifiées depuis (AAAA-MM-JJ[THH:MM])")
+    args = parser.parse_args()
+
+    if args.cmd == "rebuild":
+        rebuild(DATA_DIR, PARTITIONS_DIR)
+        return
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+    datasets = sorted(p for p in PARTITIONS_DIR.iterdir() if (p / MANIFEST_FILENAME).exists()) if PARTITIONS_DIR.exists() else []
+    if not datasets:
+        print(f"❌ Aucun dataset partitionné dans {PARTITIONS_DIR}")
+        return
+    for d in datasets:
+        manifest = load_manifest(d)
+        parts = modified_since(manifest, since) if since else manifest["partitions"]
+        print(f"📌 {manifest['dataset']} : {len(parts)}/{len(manifest['partitions'])} partitions, {manifest['rows']} lignes (maj {manifest['updated_at']})")
+        for p in parts:
+            print(f"  {p['path']}  {p['rows']} lignes  {p['modified_at']}  {p['sha256'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
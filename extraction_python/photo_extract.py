@@ -1,32 +1,39 @@
 import os
 import re
-import time
+from typing import Iterator
 from urllib.parse import urljoin
 
-import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 
+from extract_spec import Field, Spec, extract
+from sinks import CsvSink
+from throttle import AdaptiveThrottle
+
 # -----------------------
 # CONFIG
 # -----------------------
 HEADERS = {"User-Agent": "UBB-Scraper/1.0 (+student project)"}
 TIMEOUT = 20
-SLEEP_SECONDS = 0.8
+SLEEP_SECONDS = 0.8  # délai initial, ajusté ensuite par le throttle
 
 URL_EFFECTIF = "https://www.ubbrugby.com/equipes/equipe-premiere/effectif.html"
 
 OUTPUT_DIR = r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data"
 OUTPUT_CSV = os.path.join(OUTPUT_DIR, "ubb_players_id_name_image.csv")
+COLUMNS = ["player_id", "firstname", "lastname", "full_name", "image_url", "player_url", "error"]
 
 PLAYER_URL_RE = re.compile(r"/effectif/(j\d+)-", re.IGNORECASE)  # ex: /effectif/j286-benjamin-tameifuna.html
+PHOTO_ALT_RE = re.compile(r"^\s*Photo de", re.IGNORECASE)
+
+THROTTLE = AdaptiveThrottle(initial_delay=SLEEP_SECONDS)
 
 
 # -----------------------
 # HELPERS
 # -----------------------
 def fetch_soup(url: str) -> BeautifulSoup:
-    r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+    r = THROTTLE.fetch(requests, url, timeout=TIMEOUT, headers=HEADERS)
     r.raise_for_status()
     return BeautifulSoup(r.text, "html.parser")
 
@@ -53,26 +60,23 @@ def collect_player_urls(effectif_url: str) -> list[str]:
     return sorted(urls)
 
 
-def extract_first_last_name(soup: BeautifulSoup) -> tuple[str | None, str | None, str | None]:
+def extract_first_last_name(data: dict) -> tuple[str | None, str | None, str | None]:
     """
     Renvoie (full_name, firstname, lastname)
     Essaie d'abord des spans dédiés, sinon fallback sur h1.
     """
     # Cas le plus propre si le site a des spans dédiés
-    fn = soup.select_one(".player-detail-firstname")
-    ln = soup.select_one(".player-detail-lastname")
-    if fn and ln:
-        firstname = fn.get_text(strip=True)
-        lastname = ln.get_text(strip=True)
+    if data["firstname"] is not None and data["lastname"] is not None:
+        firstname = data["firstname"]
+        lastname = data["lastname"]
         full = f"{firstname} {lastname}".strip()
         return full, firstname, lastname
 
     # Fallback sur h1
-    h1 = soup.find("h1")
-    if not h1:
+    if data["h1"] is None:
         return None, None, None
 
-    full = h1.get_text(" ", strip=True)
+    full = data["h1"]
     # Heuristique simple : dernier mot en MAJ = nom
     parts = full.split()
     if len(parts) >= 2 and parts[-1].isupper():
@@ -83,18 +87,13 @@ def extract_first_last_name(soup: BeautifulSoup) -> tuple[str | None, str | None
     return full, None, None
 
 
-def extract_profile_image_url(soup: BeautifulSoup) -> str | None:
+def extract_profile_image_url(img) -> str | None:
     """
-    On cherche l'image principale du joueur.
-    Stratégie robuste : prendre le premier <img> dont l'alt commence par 'Photo de'
-    et récupérer en priorité:
+    Image principale du joueur : le premier <img> dont l'alt commence par
+    'Photo de' (cf. PHOTO_SPEC). On récupère en priorité:
       - srcset (on prend la dernière URL => souvent la meilleure)
       - sinon src
     """
-    img = soup.find("img", attrs={"alt": re.compile(r"^\s*Photo de", re.IGNORECASE)})
-    if not img:
-        return None
-
     srcset = (img.get("srcset") or "").strip()
     if srcset:
         # srcset = "url1 1x, url2 2x" -> on prend la dernière url
@@ -106,12 +105,21 @@ def extract_profile_image_url(soup: BeautifulSoup) -> str | None:
     return src or None
 
 
+# Nom + photo en un parcours de la fiche (cf. extract_spec.py)
+PHOTO_SPEC = Spec("photo", (
+    Field("firstname", ".player-detail-firstname", lambda el: el.get_text(strip=True)),
+    Field("lastname", ".player-detail-lastname", lambda el: el.get_text(strip=True)),
+    Field("h1", "h1"),
+    Field("image_url", "img", extract_profile_image_url, when=lambda el: bool(PHOTO_ALT_RE.match(el.get("alt") or ""))),
+))
+
+
 def scrape_one_player(player_url: str) -> dict:
-    soup = fetch_soup(player_url)
+    data = extract(PHOTO_SPEC, fetch_soup(player_url))
 
     player_id = extract_player_id(player_url)
-    full_name, firstname, lastname = extract_first_last_name(soup)
-    image_url = extract_profile_image_url(soup)
+    full_name, firstname, lastname = extract_first_last_name(data)
+    image_url = data["image_url"]
 
     return {
         "player_id": player_id,
@@ -126,19 +134,14 @@ def scrape_one_player(player_url: str) -> dict:
 # -----------------------
 # MAIN
 # -----------------------
-def main():
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    player_urls = collect_player_urls(URL_EFFECTIF)
-    print(f"✅ {len(player_urls)} pages joueurs trouvées")
-
-    rows = []
+def scrape_players(player_urls: list[str]) -> Iterator[dict]:
+    """Générateur : une ligne par joueur, produite dès que la page est parsée."""
     for i, url in enumerate(player_urls, start=1):
         try:
             print(f"[{i}/{len(player_urls)}] {url}")
-            rows.append(scrape_one_player(url))
+            yield scrape_one_player(url)
         except Exception as e:
-            rows.append({
+            yield {
                 "player_id": extract_player_id(url),
                 "firstname": None,
                 "lastname": None,
@@ -146,13 +149,20 @@ def main():
                 "image_url": None,
                 "player_url": url,
                 "error": str(e),
-            })
-        time.sleep(SLEEP_SECONDS)
+            }
+
+
+def main():
+    player_urls = collect_player_urls(URL_EFFECTIF)
+    print(f"✅ {len(player_urls)} pages joueurs trouvées")
+
+    # URLs déjà triées : les lignes sortent dans l'ordre et sont écrites au fil de l'eau
+    with CsvSink(OUTPUT_CSV, COLUMNS, encoding="utf-8") as sink:
+        for row in scrape_players(player_urls):
+            sink.write(row)
 
-    df = pd.DataFrame(rows).sort_values(["player_id", "lastname", "firstname"], na_position="last")
-    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-    print(f"\n✅ CSV exporté : {OUTPUT_CSV}")
-    print(df.head(10).to_string(index=False))
+    print(f"\n✅ CSV exporté : {OUTPUT_CSV} ({sink.count} lignes)")
+    print(f"⏱️ Throttle : {THROTTLE.metrics()}")
 
 
 if __name__ == "__main__":
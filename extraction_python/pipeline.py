@@ -0,0 +1,108 @@
+"""
+Pipeline producteur / consommateur : réseau (threads) -> parsing (processus).
+
+    fetch (ThreadPoolExecutor)  --bytes-->  file bornée  -->  parse (ProcessPoolExecutor)
+                                                                    |
+    on_result(job, result, error)  <--  records compacts  <---------+
+
+Le parsing BeautifulSoup est du CPU sous GIL : on le sort des threads réseau
+vers un pool de processus pour utiliser tous les cœurs. La file du HTML brut
+est bornée (`queue_size`) et le nombre de parsings en cours aussi
+(`parse_inflight`) : si le parsing prend du retard, les workers réseau se
+bloquent au lieu d'empiler des pages en mémoire (back-pressure).
+
+`fetch` et `parse` doivent être des fonctions de module (picklables pour
+`parse`) ; `on_result` tourne dans le thread appelant et peut soumettre de
+nouveaux jobs (ex: fiches joueurs découvertes sur la page effectif).
+"""
+
+import os
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+# =========================
+# CONFIG
+# =========================
+IO_WORKERS = 16
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+QUEUE_SIZE = 32  # pages brutes en attente de parsing
+
+Job = Tuple[Hashable, ...]  # ex: ("player", "ubb-equipe-premiere", url) ; job[-1] = URL
+
+
+class FetchParsePipeline:
+    def __init__(
+        self,
+        fetch: Callable[[str], Tuple[bytes, Optional[str]]],
+        parse: Callable[[Job, bytes, Optional[str]], Any],
+        io_workers: int = IO_WORKERS,
+        parse_workers: int = PARSE_WORKERS,
+        queue_size: int = QUEUE_SIZE,
+    ):
+        self.fetch = fetch
+        self.parse = parse
+        self.io_workers = io_workers
+        self.parse_workers = parse_workers
+        self.parse_inflight = 2 * parse_workers
+
+        self._raw: "queue.Queue[Tuple[Job, bytes, Optional[str]]]" = queue.Queue(maxsize=queue_size)
+        self._events: "queue.Queue[tuple]" = queue.Queue()
+        self._io: Optional[ThreadPoolExecutor] = None
+        self._outstanding = 0
+        self._initial: list = []
+
+    # ---------- stage réseau ----------
+    def _fetch_worker(self, job: Job) -> None:
+        try:
+            body, encoding = self.fetch(job[-1])
+        except Exception as e:
+            self._events.put(("error", job, e))
+            return
+        self._raw.put((job, body, encoding))  # bloque si la file est pleine
+        self._events.put(("fetched",))
+
+    def submit(self, job: Job) -> None:
+        """Ajoute un job (depuis le thread appelant : avant run() ou dans on_result)."""
+        self._outstanding += 1
+        if self._io is None:
+            self._initial.append(job)
+        else:
+            self._io.submit(self._fetch_worker, job)
+
+    # ---------- boucle ----------
+    def run(self, on_result: Callable[[Job, Any, Optional[BaseException]], None]) -> None:
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io, \
+                ProcessPoolExecutor(max_workers=self.parse_workers) as cpu:
+            self._io = io
+            for job in self._initial:
+                io.submit(self._fetch_worker, job)
+            self._initial = []
+
+            inflight = 0
+            while self._outstanding:
+                event = self._events.get()
+
+                if event[0] == "parsed":
+                    _, job, fut = event
+                    inflight -= 1
+                    self._outstanding -= 1
+                    err = fut.exception()
+                    on_result(job, None if err else fut.result(), err)
+                elif event[0] == "error":
+                    _, job, err = event
+                    self._outstanding -= 1
+                    on_result(job, None, err)
+
+                # remplir les slots de parsing libres depuis la file bornée
+                while inflight < self.parse_inflight:
+                    try:
+                        job, body, encoding = self._raw.get_nowait()
+                    except queue.Empty:
+                        break
+                    fut: Future = cpu.submit(self.parse, job, body, encoding)
+                    fut.add_done_callback(lambda f, job=job: self._events.put(("parsed", job, f)))
+                    inflight += 1
+
+            self._io = None
@@ -0,0 +1,209 @@
+"""
+Historique des fiches joueurs + attribution des stats aux matchs.
+
+players.csv ne contient que des totaux de carrière (matches, tries, points,
+caps), écrasés à chaque run. Ici, chaque export est "snapshoté" :
+  - players_snapshot_runs.csv : une ligne par run (date du snapshot, nb de joueurs) ;
+  - players_snapshots.csv     : journal des compteurs, une ligne par joueur
+    seulement quand un compteur a changé (pas de copie complète par jour).
+
+Entre deux runs consécutifs, les écarts d'un joueur (matchs, essais, points)
+sont attribués aux matchs de results.csv joués dans l'intervalle :
+  - fact_player_match.csv : une ligne par (joueur, match candidat) avec la
+    probabilité d'avoir joué (delta matchs / nb de matchs candidats) et les
+    essais / points estimés (delta / nb de matchs candidats). `exact` = un
+    seul match candidat : l'attribution est alors certaine.
+
+Un match du jour J est rattaché au premier run à partir de J+1 (le site met
+les fiches à jour après le match). Le calcul est vectorisé (pandas / NumPy).
+
+    python player_history.py            # snapshot de players.csv + table de faits
+    python player_history.py --no-snapshot
+"""
+
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import partitions
+from aggregates import CSV_SEP, DATA_DIR, enrich_results, read_csv_auto
+
+
+# =========================
+# CONFIG
+# =========================
+PLAYERS_FILENAME = "players.csv"
+RESULTS_FILENAME = "results.csv"
+RUNS_FILENAME = "players_snapshot_runs.csv"
+SNAPSHOTS_FILENAME = "players_snapshots.csv"
+FACT_FILENAME = "fact_player_match.csv"
+
+OUTPUT_DIR = DATA_DIR
+
+COUNTERS = ["matches", "tries", "points", "caps"]
+ATTRIBUTED = ["matches", "tries", "points"]  # caps = sélections nationales : hors matchs du club
+MATCH_SETTLED = pd.Timedelta(days=1)  # match du jour J visible sur les fiches à partir de J+1
+
+FACT_COLUMNS = [
+    "player_id", "match_id", "date", "season", "competition", "opponent", "ubb_is_home",
+    "snapshot_at", "candidates", "played", "tries", "points", "exact",
+]
+
+
+# =========================
+# Snapshots
+# =========================
+def read_log(path: Path, columns) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame(columns=columns)
+    df = pd.read_csv(path, sep=CSV_SEP, encoding="utf-8-sig")
+    df["snapshot_at"] = pd.to_datetime(df["snapshot_at"])
+    return df
+
+
+def load_snapshots(data_dir: Path = OUTPUT_DIR):
+    runs = read_log(data_dir / RUNS_FILENAME, ["snapshot_at", "players"])
+    snapshots = read_log(data_dir / SNAPSHOTS_FILENAME, ["snapshot_at", "player_id"] + COUNTERS)
+    for col in COUNTERS:
+        snapshots[col] = pd.to_numeric(snapshots[col], errors="coerce").astype("Int64")
+    return runs, snapshots
+
+
+def changed_rows(players: pd.DataFrame, snapshots: pd.DataFrame, taken_at: pd.Timestamp) -> pd.DataFrame:
+    """Joueurs nouveaux ou dont au moins un compteur a changé depuis leur dernière ligne du journal."""
+    ok = players["player_id"].notna()
+    if "error" in players.columns:
+        ok &= players["error"].isna()  # fiche en erreur : compteurs vides, pas un changement
+    current = players.loc[ok, ["player_id"] + COUNTERS].copy()
+    for col in COUNTERS:
+        current[col] = pd.to_numeric(current[col], errors="coerce").astype("Int64")
+    current = current.drop_duplicates("player_id", keep="last")
+
+    last = snapshots.sort_values("snapshot_at", kind="stable").drop_duplicates("player_id", keep="last")
+    merged = current.merge(last[["player_id"] + COUNTERS], on="player_id", how="left", suffixes=("", "_last"))
+
+    new = ~merged["player_id"].isin(last["player_id"]).to_numpy()
+    diff = np.zeros(len(merged), dtype=bool)
+    for col in COUNTERS:
+        a, b = merged[col], merged[f"{col}_last"]
+        diff |= ((a != b) & a.notna() & b.notna()).fillna(False).to_numpy(dtype=bool)
+        diff |= (a.isna() != b.isna()).to_numpy()
+
+    out = merged.loc[new | diff, ["player_id"] + COUNTERS]
+    out.insert(0, "snapshot_at", taken_at)
+    return out
+
+
+def append_log(path: Path, df: pd.DataFrame) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(
+        path, mode="a", header=not path.exists(), index=False,
+        sep=CSV_SEP, encoding="utf-8-sig", date_format="%Y-%m-%dT%H:%M:%S",
+    )
+
+
+def record_snapshot(data_dir: Path = DATA_DIR, out_dir: Path = OUTPUT_DIR, taken_at: Optional[pd.Timestamp] = None) -> int:
+    """Ajoute le run courant de players.csv aux journaux ; renvoie le nombre de lignes écrites."""
+    taken_at = (taken_at or pd.Timestamp.now()).floor("s")
+    players = read_csv_auto(data_dir / PLAYERS_FILENAME)
+    runs, snapshots = load_snapshots(out_dir)
+    if len(runs) and taken_at <= runs["snapshot_at"].max():
+        raise ValueError(f"snapshot {taken_at} antérieur au dernier run ({runs['snapshot_at'].max()})")
+
+    rows = changed_rows(players, snapshots, taken_at)
+    # le run d'abord : un journal sans run correspondant fausserait les intervalles
+    append_log(out_dir / RUNS_FILENAME, pd.DataFrame({"snapshot_at": [taken_at], "players": [len(players)]}))
+    if len(rows):
+        append_log(out_dir / SNAPSHOTS_FILENAME, rows)
+    print(f"✅ Snapshot {taken_at:%Y-%m-%d %H:%M} : {len(rows)} joueurs modifiés / {len(players)}")
+    return len(rows)
+
+
+# =========================
+# Attribution
+# =========================
+def player_deltas(snapshots: pd.DataFrame) -> pd.DataFrame:
+    """Écarts entre deux lignes consécutives d'un joueur (la première ligne n'a pas de référence)."""
+    s = snapshots.sort_values(["player_id", "snapshot_at"], kind="stable").reset_index(drop=True)
+    deltas = s.groupby("player_id", sort=False)[ATTRIBUTED].diff()
+    out = s[["player_id", "snapshot_at"]].join(deltas.add_prefix("d_"))
+    out = out[out["d_matches"].notna()]
+    # corrections du site (compteur qui baisse) : rien à attribuer
+    keep = (out[[f"d_{c}" for c in ATTRIBUTED]].fillna(0) >= 0).all(axis=1) & (out["d_matches"] > 0)
+    return out[keep].reset_index(drop=True)
+
+
+def settle_matches(results: pd.DataFrame, runs: pd.DataFrame) -> pd.DataFrame:
+    """Chaque match -> premier run qui l'a vu (snapshot_at), NaT si aucun run après."""
+    matches = enrich_results(results)
+    matches = matches[matches["date"].notna()].copy()
+    run_times = np.sort(runs["snapshot_at"].to_numpy(dtype="datetime64[ns]"))
+    settled = (matches["date"] + MATCH_SETTLED).to_numpy(dtype="datetime64[ns]")
+    idx = np.searchsorted(run_times, settled, side="left")
+    # un match antérieur au premier run n'a pas d'intervalle de référence
+    ok = (idx > 0) & (idx < len(run_times))
+    matches["snapshot_at"] = pd.NaT
+    matches.loc[ok, "snapshot_at"] = run_times[idx[ok]]
+    matches["snapshot_at"] = pd.to_datetime(matches["snapshot_at"])
+    return matches[matches["snapshot_at"].notna()]
+
+
+def attribute(deltas: pd.DataFrame, matches: pd.DataFrame) -> pd.DataFrame:
+    """(joueur, intervalle) x matchs de l'intervalle -> table de faits joueur x match."""
+    cols = ["match_id", "date", "season", "competition", "opponent", "ubb_is_home", "snapshot_at"]
+    fact = deltas.merge(matches[cols], on="snapshot_at", how="inner")
+    if fact.empty:
+        return pd.DataFrame(columns=FACT_COLUMNS)
+
+    n = fact.groupby(["player_id", "snapshot_at"])["match_id"].transform("size").to_numpy(dtype=float)
+    d_matches = fact["d_matches"].astype(float).to_numpy()
+    fact["candidates"] = n.astype(int)
+    fact["played"] = np.round(np.minimum(d_matches / n, 1.0), 3)
+    fact["tries"] = np.round(fact["d_tries"].astype(float).fillna(0).to_numpy() / n, 3)
+    fact["points"] = np.round(fact["d_points"].astype(float).fillna(0).to_numpy() / n, 3)
+    fact["exact"] = n == 1
+    return fact[FACT_COLUMNS].sort_values(["date", "player_id"], kind="stable").reset_index(drop=True)
+
+
+def build_fact(data_dir: Path = DATA_DIR, out_dir: Path = OUTPUT_DIR) -> pd.DataFrame:
+    runs, snapshots = load_snapshots(out_dir)
+    deltas = player_deltas(snapshots)
+    matches = settle_matches(read_csv_auto(data_dir / RESULTS_FILENAME), runs)
+    fact = attribute(deltas, matches)
+
+    unmatched = len(set(zip(deltas["player_id"], deltas["snapshot_at"])) - set(zip(fact["player_id"], fact["snapshot_at"])))
+    if unmatched:
+        print(f"📌 {unmatched} écarts sans match candidat dans results.csv (non attribués)")
+    return fact
+
+
+def write_fact(fact: pd.DataFrame, out_dir: Path = OUTPUT_DIR) -> Path:
+    path = out_dir / FACT_FILENAME
+    fact.to_csv(path, index=False, sep=CSV_SEP, encoding="utf-8-sig", date_format="%Y-%m-%d")
+    print(f"✅ {path} ({len(fact)} lignes)")
+    if len(fact):
+        # même rendu que to_csv : dates AAAA-MM-JJ, NaN -> vide
+        out = fact.assign(**{c: fact[c].dt.strftime("%Y-%m-%d") for c in ("date", "snapshot_at")})
+        rows = out.astype(object).where(out.notna(), None).to_dict("records")
+        partitions.write_dataset("fact_player_match", rows, FACT_COLUMNS, partitions.column_partition, sep=CSV_SEP)
+    return path
+
+
+def update(data_dir: Path = DATA_DIR, out_dir: Path = OUTPUT_DIR, snapshot: bool = True) -> Path:
+    if snapshot:
+        record_snapshot(data_dir, out_dir)
+    return write_fact(build_fact(data_dir, out_dir), out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historique des fiches joueurs et stats par match")
+    parser.add_argument("--no-snapshot", action="store_true", help="recalcule la table de faits sans nouveau snapshot")
+    args = parser.parse_args()
+    update(DATA_DIR, OUTPUT_DIR, snapshot=not args.no_snapshot)
+
+
+if __name__ == "__main__":
+    main()
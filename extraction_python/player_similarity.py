@@ -0,0 +1,198 @@
+"""
+Comparaison des joueurs de l'effectif : similarité et percentiles par poste.
+
+players.csv est une table plate ; ici chaque joueur devient un vecteur de
+caractéristiques (NumPy) :
+  - gabarit : height_cm, weight_kg, age ;
+  - volume : caps, matches, tries, points (log1p : quelques buteurs écrasent l'échelle) ;
+  - rendement : tries_per_80, points_per_80 (aggregates.player_rates) ;
+  - poste : one-hot pondéré (POSITION_WEIGHT), pour rapprocher les joueurs d'un même poste.
+Colonnes centrées-réduites (valeur manquante = moyenne), lignes normalisées
+(L2) : la similarité cosinus de tous les couples est un produit matriciel,
+calculé par blocs de BATCH joueurs (mémoire bornée) avec un top-k par
+argpartition. Quelques milliers de joueurs (backfill multi-saisons) : < 1 s.
+
+  - player_similar.csv     : pour chaque joueur, les TOP_K joueurs les plus proches (rang, similarité)
+  - player_percentiles.csv : percentile de chaque stat parmi les joueurs du même poste (0-100)
+
+    python player_similarity.py                 # tables
+    python player_similarity.py like j50 j286   # joueurs les plus proches de j50, j286
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import CSV_SEP, DATA_DIR, player_rates, read_csv_auto
+
+
+# =========================
+# CONFIG
+# =========================
+PLAYERS_FILENAME = "players.csv"
+SEASONS_DIR = DATA_DIR / "seasons"  # effectifs des saisons passées (backfill.py)
+SIMILAR_FILENAME = "player_similar.csv"
+PERCENTILES_FILENAME = "player_percentiles.csv"
+
+OUTPUT_DIR = DATA_DIR
+
+SIZE = ["height_cm", "weight_kg", "age"]
+COUNTS = ["caps", "matches", "tries", "points"]
+RATES = ["tries_per_80", "points_per_80"]
+POSITION_WEIGHT = 1.5
+
+TOP_K = 10
+BATCH = 1024
+
+
+# =========================
+# Joueurs
+# =========================
+def load_players(data_dir: Path = DATA_DIR, seasons_dir: Path = SEASONS_DIR) -> pd.DataFrame:
+    """players.csv + effectifs des saisons passées ; un joueur = une ligne (la plus récente)."""
+    frames = [read_csv_auto(data_dir / PLAYERS_FILENAME)]
+    if seasons_dir.exists():
+        for path in sorted(seasons_dir.glob(f"*/{PLAYERS_FILENAME}"), reverse=True):
+            frames.append(read_csv_auto(path))
+    df = pd.concat(frames, ignore_index=True)
+
+    ok = df["player_id"].notna()
+    if "error" in df.columns:
+        ok &= df["error"].isna()
+    df = df[ok].drop_duplicates("player_id", keep="first").reset_index(drop=True)
+
+    rates = player_rates(df)
+    for col in RATES:
+        df[col] = rates[col].to_numpy()
+    for col in SIZE + COUNTS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["position"] = df["position"].fillna("Inconnu")
+    return df
+
+
+def feature_matrix(players: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """Matrice n x d (float32), lignes de norme 1, + noms des colonnes."""
+    numeric = players[SIZE + COUNTS + RATES].astype(float).to_numpy()
+    numeric[:, len(SIZE):len(SIZE) + len(COUNTS)] = np.log1p(numeric[:, len(SIZE):len(SIZE) + len(COUNTS)])
+
+    mean = np.nanmean(numeric, axis=0)
+    std = np.nanstd(numeric, axis=0)
+    std[~(std > 0)] = 1.0
+    z = (numeric - mean) / std
+    z[np.isnan(z)] = 0.0  # valeur manquante = joueur moyen sur cette colonne
+
+    positions = pd.get_dummies(players["position"], dtype=float)
+    X = np.hstack([z, positions.to_numpy() * POSITION_WEIGHT]).astype(np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    X /= np.where(norms > 0, norms, 1.0)
+    columns = SIZE + COUNTS + RATES + [f"position={p}" for p in positions.columns]
+    return X, columns
+
+
+# =========================
+# Similarité
+# =========================
+def top_k(X: np.ndarray, queries: np.ndarray, k: int = TOP_K, batch: int = BATCH) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices des lignes `queries` de X -> (voisins n x k, similarités n x k),
+    par blocs de `batch` requêtes ; un joueur n'est pas son propre voisin.
+    """
+    k = min(k, len(X) - 1)
+    idx = np.empty((len(queries), max(k, 0)), dtype=np.int64)
+    sim = np.empty((len(queries), max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return idx, sim
+    for start in range(0, len(queries), batch):
+        q = queries[start:start + batch]
+        s = X[q] @ X.T
+        s[np.arange(len(q)), q] = -np.inf
+        part = np.argpartition(-s, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(s, part, axis=1), axis=1, kind="stable")
+        best = np.take_along_axis(part, order, axis=1)
+        idx[start:start + len(q)] = best
+        sim[start:start + len(q)] = np.take_along_axis(s, best, axis=1)
+    return idx, sim
+
+
+def similar_table(players: pd.DataFrame, idx: np.ndarray, sim: np.ndarray, queries: Optional[np.ndarray] = None) -> pd.DataFrame:
+    queries = np.arange(len(players)) if queries is None else queries
+    n, k = idx.shape
+    src = np.repeat(queries, k)
+    dst = idx.ravel()
+    return pd.DataFrame({
+        "player_id": players["player_id"].to_numpy()[src],
+        "name": players["name"].to_numpy()[src],
+        "position": players["position"].to_numpy()[src],
+        "rank": np.tile(np.arange(1, k + 1), n),
+        "similar_id": players["player_id"].to_numpy()[dst],
+        "similar_name": players["name"].to_numpy()[dst],
+        "similar_position": players["position"].to_numpy()[dst],
+        "similarity": np.round(sim.ravel().astype(float), 4),
+    })
+
+
+def most_like(players: pd.DataFrame, X: np.ndarray, player_ids: Sequence[str], k: int = TOP_K) -> pd.DataFrame:
+    """Requête "joueurs les plus proches de ..." (plusieurs joueurs en un produit matriciel)."""
+    pos = pd.Index(players["player_id"]).get_indexer(list(player_ids))
+    missing = [pid for pid, p in zip(player_ids, pos) if p < 0]
+    if missing:
+        raise KeyError(f"joueur(s) inconnu(s) : {', '.join(missing)}")
+    idx, sim = top_k(X, pos, k)
+    return similar_table(players, idx, sim, pos)
+
+
+# =========================
+# Percentiles par poste
+# =========================
+def position_percentiles(players: pd.DataFrame) -> pd.DataFrame:
+    """Percentile (0-100) de chaque stat parmi les joueurs du même poste ; vide si stat absente."""
+    cols = SIZE + COUNTS + RATES
+    pct = players.groupby("position")[cols].rank(pct=True, method="average") * 100
+    out = players[["player_id", "name", "position"]].copy()
+    out["position_players"] = players.groupby("position")["player_id"].transform("size").to_numpy()
+    for col in cols:
+        out[f"{col}_pct"] = pct[col].round(1)
+    return out.sort_values(["position", "player_id"], kind="stable").reset_index(drop=True)
+
+
+# =========================
+# MAIN
+# =========================
+def build_tables(data_dir: Path = DATA_DIR, k: int = TOP_K):
+    players = load_players(data_dir)
+    X, _ = feature_matrix(players)
+    idx, sim = top_k(X, np.arange(len(players)), k)
+    return {
+        SIMILAR_FILENAME: similar_table(players, idx, sim),
+        PERCENTILES_FILENAME: position_percentiles(players),
+    }
+
+
+def write_tables(tables, out_dir: Path = OUTPUT_DIR) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for filename, df in tables.items():
+        path = out_dir / filename
+        df.to_csv(path, index=False, sep=CSV_SEP, encoding="utf-8-sig")
+        print(f"✅ {path} ({len(df)} lignes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similarité et percentiles par poste des joueurs")
+    parser.add_argument("cmd", nargs="?", default="tables", choices=["tables", "like"])
+    parser.add_argument("player_ids", nargs="*")
+    parser.add_argument("-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    if args.cmd == "like":
+        players = load_players(DATA_DIR)
+        X, _ = feature_matrix(players)
+        print(most_like(players, X, args.player_ids, args.k).to_string(index=False))
+        return
+    write_tables(build_tables(DATA_DIR, args.k), OUTPUT_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Publication atomique et versionnée des datasets (CSV lus par Power BI).
+
+Les scripts écrivent dans DATA_DIR (dossier de travail). Power BI ne lit plus
+ces fichiers directement mais DATA_DIR/current/, qui pointe vers une version
+complète et validée :
+
+    DATA_DIR/releases/20260118-213000/   classement_top14.csv, players.csv, ..., manifest.json
+    DATA_DIR/releases/20260119-080000/
+    DATA_DIR/current -> releases/20260119-080000
+    DATA_DIR/CURRENT                     (nom de la version courante, en texte)
+
+Un run = copie de tous les datasets dans un dossier de staging, validation
+(présence, colonnes, séparateur attendu par Power BI, nombre de lignes vs
+version précédente), renommage en version, puis bascule de `current` (symlink remplacé par os.replace :
+atomique). Les lecteurs voient toujours un jeu cohérent, sans verrou ni
+copie ; les anciennes versions restent disponibles pour un rollback immédiat.
+
+    python publish.py                       # publie le contenu de DATA_DIR
+    python publish.py list                  # versions disponibles
+    python publish.py rollback [version]    # revient à la version précédente (ou à `version`)
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from fastpath import detect_sep
+
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
+RELEASES_DIRNAME = "releases"
+CURRENT_LINK = "current"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILENAME = "manifest.json"
+
+KEEP_RELEASES = 10
+MAX_SHRINK = 0.5  # refus si un dataset perd plus de 50% de ses lignes d'une version à l'autre
+
+
+@dataclass(frozen=True, slots=True)
+class Dataset:
+    name: str                       # nom publié (celui lu par Power BI)
+    source: Optional[str] = None    # nom du fichier produit par le script, si différent
+    columns: Optional[Sequence[str]] = None  # None = mêmes colonnes que la version précédente
+    required: bool = True
+    min_rows: int = 1
+    sep: Optional[str] = None       # séparateur de la requête Power BI (Delimiter=) ; None = non vérifié
+
+
+def default_datasets() -> List[Dataset]:
+    """
+    Datasets d'un run. Les colonnes attendues viennent des extracteurs,
+    importés ici seulement (bs4 / requests) : `list` / `rollback` restent légers.
+    """
+    import extract_classement
+    import extract_players
+    import extract_results
+
+    return [
+        Dataset("players.csv", extract_players.OUTPUT_FILENAME, extract_players.PLAYER_COLUMNS, sep=","),
+        Dataset("results.csv", extract_results.OUTPUT_FILENAME, extract_results.RESULT_COLUMNS),
+        Dataset("classement_top14.csv", extract_classement.TOP14_FILENAME, extract_classement.TOP14_COLUMNS,
+                sep=extract_classement.CSV_SEP),
+        Dataset("classement_cup.csv", extract_classement.CHAMPIONS_CUP_FILENAME, extract_classement.CC_COLUMNS,
+                sep=extract_classement.CSV_SEP),
+        # référentiels (mis à jour à la main)
+        Dataset("teams_top14.csv", sep=";"),
+        Dataset("teams_cup.csv", sep=";"),
+        Dataset("nationality_images.csv", required=False),
+        Dataset("PlayersPhotosURL.csv", required=False),
+        # tables pré-calculées (aggregates.py, standings.py, player_history.py, player_similarity.py)
+        Dataset("agg_results.csv", required=False),
+        Dataset("agg_team_trend.csv", required=False),
+        Dataset("agg_team_form.csv", required=False),
+        Dataset("agg_home_away.csv", required=False),
+        Dataset("agg_player_rates.csv", required=False),
+        Dataset("fact_player_match.csv", required=False),
+        Dataset("player_similar.csv", required=False),
+        Dataset("player_percentiles.csv", required=False),
+        Dataset("standings_recomputed_top14.csv", required=False),
+        Dataset("standings_check_top14.csv", required=False),
+        Dataset("standings_projection_top14.csv", required=False),
+    ]
+
+
+class PublishError(RuntimeError):
+    """Le run ne passe pas la validation : `current` n'est pas modifié."""
+
+
+# =========================
+# HELPERS
+# =========================
+def read_header_and_count(path: Path):
+    """Colonnes + nombre de lignes de données + séparateur détecté (',' ou ';')."""
+    with open(path, newline="", encoding="utf-8-sig") as fp:
+        sep = detect_sep(fp.readline())
+        fp.seek(0)
+        reader = csv.reader(fp, delimiter=sep)
+        header = next(reader, [])
+        rows = sum(1 for _ in reader)
+    return header, rows, sep
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def releases_dir(data_dir: Path) -> Path:
+    return data_dir / RELEASES_DIRNAME
+
+
+def list_releases(data_dir: Path = DATA_DIR) -> List[str]:
+    """Versions publiées, de la plus ancienne à la plus récente (noms horodatés)."""
+    root = releases_dir(data_dir)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def current_release(data_dir: Path = DATA_DIR) -> Optional[str]:
+    pointer = data_dir / CURRENT_FILE
+    if pointer.exists():
+        return pointer.read_text(encoding="utf-8").strip() or None
+    return None
+
+
+def load_manifest(data_dir: Path, release: Optional[str]) -> Dict:
+    if not release:
+        return {}
+    path = releases_dir(data_dir) / release / MANIFEST_FILENAME
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def _remove_link(link: Path) -> None:
+    if link.is_symlink():
+        link.unlink()
+    elif link.exists():
+        os.rmdir(link)  # jonction Windows (supprime le lien, pas la cible)
+
+
+def _make_link(link: Path, target: Path) -> None:
+    try:
+        # relatif : le dossier data peut être déplacé / synchronisé (OneDrive)
+        os.symlink(os.path.relpath(target, link.parent), link, target_is_directory=True)
+    except OSError:
+        # Windows sans droit de créer des symlinks : jonction
+        import _winapi
+        _winapi.CreateJunction(str(target.resolve()), str(link))
+
+
+def swap_current(data_dir: Path, release: str) -> None:
+    """Fait pointer `current` sur `release` (remplacement atomique du lien)."""
+    target = releases_dir(data_dir) / release
+    link = data_dir / CURRENT_LINK
+    tmp = data_dir / f".{CURRENT_LINK}.tmp"
+    _remove_link(tmp)
+    _make_link(tmp, target)
+    try:
+        os.replace(tmp, link)
+    except OSError:
+        # Windows : un dossier / une jonction ne se remplace pas par rename ; deux renames
+        old = data_dir / f".{CURRENT_LINK}.old"
+        _remove_link(old)
+        if link.exists() or link.is_symlink():
+            os.replace(link, old)
+        os.replace(tmp, link)
+        _remove_link(old)
+
+    pointer_tmp = data_dir / f".{CURRENT_FILE}.tmp"
+    pointer_tmp.write_text(release, encoding="utf-8")
+    os.replace(pointer_tmp, data_dir / CURRENT_FILE)
+
+
+# =========================
+# Publication
+# =========================
+def validate(ds: Dataset, path: Path, previous: Dict) -> Dict:
+    header, rows, sep = read_header_and_count(path)
+    if ds.sep is not None and sep != ds.sep:
+        raise PublishError(f"{ds.name} : séparateur {sep!r} au lieu de {ds.sep!r} (lu par la requête Power BI)")
+    expected = list(ds.columns) if ds.columns is not None else previous.get("columns")
+    if expected is not None and header != list(expected):
+        raise PublishError(f"{ds.name} : colonnes {header} au lieu de {list(expected)}")
+    if rows < ds.min_rows:
+        raise PublishError(f"{ds.name} : {rows} ligne(s) (minimum {ds.min_rows})")
+    prev_rows = previous.get("rows")
+    if prev_rows and rows < prev_rows * (1 - MAX_SHRINK):
+        raise PublishError(f"{ds.name} : {rows} lignes contre {prev_rows} dans la version précédente")
+    return {"columns": header, "rows": rows, "sep": sep, "sha256": file_sha256(path)}
+
+
+def publish(data_dir: Path = DATA_DIR, datasets: Optional[Sequence[Dataset]] = None) -> str:
+    """Staging -> validation -> version -> bascule de `current`. Renvoie le nom de la version."""
+    datasets = default_datasets() if datasets is None else datasets
+    release = time.strftime("%Y%m%d-%H%M%S")
+    root = releases_dir(data_dir)
+    staging = root / f".staging-{release}"
+    staging.mkdir(parents=True, exist_ok=False)
+
+    previous = load_manifest(data_dir, current_release(data_dir)).get("datasets", {})
+    manifest = {"release": release, "published_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "datasets": {}}
+    try:
+        for ds in datasets:
+            src = data_dir / (ds.source or ds.name)
+            if not src.exists():
+                if ds.required:
+                    raise PublishError(f"{ds.name} : fichier source absent ({src})")
+                continue
+            dst = staging / ds.name
+            shutil.copy2(src, dst)
+            manifest["datasets"][ds.name] = validate(ds, dst, previous.get(ds.name, {}))
+
+        with open(staging / MANIFEST_FILENAME, "w", encoding="utf-8") as fp:
+            json.dump(manifest, fp, ensure_ascii=False, indent=2)
+
+        os.replace(staging, root / release)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    swap_current(data_dir, release)
+    prune(data_dir)
+    return release
+
+
+def rollback(data_dir: Path = DATA_DIR, release: Optional[str] = None) -> str:
+    """Rebascule `current` sur `release` (par défaut : la version précédant la courante)."""
+    releases = list_releases(data_dir)
+    if release is None:
+        cur = current_release(data_dir)
+        older = [r for r in releases if cur is None or r < cur]
+        if not older:
+            raise PublishError("aucune version antérieure disponible")
+        release = older[-1]
+    elif release not in releases:
+        raise PublishError(f"version inconnue : {release}")
+    swap_current(data_dir, release)
+    return release
+
+
+def prune(data_dir: Path = DATA_DIR, keep: int = KEEP_RELEASES) -> None:
+    """Garde les `keep` dernières versions (et toujours la courante)."""
+    cur = current_release(data_dir)
+    for name in list_releases(data_dir)[:-keep]:
+        if name != cur:
+            shutil.rmtree(releases_dir(data_dir) / name, ignore_errors=True)
+
+
+def main():
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "publish"
+
+    if cmd == "list":
+        cur = current_release(DATA_DIR)
+        for name in list_releases(DATA_DIR):
+            datasets = load_manifest(DATA_DIR, name).get("datasets", {})
+            rows = ", ".join(f"{k}={v['rows']}" for k, v in datasets.items())
+            print(f"{'*' if name == cur else ' '} {name}  {rows}")
+    elif cmd == "rollback":
+        release = rollback(DATA_DIR, sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"✅ current -> {release}")
+    elif cmd == "publish":
+        try:
+            release = publish(DATA_DIR)
+        except PublishError as e:
+            print(f"❌ Publication annulée ({e}) ; current inchangé : {current_release(DATA_DIR)}")
+            sys.exit(1)
+        print(f"✅ Version publiée : {release} ({DATA_DIR / CURRENT_LINK})")
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
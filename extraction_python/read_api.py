@@ -0,0 +1,318 @@
+"""
+API locale en lecture seule (HTTP/JSON) sur les datasets publiés.
+
+Les outils internes n'ont plus à relire les CSV eux-mêmes (séparateurs et
+encodages différents selon le script) : le service charge en mémoire la
+version courante (DATA_DIR/current, cf. publish.py), construit des index
+(player_id, équipe, compétition, date) et répond en JSON paginé avec ETag.
+Une nouvelle version publiée est rechargée automatiquement.
+
+    python read_api.py                      # http://127.0.0.1:8766
+    GET /datasets
+    GET /players?player_id=j50
+    GET /results?team=bordeaux-begles&competition=Top 14&date_from=2025-09-01&limit=20&offset=0
+    GET /classement_top14?team=pau
+    GET /results?score_home=29              # autre colonne : filtre exact (parcours)
+    GET /changes?after=120&dataset=results  # flux de changements (cf. changelog.py), reprise par `next`
+    GET /search?q=begles&type=team          # recherche plein texte (cf. search_index.py)
+"""
+
+import bisect
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import changelog
+import publish
+import search_index
+from fastpath import read_csv_rows, team_key
+
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = publish.DATA_DIR
+HOST = "127.0.0.1"
+PORT = 8766
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+RELOAD_CHECK_SECONDS = 5
+
+TEAM_COLUMNS = ("team", "team_home", "team_away")
+INDEXED = ("player_id", "competition")  # + team_key et date (calculés)
+
+ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def int_param(params: Dict[str, str], name: str, default: int, low: int, high: Optional[int] = None) -> int:
+    """Paramètre entier >= low (ValueError -> 400 sinon), plafonné à `high`."""
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ValueError(f"{name} doit être un entier")
+    if value < low:
+        raise ValueError(f"{name} doit être >= {low}")
+    return value if high is None else min(value, high)
+
+
+# =========================
+# Chargement
+# =========================
+def row_date(row: Dict) -> Optional[str]:
+    value = row.get("date_iso") or row.get("date")
+    if not isinstance(value, str):
+        return None
+    if ISO_DATE_RE.match(value):
+        return value[:10]
+    from extract_results import to_date_iso  # bs4 / requests : seulement si une date FR est rencontrée
+    return to_date_iso(value)
+
+
+class Dataset:
+    """Lignes d'un CSV + index en mémoire."""
+
+    def __init__(self, name: str, rows: List[Dict], version: str):
+        self.name = name
+        self.rows = rows
+        self.version = version
+        self.index: Dict[str, Dict[object, List[int]]] = {c: {} for c in INDEXED + ("team_key",)}
+        dated: List[Tuple[str, int]] = []
+
+        for i, row in enumerate(rows):
+            for col in INDEXED:
+                if row.get(col) is not None:
+                    self.index[col].setdefault(str(row[col]).lower(), []).append(i)
+            for key in {team_key(row.get(c)) for c in TEAM_COLUMNS} - {""}:
+                self.index["team_key"].setdefault(key, []).append(i)
+            d = row_date(row)
+            if d:
+                dated.append((d, i))
+
+        dated.sort()
+        self.dates = [d for d, _ in dated]
+        self.date_rows = [i for _, i in dated]
+
+    def between(self, date_from: Optional[str], date_to: Optional[str]) -> Set[int]:
+        lo = bisect.bisect_left(self.dates, date_from) if date_from else 0
+        hi = bisect.bisect_right(self.dates, date_to) if date_to else len(self.dates)
+        return set(self.date_rows[lo:hi])
+
+    def query(self, params: Dict[str, str]) -> List[int]:
+        """Intersection des index, puis filtre exact sur les autres colonnes."""
+        candidates: Optional[Set[int]] = None
+
+        def narrow(ids) -> None:
+            nonlocal candidates
+            ids = set(ids)
+            candidates = ids if candidates is None else candidates & ids
+
+        scan = {}
+        for key, value in params.items():
+            if key in ("limit", "offset"):
+                continue
+            if key in INDEXED:
+                narrow(self.index[key].get(value.lower(), ()))
+            elif key == "team":
+                narrow(self.index["team_key"].get(team_key(value), ()))
+            elif key in ("date_from", "date_to"):
+                continue
+            else:
+                scan[key] = value
+
+        if "date_from" in params or "date_to" in params:
+            narrow(self.between(params.get("date_from"), params.get("date_to")))
+
+        ids = sorted(candidates) if candidates is not None else range(len(self.rows))
+        if scan:
+            ids = [i for i in ids if all(str(self.rows[i].get(k)) == v for k, v in scan.items())]
+        return list(ids)
+
+
+class Store:
+    """Datasets de la version courante ; rechargés quand `current` change."""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = data_dir
+        self.release: Optional[str] = None
+        self.datasets: Dict[str, Dataset] = {}
+        self._signature: Tuple = ()
+        self._lock = threading.Lock()
+        self.reload()
+
+    def source_dir(self) -> Path:
+        current = self.data_dir / publish.CURRENT_LINK
+        return current if current.exists() else self.data_dir
+
+    def signature(self) -> Tuple:
+        """Version courante + mtimes (sans publication, les CSV de travail peuvent changer)."""
+        release = publish.current_release(self.data_dir) or "working"
+        return (release,) + tuple((p.name, p.stat().st_mtime_ns) for p in sorted(self.source_dir().glob("*.csv")))
+
+    def reload(self) -> None:
+        signature = self.signature()
+        release, files = signature[0], signature[1:]
+        src = self.source_dir()
+        datasets = {}
+        for name, mtime in files:
+            path = src / name
+            version = hashlib.sha1(f"{release}:{mtime}".encode()).hexdigest()[:16]
+            datasets[path.stem] = Dataset(path.stem, read_csv_rows(path), version)
+        with self._lock:
+            self.datasets, self.release, self._signature = datasets, release, signature
+        print(f"✅ {len(datasets)} datasets chargés ({release}) depuis {src}")
+
+    def reload_if_changed(self) -> None:
+        if self.signature() != self._signature:
+            self.reload()
+
+    def get(self, name: str) -> Optional[Dataset]:
+        with self._lock:
+            return self.datasets.get(name)
+
+
+# =========================
+# HTTP
+# =========================
+def make_handler(store: Store):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, status: int, payload, etag: Optional[str] = None) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _changes(self, params: Dict[str, str]) -> None:
+            try:
+                after = int_param(params, "after", 0, 0)
+                limit = int_param(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+            except ValueError as e:
+                self._json(400, {"error": str(e)})
+                return
+            try:
+                feed = changelog.ChangeFeed(store.data_dir / changelog.CHANGELOG_DIR.name)
+            except sqlite3.OperationalError:
+                self._json(404, {"error": "pas de changelog (changelog.py capture)"})
+                return
+            with feed:
+                end = feed.last_seq()
+                datasets = params["dataset"].split(",") if params.get("dataset") else None
+                events = (e for e in feed.read(after, datasets) if e["seq"] <= end)
+                items = list(islice(events, limit))
+            self._json(200, {
+                "after": after,
+                "last_seq": end,
+                "next": items[-1]["seq"] if len(items) == limit else end,
+                "items": items,
+            })
+
+        def _search(self, params: Dict[str, str]) -> None:
+            try:
+                limit = int_param(params, "limit", search_index.DEFAULT_LIMIT, 1, MAX_LIMIT)
+            except ValueError as e:
+                self._json(400, {"error": str(e)})
+                return
+            path = store.data_dir / search_index.INDEX_FILENAME
+            if not path.exists():
+                self._json(404, {"error": "pas d'index (search_index.py build)"})
+                return
+            types = params["type"].split(",") if params.get("type") else None
+            hits = search_index.cached(path).search(params.get("q", ""), limit, types)
+            self._json(200, {
+                "q": params.get("q", ""),
+                "items": [{"type": h.type, "id": h.id, "label": h.label, "score": h.score} for h in hits],
+            })
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            name = parts.path.strip("/")
+
+            if name == "changes":
+                self._changes({k: v[-1] for k, v in parse_qs(parts.query).items()})
+                return
+
+            if name == "search":
+                self._search({k: v[-1] for k, v in parse_qs(parts.query).items()})
+                return
+
+            if name in ("", "datasets"):
+                self._json(200, {
+                    "release": store.release,
+                    "datasets": {n: len(d.rows) for n, d in store.datasets.items()},
+                })
+                return
+
+            ds = store.get(name)
+            if ds is None:
+                self._json(404, {"error": f"dataset inconnu : {name}"})
+                return
+
+            etag = f'W/"{ds.version}-{hashlib.sha1(parts.query.encode()).hexdigest()[:12]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            try:
+                limit = int_param(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+                offset = int_param(params, "offset", 0, 0)
+            except ValueError as e:
+                self._json(400, {"error": str(e)})
+                return
+
+            ids = ds.query(params)
+            self._json(200, {
+                "dataset": name,
+                "release": store.release,
+                "total": len(ids),
+                "offset": offset,
+                "limit": limit,
+                "items": [ds.rows[i] for i in ids[offset:offset + limit]],
+            }, etag)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def watch(store: Store, stop: threading.Event) -> None:
+    while not stop.wait(RELOAD_CHECK_SECONDS):
+        try:
+            store.reload_if_changed()
+        except Exception as e:
+            print(f"❌ rechargement : {e}")
+
+
+def main():
+    store = Store(DATA_DIR)
+    stop = threading.Event()
+    threading.Thread(target=watch, args=(store, stop), daemon=True).start()
+
+    server = ThreadingHTTPServer((HOST, PORT), make_handler(store))
+    print(f"✅ API : http://{HOST}:{PORT}/datasets")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Types de lignes des datasets (joueurs, matchs, classements).
+
+Dataclasses à __slots__ : pas de dict de 13-17 clés répété par ligne, et un
+contrôle de schéma à la construction (ex: `since_year` doit être un int, pas
+2012.0). Les valeurs identiques sur toutes les lignes d'un export
+(`source_url`...) ne sont pas stockées par ligne : elles sont passées au
+sink comme constantes du dataset.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Tuple, Union, get_args, get_type_hints
+
+
+class SchemaError(ValueError):
+    """Une valeur ne correspond pas au type déclaré de la colonne."""
+
+
+# =========================
+# Validation
+# =========================
+_SCHEMAS: Dict[type, Tuple[Tuple[str, tuple], ...]] = {}
+
+
+def _schema(cls: type) -> Tuple[Tuple[str, tuple], ...]:
+    """(colonne, types acceptés) calculé une seule fois par classe."""
+    schema = _SCHEMAS.get(cls)
+    if schema is None:
+        hints = get_type_hints(cls)
+        schema = tuple(
+            (f.name, tuple(t for t in (get_args(hints[f.name]) or (hints[f.name],)) if t is not type(None)))
+            for f in fields(cls)
+        )
+        _SCHEMAS[cls] = schema
+    return schema
+
+
+def validate(record) -> None:
+    for name, types in _schema(type(record)):
+        value = getattr(record, name)
+        if value is None:
+            continue
+        # bool est un int en Python : on le refuse explicitement
+        if isinstance(value, bool) or not isinstance(value, types):
+            raise SchemaError(
+                f"{type(record).__name__}.{name} = {value!r} "
+                f"({type(value).__name__}), attendu {'/'.join(t.__name__ for t in types)}"
+            )
+
+
+class _Record:
+    __slots__ = ()
+
+    def __post_init__(self):
+        validate(self)
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name, _ in _schema(type(self))}
+
+
+# =========================
+# Records
+# =========================
+@dataclass(slots=True)
+class PlayerRow(_Record):
+    player_id: Optional[str]
+    name: Optional[str] = None
+    position: Optional[str] = None
+    height_cm: Optional[int] = None
+    weight_kg: Optional[int] = None
+    age: Optional[int] = None
+    nationality: Optional[str] = None
+    since_year: Optional[int] = None
+    caps: Optional[int] = None
+    matches: Optional[int] = None
+    tries: Optional[int] = None
+    points: Optional[int] = None
+    url: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class MatchRow(_Record):
+    date: str
+    competition: Optional[str]
+    journee: Optional[str]
+    team_home: Optional[str]
+    team_away: Optional[str]
+    score_home: int
+    score_away: int
+    date_iso: Optional[str] = None  # clé de tri, non exportée
+
+
+@dataclass(slots=True)
+class StandingRow(_Record):
+    rank: int
+    team: str
+    pts: Optional[int]
+    mj: Optional[int]
+    bo: Optional[int]
+    bd: Optional[int]
+    v: Optional[int]
+    n: Optional[int]
+    d: Optional[int]
+    pts_for: Optional[int]
+    pts_against: Optional[int]
+    diff: Optional[int]
+    next_match: Optional[str] = None
+    next_venue: Optional[str] = None
+    pool: Optional[str] = None         # "Poule X" pour la Champions Cup
+    competition: Optional[str] = None  # "Top 14" / "Champions Cup"
+
+
+Record = Union[PlayerRow, MatchRow, StandingRow]
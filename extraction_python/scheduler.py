@@ -0,0 +1,284 @@
+"""
+Scheduler résident : rafraîchit les données au rythme des matchs de l'UBB.
+
+Au lieu de crons à heure fixe (inutiles en semaine, trop lents le jour du
+match), un seul processus reste chaud (session HTTP et pool de connexions
+partagés par tous les jobs) et choisit sa cadence à partir des prochains
+matchs (colonne next_match du classement, ex: "SP Sam. 24 Jan.") et des
+dates du calendrier-résultats (matchs des derniers jours : le classement
+passe au match suivant dès qu'un match est joué) :
+
+    classement / résultats : toutes les 10 min le jour du match (12h-23h),
+                             toutes les heures le jour du match et le lendemain,
+                             1 fois par jour sinon
+    fiches joueurs         : le lendemain d'un match (stats mises à jour), 1 fois par semaine sinon
+
+Après chaque job réussi : tables agrégées + publication (publish.py).
+L'heure du dernier passage de chaque job est gardée dans scheduler_state.json :
+un redémarrage ne relance pas tout.
+
+    python scheduler.py          # Ctrl+C pour arrêter
+"""
+
+import csv
+import heapq
+import json
+import re
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import requests
+
+import extract_classement
+import extract_players
+import extract_results
+from fastpath import detect_sep, strip_accents
+
+
+# =========================
+# CONFIG
+# =========================
+OUTPUT_DIR = Path(r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data")
+STATE_FILENAME = "scheduler_state.json"
+
+UBB_TOKEN = "Bordeaux"
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+RECENT_MATCH_DAYS = 3  # matchs passés gardés (cadence du lendemain, reprise après redémarrage)
+MATCH_WINDOW = (12, 23)  # heures de coup d'envoi / fin de match possibles (pas d'horaire sur la page)
+RETRY_AFTER_ERROR = 15 * MINUTE
+
+MONTHS_ABBR_FR = [  # préfixes, plus longs d'abord (juin / juil.)
+    ("juin", 6), ("juil", 7), ("jan", 1), ("fev", 2), ("mar", 3), ("avr", 4),
+    ("mai", 5), ("aou", 8), ("sep", 9), ("oct", 10), ("nov", 11), ("dec", 12),
+]
+NEXT_MATCH_DATE_RE = re.compile(r"(\d{1,2})\s+([^\s\d]+)")
+
+
+@dataclass(slots=True)
+class Job:
+    name: str
+    run: Callable[[requests.Session], None]
+    every: float                    # cadence de base
+    match_day: float                # jour du match et lendemain
+    live: Optional[float] = None    # pendant la fenêtre de match (None = match_day)
+    after_match_only: bool = False  # ex: joueurs : seulement le lendemain
+
+
+# =========================
+# Calendrier
+# =========================
+def parse_next_match_date(text: Optional[str], today: date) -> Optional[date]:
+    """'SP Sam. 24 Jan.' -> date (année absente : on prend la date la plus proche d'aujourd'hui)."""
+    if not text:
+        return None
+    m = NEXT_MATCH_DATE_RE.search(text)
+    if not m:
+        return None
+    day, month_txt = int(m.group(1)), strip_accents(m.group(2)).lower()
+    month = next((num for prefix, num in MONTHS_ABBR_FR if month_txt.startswith(prefix)), None)
+    if month is None:
+        return None
+    candidates = []
+    for year in (today.year - 1, today.year, today.year + 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:  # 29 février
+            continue
+    return min(candidates, key=lambda d: abs((d - today).days), default=None)
+
+
+def upcoming_match_days(today: date, out_dir: Path = OUTPUT_DIR) -> Set[date]:
+    """Prochains matchs de l'UBB lus dans les classements (Top 14 + Champions Cup)."""
+    days: Set[date] = set()
+    for filename in (extract_classement.TOP14_FILENAME, extract_classement.CHAMPIONS_CUP_FILENAME):
+        path = out_dir / filename
+        if not path.exists():
+            continue
+        with open(path, newline="", encoding="utf-8-sig") as fp:
+            sep = detect_sep(fp.readline())
+            fp.seek(0)
+            for row in csv.DictReader(fp, delimiter=sep):
+                if UBB_TOKEN in (row.get("team") or ""):
+                    d = parse_next_match_date(row.get("next_match"), today)
+                    if d:
+                        days.add(d)
+    return days
+
+
+def recent_match_days(today: date, out_dir: Path = OUTPUT_DIR, lookback: int = RECENT_MATCH_DAYS) -> Set[date]:
+    """Matchs de results.csv depuis `lookback` jours (+ rencontres à venir déjà listées)."""
+    path = out_dir / extract_results.OUTPUT_FILENAME
+    if not path.exists():
+        return set()
+    days: Set[date] = set()
+    since = today - timedelta(days=lookback)
+    with open(path, newline="", encoding="utf-8-sig") as fp:
+        sep = detect_sep(fp.readline())
+        fp.seek(0)
+        for row in csv.DictReader(fp, delimiter=sep):
+            iso = extract_results.to_date_iso(row.get("date") or "")
+            if iso and date.fromisoformat(iso) >= since:
+                days.add(date.fromisoformat(iso))
+    return days
+
+
+def match_days(today: date, out_dir: Path = OUTPUT_DIR) -> Set[date]:
+    return upcoming_match_days(today, out_dir) | recent_match_days(today, out_dir)
+
+
+def in_match_window(now: datetime, match_days: Set[date]) -> bool:
+    return now.date() in match_days and MATCH_WINDOW[0] <= now.hour < MATCH_WINDOW[1]
+
+
+def interval_for(job: Job, now: datetime, match_days: Set[date]) -> float:
+    today = now.date()
+    yesterday = today - timedelta(days=1)
+    if job.after_match_only:
+        return job.match_day if yesterday in match_days else job.every
+    if in_match_window(now, match_days):
+        return job.live or job.match_day
+    if today in match_days or yesterday in match_days:
+        return job.match_day
+    return job.every
+
+
+def next_run_time(job: Job, now: datetime, match_days: Set[date]) -> datetime:
+    """Prochain passage ; avancé au début d'une fenêtre de match si elle tombe avant."""
+    nxt = now + timedelta(seconds=interval_for(job, now, match_days))
+    if job.live is None and not job.after_match_only:
+        return nxt
+    for d in sorted(match_days):
+        start = datetime.combine(d, datetime.min.time()) + timedelta(hours=MATCH_WINDOW[0])
+        if job.after_match_only:
+            start += timedelta(days=1)  # lendemain du match, 12h
+        if now < start < nxt:
+            return start
+    return nxt
+
+
+# =========================
+# Jobs
+# =========================
+def refresh_derived() -> None:
+    """Tables pré-calculées + publication d'une version cohérente pour Power BI."""
+    import aggregates  # pandas : importé au premier job réussi seulement
+    import changelog
+    import publish
+    import search_index
+    import standings
+
+    try:
+        standings.main()  # tables standings_* (optionnelles : un échec ne bloque pas la publication)
+    except Exception as e:
+        print(f"❌ Classement recalculé : {e}")
+
+    try:
+        aggregates.main()
+        release = publish.publish(publish.DATA_DIR)
+        print(f"✅ Version publiée : {release}")
+    except Exception as e:
+        print(f"❌ Publication : {e}")
+        return
+
+    try:
+        changelog.capture_all(publish.DATA_DIR)  # événements insert / update / delete de la version
+    except Exception as e:
+        print(f"❌ Changelog : {e}")
+
+    try:
+        search_index.build(publish.DATA_DIR)  # joueurs / équipes / matchs de la version publiée
+    except Exception as e:
+        print(f"❌ Index de recherche : {e}")
+
+
+JOBS: List[Job] = [
+    Job("classement", extract_classement.main, every=DAY, match_day=HOUR, live=10 * MINUTE),
+    Job("resultats", extract_results.main, every=DAY, match_day=HOUR, live=10 * MINUTE),
+    Job("joueurs", extract_players.main, every=7 * DAY, match_day=DAY, after_match_only=True),
+]
+
+
+class Scheduler:
+    def __init__(self, jobs: List[Job] = JOBS, out_dir: Path = OUTPUT_DIR):
+        self.jobs = {job.name: job for job in jobs}
+        self.state_path = out_dir / STATE_FILENAME
+        self.session = extract_players.build_session()  # une session chaude pour tous les jobs
+        self.stop_event = threading.Event()
+        self.last_run: Dict[str, float] = self._load_state()
+
+    def _load_state(self) -> Dict[str, float]:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, encoding="utf-8") as fp:
+            return json.load(fp)
+
+    def _save_state(self) -> None:
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(self.last_run, fp, indent=2)
+        tmp.replace(self.state_path)
+
+    def stop(self, *_args) -> None:
+        self.stop_event.set()
+
+    def run_job(self, job: Job) -> bool:
+        print(f"▶️ {datetime.now():%Y-%m-%d %H:%M:%S} {job.name}")
+        try:
+            job.run(self.session)
+        except Exception as e:
+            print(f"❌ {job.name} : {e}")
+            return False
+        self.last_run[job.name] = time.time()
+        self._save_state()
+        refresh_derived()
+        return True
+
+    def run_forever(self) -> None:
+        now = datetime.now()
+        days = match_days(now.date())
+        heap = []
+        for name, job in self.jobs.items():
+            last = self.last_run.get(name)
+            due = now if last is None else next_run_time(job, datetime.fromtimestamp(last), days)
+            heapq.heappush(heap, (max(due, now), name))
+
+        print(f"✅ Scheduler démarré ; matchs UBB : {sorted(days) or 'inconnus'}")
+        while heap and not self.stop_event.is_set():
+            due, name = heap[0]
+            wait = (due - datetime.now()).total_seconds()
+            if wait > 0:
+                self.stop_event.wait(min(wait, HOUR))  # réveil régulier : Ctrl+C / changement d'heure
+                continue
+
+            heapq.heappop(heap)
+            job = self.jobs[name]
+            ok = self.run_job(job)
+
+            now = datetime.now()
+            days = match_days(now.date())  # classement / résultats ont pu changer
+            due = now + timedelta(seconds=RETRY_AFTER_ERROR) if not ok else next_run_time(job, now, days)
+            heapq.heappush(heap, (due, name))
+            print(f"⏱️ {name} : prochain passage {due:%Y-%m-%d %H:%M}")
+
+        self.session.close()
+        print("✅ Scheduler arrêté")
+
+
+def main():
+    scheduler = Scheduler()
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Index de recherche plein texte (joueurs, équipes, matchs).
+
+Retrouver "Bègles" quand on tape "begles", ou un joueur par un bout de nom,
+voulait dire relire les CSV avec des comparaisons de chaînes au cas par cas.
+Ici, à chaque publication, un index inversé est construit sur :
+  - joueurs : nom, poste, nationalité, player_id ;
+  - équipes : nom complet + abréviations (teams_top14.csv, teams_cup.csv),
+    équipes vues dans les résultats / classements, compétition ;
+  - matchs  : date, compétition, journée, équipes, score.
+
+Texte replié (fold) : minuscules, sans accents ni ligatures ("Œ" -> "oe"),
+découpé en mots alphanumériques. Une requête = tous ses mots doivent
+correspondre (ET), chacun en mot exact (3), préfixe (2) ou sous-chaîne (1,
+via un index de trigrammes sur le vocabulaire) ; tri par score.
+
+Format disque compact (search_index.bin) : en-tête + un bloc zlib contenant
+documents (JSON), vocabulaire trié, offsets et postings (uint32). Chargement
+= une décompression + des `array.frombytes`, pas de pandas.
+
+    python search_index.py build
+    python search_index.py begles             # recherche (avec le temps de réponse)
+    python search_index.py "pil fra" --type player
+"""
+
+import argparse
+import heapq
+import json
+import re
+import struct
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import publish
+from fastpath import read_csv_rows, strip_accents, team_key
+
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = publish.DATA_DIR
+INDEX_FILENAME = "search_index.bin"
+MAGIC = b"UBBIDX1\n"
+
+TEAM_FILES = {"teams_top14.csv": "Top 14", "teams_cup.csv": "Champions Cup"}
+STANDING_FILES = ("classement_top14.csv", "classement_cup.csv")
+
+NGRAM = 3
+EXACT, PREFIX, SUBSTRING = 3, 2, 1
+TYPE_ORDER = {"team": 0, "player": 1, "match": 2}
+DEFAULT_LIMIT = 10
+
+LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ø": "o", "ł": "l", "đ": "d", "ß": "ss"})
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# =========================
+# Texte
+# =========================
+def fold(text) -> str:
+    """'Bordeaux-Bègles' -> 'bordeaux-begles' (casse, accents, ligatures)."""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    return strip_accents(text.casefold().translate(LIGATURES))
+
+
+def tokens(*texts) -> List[str]:
+    return [w for t in texts for w in WORD_RE.findall(fold(t))]
+
+
+def trigrams(term: str) -> Set[str]:
+    return {term[i:i + NGRAM] for i in range(len(term) - NGRAM + 1)}
+
+
+# =========================
+# Documents
+# =========================
+@dataclass(frozen=True, slots=True)
+class Hit:
+    type: str
+    id: str
+    label: str
+    score: int
+
+
+def player_docs(rows: Iterable[Dict]) -> Iterable[Tuple[str, str, str, List[str]]]:
+    for row in rows:
+        if not row.get("player_id") or not row.get("name"):
+            continue
+        yield ("player", str(row["player_id"]), row["name"],
+               tokens(row["name"], row.get("position"), row.get("nationality"), row["player_id"]))
+
+
+def team_docs(src: Path, results: List[Dict]) -> Iterable[Tuple[str, str, str, List[str]]]:
+    """Équipes fusionnées par team_key : nom le plus long vu, abréviations, compétitions."""
+    names: Dict[str, str] = {}
+    words: Dict[str, List[str]] = defaultdict(list)
+
+    def add(name, *extra) -> None:
+        key = team_key(name)
+        if not key:
+            return
+        if len(name) > len(names.get(key, "")):
+            names[key] = name
+        words[key] += tokens(name, *extra)
+
+    for filename, competition in TEAM_FILES.items():
+        if (src / filename).exists():
+            for row in read_csv_rows(src / filename, typed=False):
+                add(row.get("Nom complet"), row.get("Abréviation"), competition)
+    for filename in STANDING_FILES:
+        if (src / filename).exists():
+            for row in read_csv_rows(src / filename, typed=False):
+                add(row.get("team"))
+    for row in results:
+        add(row.get("team_home"), row.get("competition"))
+        add(row.get("team_away"), row.get("competition"))
+
+    for key, name in names.items():
+        yield "team", key, name, words[key]
+
+
+def match_docs(rows: Iterable[Dict]) -> Iterable[Tuple[str, str, str, List[str]]]:
+    from extract_results import to_date_iso  # bs4 / requests : à la construction seulement
+
+    for row in rows:
+        home, away = row.get("team_home") or "", row.get("team_away") or ""
+        date_iso = to_date_iso(row.get("date") or "") or ""
+        journee = f" {row['journee']}" if row.get("journee") else ""
+        label = (f"{date_iso} · {row.get('competition') or ''}{journee} · "
+                 f"{home} {row.get('score_home')}-{row.get('score_away')} {away}")
+        yield ("match", f"{date_iso}_{team_key(home)}_{team_key(away)}", label,
+               tokens(row.get("date"), date_iso, row.get("competition"), row.get("journee"),
+                      home, away, row.get("score_home"), row.get("score_away")))
+
+
+def collect_docs(src: Path) -> List[Tuple[str, str, str, List[str]]]:
+    def read(name: str) -> List[Dict]:
+        return read_csv_rows(src / name, typed=False) if (src / name).exists() else []
+
+    results = read("results.csv")
+    return list(player_docs(read("players.csv"))) + list(team_docs(src, results)) + list(match_docs(results))
+
+
+# =========================
+# Index
+# =========================
+class SearchIndex:
+    def __init__(self, docs: List[List[str]], terms: List[str], offsets: array, postings: array):
+        self.docs = docs          # [type, id, label]
+        self.terms = terms        # vocabulaire trié
+        self.offsets = offsets    # postings du terme i : postings[offsets[i]:offsets[i + 1]]
+        self.postings = postings
+        self._grams: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def build(cls, docs: List[Tuple[str, str, str, List[str]]]) -> "SearchIndex":
+        # numéro de document = ordre de départage à score égal (équipes, joueurs, matchs ; libellé court d'abord)
+        docs = sorted(docs, key=lambda doc: (TYPE_ORDER.get(doc[0], 9), len(doc[2]), doc[2]))
+        inverted: Dict[str, Set[int]] = defaultdict(set)
+        for i, (_, _, _, words) in enumerate(docs):
+            for w in words:
+                inverted[w].add(i)
+        terms = sorted(inverted)
+        offsets, postings = array("I", [0]), array("I")
+        for term in terms:
+            postings.extend(sorted(inverted[term]))
+            offsets.append(len(postings))
+        return cls([[t, i, label] for t, i, label, _ in docs], terms, offsets, postings)
+
+    # ---- disque
+    def save(self, path: Path) -> None:
+        sections = [
+            json.dumps(self.docs, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            "\n".join(self.terms).encode("utf-8"),
+            self.offsets.tobytes(),
+            self.postings.tobytes(),
+        ]
+        payload = b"".join(struct.pack("<I", len(s)) + s for s in sections)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(MAGIC)
+            fp.write(zlib.compress(payload, 6))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SearchIndex":
+        raw = Path(path).read_bytes()
+        if not raw.startswith(MAGIC):
+            raise ValueError(f"{path} : pas un index de recherche")
+        payload = zlib.decompress(raw[len(MAGIC):])
+        sections, pos = [], 0
+        for _ in range(4):
+            (n,) = struct.unpack_from("<I", payload, pos)
+            sections.append(payload[pos + 4:pos + 4 + n])
+            pos += 4 + n
+        offsets, postings = array("I"), array("I")
+        offsets.frombytes(sections[2])
+        postings.frombytes(sections[3])
+        terms = sections[1].decode("utf-8").split("\n") if sections[1] else []
+        return cls(json.loads(sections[0]), terms, offsets, postings)
+
+    # ---- recherche
+    def _term_ids_with(self, fragment: str) -> List[int]:
+        """Termes contenant `fragment` (trigrammes du vocabulaire, construits au 1er besoin)."""
+        if self._grams is None:
+            grams: Dict[str, List[int]] = defaultdict(list)
+            for tid, term in enumerate(self.terms):
+                for g in trigrams(term):
+                    grams[g].append(tid)
+            self._grams = dict(grams)
+        candidates = None
+        for g in trigrams(fragment):
+            ids = set(self._grams.get(g, ()))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        return [tid for tid in candidates if fragment in self.terms[tid]]
+
+    def _prefix_range(self, word: str) -> Tuple[int, int]:
+        return bisect_left(self.terms, word), bisect_left(self.terms, word + "\uffff")
+
+    def _match(self, word: str) -> Dict[int, int]:
+        """Documents -> meilleure correspondance du mot (exact > préfixe > sous-chaîne)."""
+        lo, hi = self._prefix_range(word)
+        ranked = [(tid, EXACT if self.terms[tid] == word else PREFIX) for tid in range(lo, hi)]
+        if len(word) >= NGRAM:
+            ranked += [(tid, SUBSTRING) for tid in self._term_ids_with(word) if not lo <= tid < hi]
+        found: Dict[int, int] = {}
+        for tid, quality in sorted(ranked, key=lambda t: t[1]):  # meilleure qualité appliquée en dernier
+            found.update(dict.fromkeys(self.postings[self.offsets[tid]:self.offsets[tid + 1]], quality))
+        return found
+
+    def _estimate(self, word: str) -> int:
+        lo, hi = self._prefix_range(word)
+        return self.offsets[hi] - self.offsets[lo]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, types: Optional[Iterable[str]] = None) -> List[Hit]:
+        words = tokens(query)
+        if not words:
+            return []
+        scores: Optional[Dict[int, int]] = None
+        for word in sorted(set(words), key=self._estimate):  # mot le plus sélectif d'abord
+            found = self._match(word)
+            if scores is None:
+                scores = found
+            else:
+                scores = {d: s + found[d] for d, s in scores.items() if d in found}
+            if not scores:
+                return []
+        docs = self.docs
+        if types:
+            wanted = set(types)
+            scores = {d: s for d, s in scores.items() if docs[d][0] in wanted}
+        n = len(docs)
+        best = heapq.nsmallest(limit, (d - s * n for d, s in scores.items()))  # score puis numéro : clé entière
+        return [Hit(docs[k % n][0], docs[k % n][1], docs[k % n][2], -(k // n)) for k in best]
+
+
+# =========================
+# Construction / cache
+# =========================
+def build(data_dir: Path = DATA_DIR, out_path: Optional[Path] = None) -> Path:
+    """Index des datasets de la version courante (DATA_DIR/current, sinon DATA_DIR)."""
+    current = data_dir / publish.CURRENT_LINK
+    src = current if current.exists() else data_dir
+    out_path = out_path or data_dir / INDEX_FILENAME
+    index = SearchIndex.build(collect_docs(src))
+    index.save(out_path)
+    print(f"✅ Index de recherche : {out_path} ({len(index.docs)} documents, "
+          f"{len(index.terms)} termes, {out_path.stat().st_size // 1024} Ko)")
+    return out_path
+
+
+_CACHE: Dict[Path, Tuple[int, SearchIndex]] = {}
+
+
+def cached(path: Path) -> SearchIndex:
+    """Index chargé une fois, rechargé quand le fichier change (API, outils résidents)."""
+    mtime = path.stat().st_mtime_ns
+    hit = _CACHE.get(path)
+    if hit is None or hit[0] != mtime:
+        hit = (mtime, SearchIndex.load(path))
+        _CACHE[path] = hit
+    return hit[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index de recherche plein texte")
+    parser.add_argument("query", nargs="+", help="'build' ou mots recherchés")
+    parser.add_argument("--type", action="append", choices=sorted(TYPE_ORDER))
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    if args.query == ["build"]:
+        build(DATA_DIR)
+        return
+
+    t0 = time.perf_counter()
+    index = SearchIndex.load(DATA_DIR / INDEX_FILENAME)
+    t1 = time.perf_counter()
+    hits = index.search(" ".join(args.query), args.limit, args.type)
+    t2 = time.perf_counter()
+    for h in hits:
+        print(f"  [{h.type}] {h.label}  ({h.id}, score {h.score})")
+    print(f"⏱️ chargement {1000 * (t1 - t0):.1f} ms, recherche {1000 * (t2 - t1):.2f} ms, {len(hits)} résultats")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Writers "streaming" pour les scrapers.
+
+Les extracteurs sont des générateurs : chaque ligne est écrite dès qu'elle
+est produite (mémoire bornée, rien de perdu si le crawl plante en route).
+Le tri se fait via les clés du support cible (ORDER BY SQLite) au lieu d'un
+DataFrame complet trié en mémoire.
+
+Les sinks acceptent des dicts ou des records (records.py) ; `constants`
+porte les colonnes identiques sur tout le dataset (ex: source_url), qui ne
+sont donc pas stockées dans chaque record.
+
+    with CsvSink(path, COLUMNS) as sink:
+        for row in scrape_xxx():
+            sink.write(row)
+"""
+
+import csv
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+def to_row(row, constants: Optional[Dict] = None) -> Dict:
+    """Record ou dict -> dict, complété par les constantes du dataset."""
+    out = row.as_dict() if hasattr(row, "as_dict") else dict(row)
+    if constants:
+        out.update(constants)
+    return out
+
+
+# =========================
+# CSV
+# =========================
+class CsvSink:
+    """
+    CSV écrit ligne par ligne (flush à chaque ligne).
+    Seules les colonnes de `fieldnames` sont écrites (les autres sont ignorées).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: Sequence[str],
+        sep: str = ",",
+        encoding: str = "utf-8-sig",
+        constants: Optional[Dict] = None,
+    ):
+        self.path = Path(path)
+        self.fieldnames = list(fieldnames)
+        self.sep = sep
+        self.encoding = encoding
+        self.constants = constants or {}
+        self.count = 0
+        self._fp = None
+        self._writer = None
+
+    def __enter__(self) -> "CsvSink":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = open(self.path, "w", newline="", encoding=self.encoding)
+        self._writer = csv.DictWriter(
+            self._fp, fieldnames=self.fieldnames, delimiter=self.sep, restval="", extrasaction="ignore"
+        )
+        self._writer.writeheader()
+        return self
+
+    def write(self, row) -> None:
+        self._writer.writerow(to_row(row, self.constants))
+        self._fp.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._fp:
+            self._fp.close()
+            self._fp = None
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# =========================
+# SQLite
+# =========================
+class SqliteSink:
+    """
+    Table SQLite avec clé primaire : une ligne déjà vue (même clé) est
+    remplacée, et l'export CSV sort trié par la clé (ou `order_by`).
+    Les colonnes de `key` absentes de `fieldnames` servent uniquement au tri
+    (ex: date ISO) et ne sont pas exportées par défaut. Colonnes de clé NOT
+    NULL, valeur manquante stockée "" (SQLite ne dédoublonne pas les NULL).
+
+    `replace` (ex: {"source_url": url}) : les lignes existantes de ce
+    périmètre sont supprimées à l'ouverture, dans la même transaction que les
+    écritures (validée à la sortie du `with`, annulée en cas d'exception) : la
+    table reflète la page scrapée, sans lignes fantômes (clé modifiée sur le site).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        table: str,
+        fieldnames: Sequence[str],
+        key: Sequence[str],
+        constants: Optional[Dict] = None,
+        replace: Optional[Dict] = None,
+    ):
+        self.path = Path(path)
+        self.table = table
+        self.fieldnames = list(fieldnames)
+        self.key = list(key)
+        self.constants = constants or {}
+        self.replace = replace or {}
+        self.columns = self.fieldnames + [k for k in self.key if k not in self.fieldnames]
+        self.count = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> "SqliteSink":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._create()
+        if self.replace:
+            where = " AND ".join(f'"{c}" = ?' for c in self.replace)
+            self._conn.execute(f'DELETE FROM "{self.table}" WHERE {where}', list(self.replace.values()))
+        return self
+
+    def _ddl(self, table: str) -> str:
+        cols = ", ".join(f'"{c}"' + (" NOT NULL" if c in self.key else "") for c in self.columns)
+        pk = ", ".join(f'"{k}"' for k in self.key)
+        return f'CREATE TABLE "{table}" ({cols}, PRIMARY KEY ({pk}))'
+
+    def _create(self) -> None:
+        """Crée la table ; une table d'avant les clés NOT NULL est migrée (doublons NULL fusionnés)."""
+        info = self._conn.execute(f'PRAGMA table_info("{self.table}")').fetchall()
+        if not info:
+            self._conn.execute(self._ddl(self.table))
+        elif not all(notnull for _, name, _, notnull, _, _ in info if name in self.key):
+            old = f"{self.table}_old"
+            cols = ", ".join(f'"{c}"' for c in self.columns)
+            values = ", ".join(f'COALESCE("{c}", \'\')' if c in self.key else f'"{c}"' for c in self.columns)
+            self._conn.execute(f'ALTER TABLE "{self.table}" RENAME TO "{old}"')
+            self._conn.execute(self._ddl(self.table))
+            self._conn.execute(f'INSERT OR REPLACE INTO "{self.table}" ({cols}) SELECT {values} FROM "{old}" ORDER BY rowid')
+            self._conn.execute(f'DROP TABLE "{old}"')
+        self._conn.commit()
+
+    def write(self, row) -> None:
+        row = to_row(row, self.constants)
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        values = [row.get(c) for c in self.columns]
+        for i, c in enumerate(self.columns):
+            if c in self.key and values[i] is None:
+                values[i] = ""
+        self._conn.execute(f'INSERT OR REPLACE INTO "{self.table}" ({cols}) VALUES ({marks})', values)
+        if not self.replace:
+            self._conn.commit()  # sans périmètre : chaque ligne persistée au fil de l'eau
+        self.count += 1
+
+    def iter_rows(self, order_by: Optional[Sequence[str]] = None) -> Iterable[Dict]:
+        order = ", ".join(f'"{c}"' for c in (order_by or self.key))
+        cur = self._conn.execute(f'SELECT * FROM "{self.table}" ORDER BY {order}')
+        names = [d[0] for d in cur.description]
+        for values in cur:
+            yield dict(zip(names, values))
+
+    def export_csv(
+        self,
+        csv_path: Path,
+        columns: Optional[Sequence[str]] = None,
+        order_by: Optional[Sequence[str]] = None,
+        sep: str = ",",
+        encoding: str = "utf-8-sig",
+    ) -> int:
+        with CsvSink(csv_path, columns or self.fieldnames, sep=sep, encoding=encoding) as out:
+            for row in self.iter_rows(order_by):
+                out.write({c: row.get(c) for c in out.fieldnames})
+            return out.count
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is not None and self._conn:
+            self._conn.rollback()  # périmètre `replace` : l'état précédent est conservé
+        self.close()
+
+
+# =========================
+# Parquet (optionnel : pip install pyarrow)
+# =========================
+class ParquetSink:
+    """Parquet écrit par row groups de `row_group_size` lignes."""
+
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: Sequence[str],
+        row_group_size: int = 1000,
+        constants: Optional[Dict] = None,
+    ):
+        self.path = Path(path)
+        self.fieldnames = list(fieldnames)
+        self.row_group_size = row_group_size
+        self.constants = constants or {}
+        self.count = 0
+        self._buffer: List[Dict] = []
+        self._writer = None
+
+    def __enter__(self) -> "ParquetSink":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(
+            [{c: r.get(c) for c in self.fieldnames} for r in self._buffer]
+        )
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self._buffer = []
+
+    def write(self, row) -> None:
+        self._buffer.append(to_row(row, self.constants))
+        self.count += 1
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_sink(path: Path, fieldnames: Sequence[str], key: Optional[Sequence[str]] = None, **kwargs):
+    """Choisit le writer selon l'extension (.csv, .parquet, .sqlite/.db)."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".parquet":
+        return ParquetSink(path, fieldnames, **kwargs)
+    if suffix in (".sqlite", ".db"):
+        return SqliteSink(path, Path(path).stem, fieldnames, key or fieldnames[:1], **kwargs)
+    return CsvSink(path, fieldnames, **kwargs)
@@ -0,0 +1,316 @@
+"""
+Moteur de classement à partir des résultats + projections Monte-Carlo.
+
+1) `standings_from_results` reconstruit pts / mj / v / n / d / bo / bd /
+   pts_for / pts_against / diff depuis results.csv avec les règles de bonus
+   de la compétition, puis classe avec les départages.
+2) `compare_with_scraped` confronte ce calcul au classement scrapé
+   (classement.html) équipe par équipe.
+3) `simulate_season` joue les matchs restants N fois en NumPy (par lots,
+   sans boucle Python par simulation) et sort la probabilité de chaque
+   place finale : 100 000 saisons en quelques secondes.
+
+Limites connues :
+  - results.csv ne contient que les matchs de l'UBB : le recalcul n'est
+    complet que pour l'UBB (les autres équipes n'ont que leurs matchs contre
+    l'UBB) ;
+  - le site ne donne pas le nombre d'essais : sans colonnes
+    tries_home / tries_away, le bonus offensif ne peut pas être recalculé
+    (bo = 0) ;
+  - sans calendrier restant (fixtures), on génère des journées en
+    round-robin : les adversaires exacts sont alors approximatifs.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DATA_DIR, CSV_SEP, enrich_results, read_csv_auto, team_key, team_match_long
+from extract_classement import TOP14_FILENAME  # classement scrapé (ubb_top14_classement.csv)
+
+
+# =========================
+# CONFIG
+# =========================
+RESULTS_FILENAME = "results.csv"
+
+OUTPUT_DIR = DATA_DIR
+
+# Barème par compétition
+RULES: Dict[str, Dict] = {
+    "Top 14": {
+        "win": 4, "draw": 2, "loss": 0,
+        "bd_margin": 5,        # BD : défaite de 5 points ou moins
+        "bo_try_margin": 3,    # BO : victoire avec 3 essais de plus que l'adversaire
+        "bo_min_tries": None,
+        "games_per_team": 26,
+    },
+    "Champions Cup": {
+        "win": 4, "draw": 2, "loss": 0,
+        "bd_margin": 5,
+        "bo_try_margin": None,
+        "bo_min_tries": 4,     # BO : 4 essais marqués, quel que soit le résultat
+        "games_per_team": 4,
+    },
+}
+
+N_SIMULATIONS = 100_000
+SIM_BATCH = 20_000         # simulations par lot (mémoire bornée)
+HOME_ADVANTAGE = 6.0       # points d'écart "offerts" par le terrain
+RATING_SCALE = 12.0        # écart de note qui donne ~73 % de victoire
+DRAW_PROBABILITY = 0.02
+
+
+# =========================
+# Classement depuis les résultats
+# =========================
+def standings_from_results(results: pd.DataFrame, competition: str = "Top 14") -> pd.DataFrame:
+    """
+    `results` : results.csv brut ou enrichi. Les colonnes optionnelles
+    tries_home / tries_away activent le calcul du bonus offensif.
+    """
+    rules = RULES[competition]
+    if "home_team_key" not in results.columns:
+        results = enrich_results(results)
+    res = results[results["competition"] == competition]
+
+    long = team_match_long(res)
+    if {"tries_home", "tries_away"} <= set(res.columns):
+        tries = res.set_index("match_id")[["tries_home", "tries_away"]]
+        t_home = long["match_id"].map(tries["tries_home"])
+        t_away = long["match_id"].map(tries["tries_away"])
+        long["tries_for"] = np.where(long["is_home"], t_home, t_away)
+        long["tries_against"] = np.where(long["is_home"], t_away, t_home)
+    else:
+        long["tries_for"] = np.nan
+        long["tries_against"] = np.nan
+
+    win = long["win"].to_numpy(bool)
+    loss = long["loss"].to_numpy(bool)
+    margin = -long["diff"].to_numpy()
+
+    bd = loss & (margin <= rules["bd_margin"])
+    tf = long["tries_for"].to_numpy(float)
+    ta = long["tries_against"].to_numpy(float)
+    if rules["bo_try_margin"] is not None:
+        bo = win & (tf - ta >= rules["bo_try_margin"])
+    else:
+        bo = tf >= rules["bo_min_tries"]
+
+    long["bo"] = bo.astype(int)
+    long["bd"] = bd.astype(int)
+    long["pts"] = (
+        long["win"] * rules["win"] + long["draw"] * rules["draw"] + long["loss"] * rules["loss"]
+        + long["bo"] + long["bd"]
+    )
+
+    table = long.groupby("team_key").agg(
+        team=("team", "last"),
+        pts=("pts", "sum"),
+        mj=("match_id", "count"),
+        bo=("bo", "sum"),
+        bd=("bd", "sum"),
+        v=("win", "sum"),
+        n=("draw", "sum"),
+        d=("loss", "sum"),
+        pts_for=("pts_for", "sum"),
+        pts_against=("pts_against", "sum"),
+    ).reset_index()
+    table["diff"] = table["pts_for"] - table["pts_against"]
+    return rank_table(table, long)
+
+
+def rank_table(table: pd.DataFrame, long: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Départages (Top 14) : points, puis points en confrontations directes
+    entre équipes à égalité, puis différence générale, puis points marqués.
+    """
+    df = table.copy()
+    df["h2h_pts"] = 0
+    if long is not None and "pts" in long.columns:
+        for _, group in df.groupby("pts"):
+            if len(group) < 2:
+                continue
+            tied = set(group["team_key"])
+            opp_keys = long["opponent"].map(team_key)
+            h2h = long[long["team_key"].isin(tied) & opp_keys.isin(tied)]
+            pts = h2h.groupby("team_key")["pts"].sum()
+            df.loc[group.index, "h2h_pts"] = group["team_key"].map(pts).fillna(0).astype(int).to_numpy()
+
+    df = df.sort_values(
+        ["pts", "h2h_pts", "diff", "pts_for", "team"],
+        ascending=[False, False, False, False, True],
+        kind="stable",
+    ).reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    return df.drop(columns=["h2h_pts"])
+
+
+def compare_with_scraped(computed: pd.DataFrame, scraped: pd.DataFrame) -> pd.DataFrame:
+    """Écarts calculé - scrapé par équipe (0 partout = cohérent)."""
+    cols = ["pts", "mj", "bo", "bd", "v", "n", "d", "pts_for", "pts_against", "diff"]
+    a = computed.assign(team_key=computed["team"].map(team_key)).set_index("team_key")
+    b = scraped.assign(team_key=scraped["team"].map(team_key)).set_index("team_key")
+    common = a.index.intersection(b.index)
+
+    out = pd.DataFrame({"team": b.loc[common, "team"]})
+    for c in cols:
+        out[f"{c}_computed"] = a.loc[common, c]
+        out[f"{c}_scraped"] = b.loc[common, c]
+        out[f"{c}_delta"] = out[f"{c}_computed"] - out[f"{c}_scraped"]
+    out["consistent"] = (out[[f"{c}_delta" for c in cols]] == 0).all(axis=1)
+    return out.reset_index()
+
+
+# =========================
+# Monte-Carlo
+# =========================
+def round_robin_fixtures(teams: pd.Series, n_rounds: int) -> pd.DataFrame:
+    """
+    Journées générées par la méthode du cercle (chaque équipe joue une fois
+    par journée, domicile/extérieur alternés). Approximation quand le
+    calendrier réel restant n'est pas disponible.
+    """
+    names = list(teams)
+    if len(names) % 2:
+        names.append(None)  # exempt
+    n = len(names)
+    rows = []
+    rot = names[1:]
+    for r in range(n_rounds):
+        ring = [names[0]] + rot
+        for i in range(n // 2):
+            a, b = ring[i], ring[n - 1 - i]
+            if a is None or b is None:
+                continue
+            home, away = (a, b) if (r + i) % 2 == 0 else (b, a)
+            rows.append({"round": r + 1, "team_home": home, "team_away": away})
+        rot = rot[-1:] + rot[:-1]
+    return pd.DataFrame(rows)
+
+
+def simulate_season(
+    table: pd.DataFrame,
+    fixtures: Optional[pd.DataFrame] = None,
+    competition: str = "Top 14",
+    n_sims: int = N_SIMULATIONS,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    `table` : classement courant (scrapé ou recalculé).
+    `fixtures` : matchs restants (team_home, team_away) ; sinon round-robin.
+    Renvoie une ligne par équipe : points attendus et P(place finale = k).
+    """
+    rules = RULES[competition]
+    rng = np.random.default_rng(seed)
+
+    teams = table["team"].reset_index(drop=True)
+    idx = {team_key(t): i for i, t in enumerate(teams)}
+    n_teams = len(teams)
+
+    if fixtures is None:
+        n_rounds = max(0, rules["games_per_team"] - int(table["mj"].min()))
+        fixtures = round_robin_fixtures(teams, n_rounds)
+    home_i = fixtures["team_home"].map(team_key).map(idx).to_numpy()
+    away_i = fixtures["team_away"].map(team_key).map(idx).to_numpy()
+    if np.isnan(home_i.astype(float)).any() or np.isnan(away_i.astype(float)).any():
+        raise ValueError("fixtures: équipe absente du classement")
+    home_i = home_i.astype(int)
+    away_i = away_i.astype(int)
+    n_fix = len(fixtures)
+
+    # Force = différence de points par match ; taux de bonus observés
+    mj = np.maximum(table["mj"].to_numpy(float), 1)
+    rating = table["diff"].to_numpy(float) / mj
+    p_bo = table["bo"].to_numpy(float) / np.maximum(table["v"].to_numpy(float), 1)
+    p_bd = table["bd"].to_numpy(float) / np.maximum(table["d"].to_numpy(float), 1)
+
+    p_home = 1 / (1 + np.exp(-(rating[home_i] - rating[away_i] + HOME_ADVANTAGE) / RATING_SCALE))
+    p_home_win = p_home * (1 - DRAW_PROBABILITY)
+    p_draw = DRAW_PROBABILITY
+
+    # matrices d'incidence match -> équipe (somme des points par produit matriciel)
+    H = np.zeros((n_fix, n_teams), dtype=np.float32)
+    A = np.zeros((n_fix, n_teams), dtype=np.float32)
+    H[np.arange(n_fix), home_i] = 1
+    A[np.arange(n_fix), away_i] = 1
+
+    base_pts = table["pts"].to_numpy(float)
+    tiebreak = rating * 1e-3  # départage approximatif par la différence
+    rank_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    pts_sum = np.zeros(n_teams)
+
+    done = 0
+    while done < n_sims:
+        size = min(SIM_BATCH, n_sims - done)
+        u = rng.random((size, n_fix), dtype=np.float32)
+        home_win = u < p_home_win
+        draw = (u >= p_home_win) & (u < p_home_win + p_draw)
+        away_win = ~(home_win | draw)
+
+        b = rng.random((size, n_fix, 2), dtype=np.float32)
+        home_pts = (
+            home_win * (rules["win"] + (b[..., 0] < p_bo[home_i]))
+            + draw * rules["draw"]
+            + away_win * (rules["loss"] + (b[..., 0] < p_bd[home_i]))
+        ).astype(np.float32)
+        away_pts = (
+            away_win * (rules["win"] + (b[..., 1] < p_bo[away_i]))
+            + draw * rules["draw"]
+            + home_win * (rules["loss"] + (b[..., 1] < p_bd[away_i]))
+        ).astype(np.float32)
+
+        final = base_pts + home_pts @ H + away_pts @ A  # (size, n_teams)
+        pts_sum += final.sum(axis=0)
+
+        noise = rng.random((size, n_teams)) * 1e-6
+        order = np.argsort(-(final + tiebreak + noise), axis=1)
+        ranks = np.empty_like(order)
+        ranks[np.arange(size)[:, None], order] = np.arange(n_teams)
+        for t in range(n_teams):
+            rank_counts[t] += np.bincount(ranks[:, t], minlength=n_teams)
+        done += size
+
+    probs = rank_counts / n_sims
+    out = pd.DataFrame({"team": teams, "pts_now": base_pts.astype(int), "pts_expected": np.round(pts_sum / n_sims, 1)})
+    for k in range(n_teams):
+        out[f"p_rank_{k + 1}"] = np.round(probs[:, k], 4)
+    if competition == "Top 14":
+        out["p_top2"] = np.round(probs[:, :2].sum(axis=1), 4)
+        out["p_top6"] = np.round(probs[:, :6].sum(axis=1), 4)
+        out["p_barrage"] = np.round(probs[:, n_teams - 2], 4)
+        out["p_relegation"] = np.round(probs[:, n_teams - 1], 4)
+    return out.sort_values("pts_expected", ascending=False).reset_index(drop=True)
+
+
+# =========================
+# MAIN
+# =========================
+def main():
+    results = read_csv_auto(DATA_DIR / RESULTS_FILENAME)
+    scraped = read_csv_auto(DATA_DIR / TOP14_FILENAME)
+
+    computed = standings_from_results(results, "Top 14")
+    check = compare_with_scraped(computed, scraped)
+    projection = simulate_season(scraped, competition="Top 14")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    for name, df in [
+        ("standings_recomputed_top14", computed),
+        ("standings_check_top14", check),
+        ("standings_projection_top14", projection),
+    ]:
+        path = OUTPUT_DIR / f"{name}.csv"
+        df.to_csv(path, index=False, sep=CSV_SEP, encoding="utf-8-sig")
+        print(f"✅ {path} ({len(df)} lignes)")
+
+    ubb = check[check["team_key"] == team_key("Bordeaux-Bègles")]
+    if not ubb.empty:
+        print("Contrôle UBB :", "OK" if bool(ubb["consistent"].iloc[0]) else "écarts")
+        print(ubb.filter(like="_delta").to_string(index=False))
+    print(projection[["team", "pts_now", "pts_expected", "p_top2", "p_top6", "p_relegation"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Registre des cibles de crawl (équipes / sites partageant les mêmes templates).
+
+La config vit dans targets.json : une entrée par équipe avec ses URLs
+effectif / calendrier-résultats / classement. Ajouter une équipe ou un club
+= ajouter une entrée, sans toucher au code.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+
+# =========================
+# CONFIG
+# =========================
+TARGETS_FILE = Path(__file__).with_name("targets.json")
+
+
+@dataclass(frozen=True, slots=True)
+class Target:
+    slug: str  # nom du dossier de sortie (partition par équipe)
+    club: str
+    team: str
+    roster_url: Optional[str] = None
+    calendar_url: Optional[str] = None
+    ranking_url: Optional[str] = None
+    enabled: bool = True
+
+
+def load_targets(
+    path: Path = TARGETS_FILE,
+    slugs: Optional[Sequence[str]] = None,
+    include_disabled: bool = False,
+) -> List[Target]:
+    """
+    Lit le registre. `slugs` force une sélection (même désactivée) ;
+    sinon on renvoie les cibles `enabled`.
+    """
+    with open(path, encoding="utf-8") as fp:
+        data = json.load(fp)
+
+    targets = [Target(**t) for t in data.get("teams", [])]
+
+    seen = set()
+    for t in targets:
+        if t.slug in seen:
+            raise ValueError(f"slug en double dans {path}: {t.slug}")
+        seen.add(t.slug)
+
+    if slugs:
+        unknown = set(slugs) - seen
+        if unknown:
+            raise ValueError(f"cibles inconnues: {', '.join(sorted(unknown))}")
+        return [t for t in targets if t.slug in slugs]
+
+    return [t for t in targets if include_disabled or t.enabled]
@@ -1,7 +1,8 @@
 import os
 import csv
-import requests
+import json
 from urllib.parse import quote
+from urllib.request import Request, urlopen
 
 OWNER = "antoinemrn8"
 REPO = "iut_sd2_webscraping_UBB_MAURIN_SANZ"
@@ -43,9 +44,9 @@ def list_contents(path: str, recursive: bool = True):
     GET /repos/{owner}/{repo}/contents/{path}?ref={branch}
     """
     api_url = f"https://api.github.com/repos/{OWNER}/{REPO}/contents/{path}?ref={BRANCH}"
-    r = requests.get(api_url, headers=headers, timeout=30)
-    r.raise_for_status()
-    items = r.json()
+    # urllib (stdlib) plutôt que requests : démarrage plus rapide pour un seul appel d'API
+    with urlopen(Request(api_url, headers=headers), timeout=30) as r:  # HTTPError si statut >= 400
+        items = json.load(r)
 
     rows = []
     for it in items:
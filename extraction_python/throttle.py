@@ -0,0 +1,275 @@
+"""
+Throttle adaptatif partagé entre les scrapers.
+
+Remplace les `time.sleep(SLEEP_SECONDS)` fixes : le délai entre deux requêtes
+et le nombre de requêtes simultanées s'ajustent (AIMD) selon les retours du
+serveur (temps de réponse, 429/503, en-tête Retry-After, Crawl-delay du
+robots.txt).
+
+Usage :
+    THROTTLE = AdaptiveThrottle(initial_delay=1.0)
+    r = THROTTLE.fetch(session, url, timeout=20)
+    print(THROTTLE.metrics())
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib import robotparser
+from urllib.parse import urlsplit
+
+
+# =========================
+# CONFIG
+# =========================
+CONGESTION_STATUSES = (429, 503)  # le serveur demande explicitement de ralentir
+ERROR_STATUSES = (500, 502, 504)
+
+LATENCY_EWMA_ALPHA = 0.3  # lissage du temps de réponse
+
+
+# =========================
+# HELPERS
+# =========================
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After peut être un nombre de secondes ("120") ou une date HTTP
+    ("Wed, 21 Oct 2015 07:28:00 GMT"). Renvoie un délai en secondes.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt is None:
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+class _HostState:
+    """État du throttle pour un hôte (un throttle peut servir plusieurs sites)."""
+
+    __slots__ = (
+        "delay", "concurrency", "in_flight", "next_allowed",
+        "latency_ewma", "crawl_delay", "robots_checked",
+        "requests", "throttled",
+    )
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.concurrency = 1.0
+        self.in_flight = 0
+        self.next_allowed = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.crawl_delay: Optional[float] = None
+        self.robots_checked = False
+        self.requests = 0
+        self.throttled = 0
+
+
+# =========================
+# THROTTLE
+# =========================
+class AdaptiveThrottle:
+    """
+    Contrôle AIMD par hôte :
+      - réponse rapide et OK -> le délai baisse d'un pas fixe, la concurrence
+        augmente de 1/concurrence (augmentation additive) ;
+      - 429/503, 5xx, erreur réseau ou réponse lente -> délai x2 et
+        concurrence /2 (diminution multiplicative) ;
+      - Retry-After -> aucune requête vers l'hôte avant l'échéance ;
+      - Crawl-delay (robots.txt) -> plancher du délai.
+    Thread-safe : plusieurs workers peuvent partager la même instance.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.1,
+        max_delay: float = 60.0,
+        target_latency: float = 1.0,
+        delay_step: float = 0.05,
+        max_concurrency: int = 4,
+        respect_robots: bool = True,
+        user_agent: str = "*",
+    ):
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+        self.delay_step = delay_step
+        self.max_concurrency = max_concurrency
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    # ---------- état ----------
+    def _state(self, host: str) -> _HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            st = _HostState(self.initial_delay)
+            self._hosts[host] = st
+        return st
+
+    def _floor(self, st: _HostState) -> float:
+        return max(self.min_delay, st.crawl_delay or 0.0)
+
+    # ---------- robots.txt ----------
+    def load_robots(self, session, url: str, timeout: float = 10) -> Optional[float]:
+        """
+        Lit le Crawl-delay du robots.txt de l'hôte (une seule fois par hôte).
+        Un robots.txt absent ou illisible n'est pas bloquant.
+        """
+        host = host_of(url)
+        with self._cond:
+            st = self._state(host)
+            if st.robots_checked:
+                return st.crawl_delay
+            st.robots_checked = True
+
+        parts = urlsplit(url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        crawl_delay = None
+        try:
+            r = session.get(robots_url, timeout=timeout)
+            if r.status_code == 200:
+                rp = robotparser.RobotFileParser()
+                rp.parse(r.text.splitlines())
+                rp.modified()  # sinon crawl_delay() considère le fichier comme non lu
+                cd = rp.crawl_delay(self.user_agent)
+                crawl_delay = float(cd) if cd is not None else None
+        except Exception:
+            crawl_delay = None
+
+        with self._cond:
+            st.crawl_delay = crawl_delay
+            st.delay = max(st.delay, self._floor(st))
+        return crawl_delay
+
+    # ---------- acquisition / feedback ----------
+    def wait(self, url: str) -> None:
+        """Bloque jusqu'à ce qu'une requête vers l'hôte soit autorisée."""
+        host = host_of(url)
+        with self._cond:
+            st = self._state(host)
+            while True:
+                now = time.monotonic()
+                has_slot = st.in_flight < max(1, int(st.concurrency))
+                if has_slot and now >= st.next_allowed:
+                    st.in_flight += 1
+                    st.requests += 1
+                    st.next_allowed = now + st.delay
+                    return
+                self._cond.wait(st.next_allowed - now if has_slot else None)
+
+    def release(
+        self,
+        url: str,
+        status: Optional[int] = None,
+        elapsed: Optional[float] = None,
+        retry_after: Optional[float] = None,
+        error: bool = False,
+    ) -> None:
+        """Rend le slot et ajuste délai / concurrence selon la réponse."""
+        host = host_of(url)
+        with self._cond:
+            st = self._state(host)
+            st.in_flight = max(0, st.in_flight - 1)
+
+            if elapsed is not None:
+                if st.latency_ewma is None:
+                    st.latency_ewma = elapsed
+                else:
+                    st.latency_ewma = LATENCY_EWMA_ALPHA * elapsed + (1 - LATENCY_EWMA_ALPHA) * st.latency_ewma
+
+            congested = (
+                error
+                or status in CONGESTION_STATUSES
+                or status in ERROR_STATUSES
+                or retry_after is not None
+                or (st.latency_ewma is not None and st.latency_ewma > 2 * self.target_latency)
+            )
+
+            if congested:
+                st.throttled += 1
+                st.delay = min(self.max_delay, max(st.delay, self._floor(st)) * 2)
+                st.concurrency = max(1.0, st.concurrency / 2)
+            elif st.latency_ewma is None or st.latency_ewma <= self.target_latency:
+                st.delay = max(self._floor(st), st.delay - self.delay_step)
+                st.concurrency = min(float(self.max_concurrency), st.concurrency + 1.0 / st.concurrency)
+
+            if retry_after is not None:
+                st.next_allowed = max(st.next_allowed, time.monotonic() + min(retry_after, self.max_delay))
+
+            self._cond.notify_all()
+
+    def fetch(self, session, url: str, timeout: float = 20, max_attempts: int = 4, **kwargs):
+        """
+        GET throttlé. `session` peut être une requests.Session ou le module
+        `requests` lui-même. En cas de 429/503, on attend (Retry-After ou délai
+        adaptatif) et on réessaie ; la dernière réponse est renvoyée.
+        """
+        if self.respect_robots:
+            self.load_robots(session, url)
+
+        r = None
+        for attempt in range(1, max_attempts + 1):
+            self.wait(url)
+            start = time.monotonic()
+            try:
+                r = session.get(url, timeout=timeout, **kwargs)
+            except Exception:
+                self.release(url, elapsed=time.monotonic() - start, error=True)
+                raise
+
+            self.release(
+                url,
+                status=r.status_code,
+                elapsed=time.monotonic() - start,
+                retry_after=parse_retry_after(r.headers.get("Retry-After")),
+            )
+            if r.status_code not in CONGESTION_STATUSES:
+                break
+        return r
+
+    # ---------- métriques ----------
+    def current_rate(self, url_or_host: str) -> float:
+        """Débit courant autorisé vers l'hôte (requêtes / seconde)."""
+        host = host_of(url_or_host) if "://" in url_or_host else url_or_host.lower()
+        with self._cond:
+            st = self._state(host)
+            rate = 1.0 / max(st.delay, 1e-3)
+            if st.latency_ewma:
+                rate = min(rate, max(1, int(st.concurrency)) / st.latency_ewma)
+            return rate
+
+    def metrics(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Photo de l'état par hôte (à logguer en fin de run)."""
+        with self._cond:
+            hosts = list(self._hosts)
+        out: Dict[str, Dict[str, Optional[float]]] = {}
+        for host in hosts:
+            rate = self.current_rate(host)
+            with self._cond:
+                st = self._hosts[host]
+                out[host] = {
+                    "rate_per_s": round(rate, 3),
+                    "delay_s": round(st.delay, 3),
+                    "concurrency": int(st.concurrency),
+                    "latency_ewma_s": round(st.latency_ewma, 3) if st.latency_ewma is not None else None,
+                    "crawl_delay_s": st.crawl_delay,
+                    "requests": st.requests,
+                    "throttled": st.throttled,
+                }
+        return out
@@ -4,28 +4,34 @@
 Collect all file links from GitHub repo folders (via GitHub Contents API)
 and export to CSV at a specific Windows path.
 
-pip install requests pandas
+pip install requests
 """
 
 import os
 import sys
-import time
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
-import pandas as pd
 import requests
 
+from sinks import CsvSink
+from throttle import AdaptiveThrottle
+
 OWNER = "antoinemrn8"
 REPO = "iut_sd2_webscraping_UBB_MAURIN_SANZ"
 BRANCH = "main"
 ROOT_PATH = "data/Players"
 
 API_BASE = "https://api.github.com"
-SLEEP_SECONDS = 0.2
+SLEEP_SECONDS = 0.2  # délai initial, ajusté ensuite par le throttle
+
+# API GitHub : pas de robots.txt à lire, mais Retry-After sur les rate limits secondaires
+THROTTLE = AdaptiveThrottle(initial_delay=SLEEP_SECONDS, respect_robots=False)
 
 # ✅ Output path requested
 OUTPUT_DIR = r"C:\Users\rafae\OneDrive\Documents\web_scrapping\data"
 OUTPUT_CSV = os.path.join(OUTPUT_DIR, "players_github_links.csv")
+COLUMNS = ["group", "file_name", "file_path", "html_url", "raw_download_url", "size_bytes"]
 
 
 def gh_get_json(url: str, token: Optional[str] = None) -> List[Dict]:
@@ -36,7 +42,7 @@ def gh_get_json(url: str, token: Optional[str] = None) -> List[Dict]:
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    r = requests.get(url, headers=headers, timeout=30)
+    r = THROTTLE.fetch(requests, url, timeout=30, headers=headers)
     if r.status_code == 403 and "rate limit" in r.text.lower():
         raise RuntimeError(
             "GitHub API rate limit exceeded. Add a token via GITHUB_TOKEN env var."
@@ -60,44 +66,42 @@ def list_files_in_folder(folder_path: str, token: Optional[str]) -> List[Dict]:
     return [it for it in items if it.get("type") == "file"]
 
 
+def iter_file_links(folders: List[Dict], token: Optional[str]) -> Iterator[Dict]:
+    """Yield one row per file, folder by folder (sorted by group, then file name)."""
+    for f in sorted(folders, key=lambda it: it.get("name") or ""):
+        group = f.get("name")
+        folder_path = f.get("path")
+        print(f"Folder: {group} ({folder_path})")
+
+        files = list_files_in_folder(folder_path, token)
+
+        for file_item in sorted(files, key=lambda it: it.get("name") or ""):
+            yield {
+                "group": group,
+                "file_name": file_item.get("name"),
+                "file_path": file_item.get("path"),
+                "html_url": file_item.get("html_url"),
+                "raw_download_url": file_item.get("download_url"),
+                "size_bytes": file_item.get("size"),
+            }
+
+
 def main():
     token = os.getenv("GITHUB_TOKEN")  # optional
 
-    rows = []
     folders = list_subfolders(token)
 
     if not folders:
         print("No subfolders found. Check ROOT_PATH/BRANCH/REPO.")
         sys.exit(1)
 
-    for f in folders:
-        group = f.get("name")
-        folder_path = f.get("path")
-        print(f"Folder: {group} ({folder_path})")
-
-        time.sleep(SLEEP_SECONDS)
-        files = list_files_in_folder(folder_path, token)
+    # ✅ Rows are written as soon as each folder is listed
+    with CsvSink(Path(OUTPUT_CSV), COLUMNS, encoding="utf-8") as sink:
+        for row in iter_file_links(folders, token):
+            sink.write(row)
 
-        for file_item in files:
-            rows.append(
-                {
-                    "group": group,
-                    "file_name": file_item.get("name"),
-                    "file_path": file_item.get("path"),
-                    "html_url": file_item.get("html_url"),
-                    "raw_download_url": file_item.get("download_url"),
-                    "size_bytes": file_item.get("size"),
-                }
-            )
-
-    df = pd.DataFrame(rows).sort_values(["group", "file_name"]).reset_index(drop=True)
-
-    # ✅ Ensure folder exists, then export
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-
-    print(f"\n✅ Export done: {OUTPUT_CSV}")
-    print(df.head(10).to_string(index=False))
+    print(f"\n✅ Export done: {OUTPUT_CSV} ({sink.count} rows)")
+    print(f"⏱️ Throttle : {THROTTLE.metrics()}")
 
 
 if __name__ == "__main__":